@@ -6,6 +6,25 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from wait_engine import SeleniumWaiter
+from rate_controller import RateController, selenium_page_text
+from result_sink import JsonlSink, compact_jsonl
+from sqlite_store import SQLiteStore
+from seen_index import SeenIndex
+from element_probe import ElementProbe
+from metrics import ScrapeMetrics
+from process_tree import ProcessTreeMonitor
+
+# Признаки постов и ссылок на них в мобильной ленте
+FEED_MARKERS = [
+    'div[aria-label*="comment"]',
+    'div[aria-label*="Comment"]',
+    'a[href*="/story.php"]',
+    'div[data-ft*="top_level_post_id"]'
+]
+# Мобильный Facebook; для замеров без сети - адрес fb_standin_server с префиксом /m
+MOBILE_BASE_URL = 'https://m.facebook.com'
+COMMENT_MARKERS = ['[data-sigil="comment"]', 'div[data-ft*="comment"]', '#screen-root > div > div:nth-child(3) > div:nth-child(10) > div']
 
 def setup_driver():
     options = Options()
@@ -15,13 +34,16 @@ def setup_driver():
     options.add_argument('--log-level=3')
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
     options.add_experimental_option('useAutomationExtension', False)
-    return webdriver.Chrome(options=options)
+    driver = webdriver.Chrome(options=options)
+    # Промахи поиска в загруженном посте не ждут: готовность страницы - только явными ожиданиями
+    driver.implicitly_wait(0)
+    return driver
 
-def make_group_permalink_url(mobile_url, group_name=None):
+def make_group_permalink_url(mobile_url, group_name=None, base_url=MOBILE_BASE_URL):
     """
     Из любой кривой мобильной ссылки типа .../posts/.../{post_id}/
     строит корректную ссылку на пост в группе:
-    https://m.facebook.com/groups/{group_name}/permalink/{post_id}/
+    {base_url}/groups/{group_name}/permalink/{post_id}/
     """
     # Извлечь post_id
     m = re.search(r'/(\d+)/?$', mobile_url)
@@ -35,10 +57,10 @@ def make_group_permalink_url(mobile_url, group_name=None):
             group_name = m2.group(1)
         else:
             return mobile_url  # не удалось
-    return f"https://m.facebook.com/groups/{group_name}/permalink/{post_id}/"
+    return f"{base_url}/groups/{group_name}/permalink/{post_id}/"
 
-def load_cookies(driver):
-    driver.get('https://m.facebook.com')
+def load_cookies(driver, base_url=MOBILE_BASE_URL):
+    driver.get(base_url)
     try:
         with open('facebook_cookies.json', 'r') as f:
             cookies = json.load(f)
@@ -51,9 +73,14 @@ def load_cookies(driver):
     except Exception as e:
         print(f"Ошибка загрузки cookies: {e}")
 
-def get_post_links(driver, group_url=None):
+def get_post_links(driver, group_url=None, seen=None, base_url=MOBILE_BASE_URL):
     import re
-    time.sleep(3)  # Ждем загрузки страницы
+    waiter = SeleniumWaiter(driver)
+    # Ссылки этого вызова и посты, уже разобранные раньше (seen - SeenIndex группы)
+    found = SeenIndex()
+    seen = seen if seen is not None else SeenIndex()
+    # Ждем загрузки страницы и первых постов (не дольше прежних 3 секунд)
+    waiter.for_element(FEED_MARKERS, timeout=3)
 
     # Получаем имя группы из group_url
     group_name = None
@@ -102,7 +129,7 @@ def get_post_links(driver, group_url=None):
 
             # Скроллим к элементу
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-            time.sleep(1)
+            waiter.for_network_quiet(quiet=0.3, timeout=1)
 
             # Проверяем, является ли элемент ссылкой на пост
             if button.tag_name == 'a' and button.get_attribute('href') and 'story.php' in button.get_attribute('href'):
@@ -112,9 +139,9 @@ def get_post_links(driver, group_url=None):
                     m_id = re.search(r'/(\d+)/?$', post_url)
                     if m_id:
                         post_id = m_id.group(1)
-                        post_url = f"https://m.facebook.com/groups/{group_name}/permalink/{post_id}/"
+                        post_url = f"{base_url}/groups/{group_name}/permalink/{post_id}/"
                 # ---------------------------------
-                if post_url not in post_urls:
+                if post_url not in seen and found.add(post_url):
                     post_urls.append(post_url)
                     print(f"Найдена прямая ссылка на пост #{i+1}: {post_url}")
                 continue
@@ -130,9 +157,9 @@ def get_post_links(driver, group_url=None):
                         m_id = re.search(r'/(\d+)/?$', post_url)
                         if m_id:
                             post_id = m_id.group(1)
-                            post_url = f"https://m.facebook.com/groups/{group_name}/permalink/{post_id}/"
+                            post_url = f"{base_url}/groups/{group_name}/permalink/{post_id}/"
                     # ---------------------------------
-                    if post_url and post_url not in post_urls:
+                    if post_url and post_url not in seen and found.add(post_url):
                         post_urls.append(post_url)
                         print(f"Найдена ссылка в контейнере поста #{i+1}: {post_url}")
                         break
@@ -145,14 +172,13 @@ def get_post_links(driver, group_url=None):
             try:
                 # Скроллим немного вверх чтобы избежать перекрытия
                 driver.execute_script("window.scrollBy(0, -100);")
-                time.sleep(1)
 
                 # Сохраняем текущий URL перед кликом
                 url_before_click = driver.current_url
 
-                # Используем JavaScript клик
+                # Используем JavaScript клик; ждем перехода не дольше 3 секунд
                 driver.execute_script("arguments[0].click();", button)
-                time.sleep(3)
+                waiter.for_url_change(url_before_click, timeout=3)
 
                 # Получаем URL после клика
                 current_url = driver.current_url
@@ -172,16 +198,17 @@ def get_post_links(driver, group_url=None):
                         m_id = re.search(r'/(\d+)/?$', post_url)
                         if m_id:
                             post_id = m_id.group(1)
-                            post_url = f"https://m.facebook.com/groups/{group_name}/permalink/{post_id}/"
+                            post_url = f"{base_url}/groups/{group_name}/permalink/{post_id}/"
                     # ---------------------------------
-                    if post_url not in post_urls:
+                    if post_url not in seen and found.add(post_url):
                         post_urls.append(post_url)
                         print(f"Добавлен пост #{i+1}: {post_urls}")
 
                 # Возвращаемся к исходной странице
                 if current_url != url_before_click:
                     driver.back()
-                    time.sleep(3)
+                    waiter.for_url_change(current_url, timeout=3)
+                    waiter.for_ready_state(timeout=3)
 
             except Exception as e:
                 print(f"Ошибка клика по элементу #{i+1}: {e}")
@@ -189,7 +216,7 @@ def get_post_links(driver, group_url=None):
                 try:
                     if driver.current_url != original_url:
                         driver.get(original_url)
-                        time.sleep(3)
+                        waiter.for_element(FEED_MARKERS, timeout=3)
                 except:
                     pass
                 continue
@@ -201,14 +228,21 @@ def get_post_links(driver, group_url=None):
     print(f"Собрано {len(post_urls)} URL постов")
     return post_urls
 
-def parse_post(driver, post_urls):
+def parse_post(driver, post_urls, probe=None, metrics=None):
+    waiter = SeleniumWaiter(driver)
+    # Запасные селекторы проверяются через find_elements: промах без исключения и ожидания
+    probe = probe or ElementProbe()
+    # Время этапов (navigate, expand_comments, extract_comment, extract_post)
+    metrics = metrics or ScrapeMetrics('selenium-mobile')
     try:
         print(f"Загружаем пост: {post_urls}")
-        driver.get(post_urls)
-        time.sleep(5)  # Увеличиваем время ожидания
+        with metrics.stage('navigate'):
+            driver.get(post_urls)
+            waiter.for_ready_state(timeout=5)
     except Exception as e:
         print(f"Ошибка загрузки поста {post_urls}: {e}")
         return None
+    post_started = time.perf_counter()
     
     post_data = {
         'post_url': post_urls,
@@ -239,8 +273,8 @@ def parse_post(driver, post_urls):
         
         for selector in author_selectors:
             try:
-                author_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                if author_elem.text.strip():
+                author_elem = probe.first(driver, selector)
+                if author_elem is not None and author_elem.text.strip():
                     post_data['author_name'] = author_elem.text.strip()
                     print(f"Автор найден с селектором '{selector}': {post_data['author_name']}")
                     
@@ -249,8 +283,9 @@ def parse_post(driver, post_urls):
                         if author_elem.tag_name == 'a':
                             post_data['author_url'] = author_elem.get_attribute('href')
                         else:
-                            author_link = author_elem.find_element(By.XPATH, './/a')
-                            post_data['author_url'] = author_link.get_attribute('href')
+                            author_link = probe.first(author_elem, (By.XPATH, './/a'))
+                            if author_link is not None:
+                                post_data['author_url'] = author_link.get_attribute('href')
                     except:
                         pass
                     break
@@ -273,8 +308,8 @@ def parse_post(driver, post_urls):
         
         for selector in content_selectors:
             try:
-                content_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                if content_elem.text.strip():
+                content_elem = probe.first(driver, selector)
+                if content_elem is not None and content_elem.text.strip():
                     post_data['content'] = content_elem.text.strip()
                     print(f"Контент найден с селектором '{selector}': {post_data['content'][:100]}...")
                     break
@@ -286,89 +321,48 @@ def parse_post(driver, post_urls):
         
         # Прокрутка страницы для загрузки комментариев
         print("Прокручиваем страницу для загрузки комментариев...")
+        feed_state = waiter.feed_state('#screen-root')
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(3)
+        waiter.for_feed_growth(feed_state, timeout=3, feed_selector='#screen-root')
         
         # Попробуем кликнуть "Показать больше комментариев" если есть
+        expand_started = time.perf_counter()
         try:
             more_buttons = driver.find_elements(By.CSS_SELECTOR, 
                 '[data-sigil="m-more-comments"], a[href*="comment"], div[role="button"]')
             for button in more_buttons[:3]:  # Ограничиваем количество попыток
                 try:
                     if button.is_displayed() and ("comment" in button.text.lower() or "комментари" in button.text.lower()):
+                        previous = waiter.count(COMMENT_MARKERS)
                         driver.execute_script("arguments[0].click();", button)
-                        time.sleep(2)
+                        waiter.for_count_increase(COMMENT_MARKERS, previous, timeout=2)
                         print("Кликнули кнопку 'Показать больше комментариев'")
                 except:
                     continue
         except:
             pass
+        metrics.observe('expand_comments', time.perf_counter() - expand_started)
         
         # Комментарии - пробуем разные подходы
         comments_found = 0
         
         # Метод 1: Используем ваши селекторы
         try:
-            main_comments = driver.find_elements(By.CSS_SELECTOR, '#screen-root > div > div:nth-child(3) > div:nth-child(10) > div')
+            main_comments = probe.all(driver, '#screen-root > div > div:nth-child(3) > div:nth-child(10) > div')
             print(f"Найдено {len(main_comments)} потенциальных контейнеров комментариев")
             
             for i, comment_container in enumerate(main_comments):
-                try:
-                    # Автор комментария
-                    author_elem = comment_container.find_element(By.CSS_SELECTOR, 'div:nth-child(3) > div:nth-child(1) > div.m > div > div:nth-child(1) > div > span')
-                    author_name = author_elem.text.strip()
-                    
-                    # Текст комментария
-                    text_elem = comment_container.find_element(By.CSS_SELECTOR, 'div:nth-child(3) > div:nth-child(1) > div.m > div > div:nth-child(4)')
-                    comment_text = text_elem.text.strip()
-                    
-                    if author_name and comment_text:
-                        comment_data = {
-                            'author': author_name,
-                            'author_url': '',
-                            'text': comment_text,
-                            'type': 'comment'
-                        }
-                        
-                        post_data['comments'].append(comment_data)
-                        comments_found += 1
-                        print(f"Комментарий {comments_found}: {author_name}")
-                        
-                except Exception:
-                    # Пробуем альтернативные селекторы для этого контейнера
+                with metrics.stage('extract_comment'):
                     try:
-                        # Альтернативные селекторы для автора комментария
-                        alt_author_selectors = [
-                            'h3 a', 'strong a', 'span a', 'div a'
-                        ]
-                        
-                        # Альтернативные селекторы для текста комментария
-                        alt_text_selectors = [
-                            'div[data-sigil="comment-body"]',
-                            'span[dir="auto"]',
-                            'div[dir="auto"]'
-                        ]
-                        
-                        author_name = ''
-                        for auth_sel in alt_author_selectors:
-                            try:
-                                auth_elem = comment_container.find_element(By.CSS_SELECTOR, auth_sel)
-                                if auth_elem.text.strip():
-                                    author_name = auth_elem.text.strip()
-                                    break
-                            except:
-                                continue
-                        
-                        comment_text = ''
-                        for text_sel in alt_text_selectors:
-                            try:
-                                text_elem = comment_container.find_element(By.CSS_SELECTOR, text_sel)
-                                if text_elem.text.strip():
-                                    comment_text = text_elem.text.strip()
-                                    break
-                            except:
-                                continue
-                        
+                        # Автор комментария
+                        author_elem = probe.first(comment_container, 'div:nth-child(3) > div:nth-child(1) > div.m > div > div:nth-child(1) > div > span')
+                        # Текст комментария
+                        text_elem = probe.first(comment_container, 'div:nth-child(3) > div:nth-child(1) > div.m > div > div:nth-child(4)')
+                        if author_elem is None or text_elem is None:
+                            raise LookupError("comment layout differs")
+                        author_name = author_elem.text.strip()
+                        comment_text = text_elem.text.strip()
+                    
                         if author_name and comment_text:
                             comment_data = {
                                 'author': author_name,
@@ -376,38 +370,86 @@ def parse_post(driver, post_urls):
                                 'text': comment_text,
                                 'type': 'comment'
                             }
+                        
                             post_data['comments'].append(comment_data)
                             comments_found += 1
-                            print(f"Комментарий {comments_found} (альт. метод): {author_name}")
+                            print(f"Комментарий {comments_found}: {author_name}")
                         
-                    except:
-                        continue
+                    except Exception:
+                        # Пробуем альтернативные селекторы для этого контейнера
+                        try:
+                            # Альтернативные селекторы для автора комментария
+                            alt_author_selectors = [
+                                'h3 a', 'strong a', 'span a', 'div a'
+                            ]
+                        
+                            # Альтернативные селекторы для текста комментария
+                            alt_text_selectors = [
+                                'div[data-sigil="comment-body"]',
+                                'span[dir="auto"]',
+                                'div[dir="auto"]'
+                            ]
+                        
+                            author_name = ''
+                            for auth_sel in alt_author_selectors:
+                                try:
+                                    auth_elem = probe.first(comment_container, auth_sel)
+                                    if auth_elem is not None and auth_elem.text.strip():
+                                        author_name = auth_elem.text.strip()
+                                        break
+                                except:
+                                    continue
+                        
+                            comment_text = ''
+                            for text_sel in alt_text_selectors:
+                                try:
+                                    text_elem = probe.first(comment_container, text_sel)
+                                    if text_elem is not None and text_elem.text.strip():
+                                        comment_text = text_elem.text.strip()
+                                        break
+                                except:
+                                    continue
+                        
+                            if author_name and comment_text:
+                                comment_data = {
+                                    'author': author_name,
+                                    'author_url': '',
+                                    'text': comment_text,
+                                    'type': 'comment'
+                                }
+                                post_data['comments'].append(comment_data)
+                                comments_found += 1
+                                print(f"Комментарий {comments_found} (альт. метод): {author_name}")
+                        
+                        except:
+                            continue
         except Exception as e:
             print(f"Ошибка поиска комментариев методом 1: {e}")
         
         # Метод 2: Общий поиск комментариев
         if comments_found == 0:
             try:
-                all_comments = driver.find_elements(By.CSS_SELECTOR, '[data-sigil="comment"], div[data-ft*="comment"]')
+                all_comments = probe.all(driver, '[data-sigil="comment"], div[data-ft*="comment"]')
                 print(f"Найдено {len(all_comments)} комментариев общим методом")
                 
                 for comment in all_comments[:20]:  # Ограничиваем количество
-                    try:
-                        author_elem = comment.find_element(By.CSS_SELECTOR, 'h3 a, strong a, span a')
-                        text_elem = comment.find_element(By.CSS_SELECTOR, '[data-sigil="comment-body"], span[dir="auto"], div[dir="auto"]')
+                    with metrics.stage('extract_comment'):
+                        try:
+                            author_elem = probe.first(comment, 'h3 a, strong a, span a')
+                            text_elem = probe.first(comment, '[data-sigil="comment-body"], span[dir="auto"], div[dir="auto"]')
                         
-                        if author_elem.text.strip() and text_elem.text.strip():
-                            comment_data = {
-                                'author': author_elem.text.strip(),
-                                'author_url': author_elem.get_attribute('href') if author_elem.tag_name == 'a' else '',
-                                'text': text_elem.text.strip(),
-                                'type': 'comment'
-                            }
-                            post_data['comments'].append(comment_data)
-                            comments_found += 1
+                            if author_elem is not None and text_elem is not None and author_elem.text.strip() and text_elem.text.strip():
+                                comment_data = {
+                                    'author': author_elem.text.strip(),
+                                    'author_url': author_elem.get_attribute('href') if author_elem.tag_name == 'a' else '',
+                                    'text': text_elem.text.strip(),
+                                    'type': 'comment'
+                                }
+                                post_data['comments'].append(comment_data)
+                                comments_found += 1
                             
-                    except:
-                        continue
+                        except:
+                            continue
             except Exception as e:
                 print(f"Ошибка поиска комментариев методом 2: {e}")
         
@@ -415,22 +457,38 @@ def parse_post(driver, post_urls):
                 
     except Exception as e:
         print(f"Общая ошибка парсинга поста {post_urls}: {e}")
+        metrics.record_error('extract_post')
     
+    metrics.observe('extract_post', time.perf_counter() - post_started)
     return post_data
 
-def main(group_url=None):
+def main(group_url=None, adaptive_rate=False, sqlite_path=None, seen_dir=None, base_url=MOBILE_BASE_URL,
+         metrics_file=None, metrics_port=0):
     driver = setup_driver()
-    post_links = get_post_links(driver, group_url)
+    # Пауза между постами: 2 секунды, с adaptive_rate - по ответам Facebook (AIMD)
+    rate = RateController(initial_delay=2, adaptive=adaptive_rate)
+    # Разобранные посты группы; с seen_dir посты прошлых запусков пропускаются
+    seen = SeenIndex(group_url or 'm.facebook.com', seen_dir)
+    # Общие счетчики промахов поиска элементов по всем постам
+    probe = ElementProbe()
+    # Время этапов по всем постам; metrics_file - файл OpenMetrics, metrics_port - HTTP /metrics
+    metrics = ScrapeMetrics('selenium-mobile', group_url or base_url, path=metrics_file, port=metrics_port)
+    # Память, CPU и дескрипторы по процессам (python, chromedriver, браузер, рендереры) и прирост на пост
+    process_monitor = ProcessTreeMonitor(metrics=metrics)
+    post_links = get_post_links(driver, group_url, base_url=base_url)
     try:
-        load_cookies(driver)
+        load_cookies(driver, base_url)
         
         # Переходим в группу или на главную
-        if group_url:
-            print(f"Переходим к группе: {group_url}")
-            driver.get(group_url)
-        else:
-            driver.get('https://m.facebook.com')
-        time.sleep(5)  # Увеличиваем время ожидания
+        waiter = SeleniumWaiter(driver)
+        with metrics.stage('navigate'):
+            if group_url:
+                print(f"Переходим к группе: {group_url}")
+                driver.get(group_url)
+            else:
+                driver.get(base_url)
+            waiter.for_ready_state(timeout=5)
+            waiter.for_element(FEED_MARKERS, timeout=5)
         
         print(f"Текущий URL после загрузки: {driver.current_url}")
         print(f"Заголовок страницы: {driver.title}")
@@ -443,35 +501,67 @@ def main(group_url=None):
         # Попробуем прокрутить страницу, чтобы загрузить посты
         print("Прокручиваем страницу для загрузки постов...")
         for i in range(3):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+            with metrics.stage('scroll'):
+                feed_state = waiter.feed_state()
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
+                waiter.for_feed_growth(feed_state, timeout=2)
+                driver.execute_script("window.scrollTo(0, 0);")
         
-        all_posts_data = []
+        # Посты пишутся построчно сразу после разбора; JSON-массив собирается в конце
+        sink = JsonlSink('facebook_posts.jsonl', append=False)
+        store = SQLiteStore(sqlite_path) if sqlite_path else None
         
         # Получаем ссылки на посты
-        post_links = get_post_links(driver)
+        post_links = get_post_links(driver, seen=seen, base_url=base_url)
         
         if not post_links:
             print("Посты не найдены. Возможно группа закрытая или нужна прокрутка страницы.")
             return
         
+        # Снимок до цикла: приращение первого поста - не все дерево браузера
+        process_monitor.sample()
         for post_url in post_links:
             print(f"Парсинг поста: {post_url}")
-            post_data = parse_post(driver, post_url)
+            load_started = time.time()
+            # Снимок после прошлого поста - он же "до" этого: один обход дерева на пост
+            tree_before = process_monitor.last
+            post_data = parse_post(driver, post_url, probe, metrics)
+            process_monitor.record_post(tree_before, post_url)
+            throttle = rate.check_page(driver.current_url, selenium_page_text(driver))
+            if throttle:
+                print(f"Признаки ограничения ({throttle}), пауза увеличена до {rate.delay:.1f}с")
+            elif post_data:
+                rate.record_success(time.time() - load_started)
+            else:
+                rate.record_empty()
             if post_data:
-                all_posts_data.append(post_data)
+                seen.add(post_url)
+                with metrics.stage('write'):
+                    sink.write(post_data)
+                    if store:
+                        store.write(post_data, group_url=group_url)
+                metrics.record_post(len(post_data['comments']))
                 print(f"Спарсено: автор - {post_data['author_name']}, комментариев - {len(post_data['comments'])}")
-            time.sleep(2)  # Пауза между постами
+            metrics.set_gauge('rate_delay_seconds', rate.delay)
+            rate.pause()  # Пауза между постами
         
         # Сохраняем данные
-        with open('facebook_posts.json', 'w', encoding='utf-8') as f:
-            json.dump(all_posts_data, f, ensure_ascii=False, indent=2)
+        sink.close()
+        compact_jsonl(sink.parts, 'facebook_posts.json')
             
-        print(f"Спарсено {len(all_posts_data)} постов")
+        print(f"Спарсено {sink.written} постов")
+        print(f"Темп: {json.dumps(rate.report(), ensure_ascii=False)}")
+        print(f"Поиск элементов: {json.dumps(probe.stats.report(), ensure_ascii=False)}")
+        print(f"Этапы: {json.dumps(metrics.report(), ensure_ascii=False)}")
+        print(f"Процессы: {json.dumps(process_monitor.report(), ensure_ascii=False)}")
         
     finally:
+        if 'sink' in locals():
+            sink.close()
+        if locals().get('store'):
+            store.close()
+        seen.save()
+        metrics.close()
         driver.quit()
 
 if __name__ == "__main__":
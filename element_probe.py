@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from selector_compiler import BY_CSS, SelectorCompiler
+
+# Поиск элементов внутри уже загруженных контейнеров без implicit wait.
+# find_element при промахе ждет implicit wait целиком (в v2 - 5 секунд) и бросает
+# исключение; в цепочке запасных селекторов это секунды на каждый мертвый селектор.
+# Здесь поиск идет через find_elements и проверку на пустоту: при implicitly_wait(0)
+# промах стоит одно обращение к драйверу. Ожидания готовности страницы остаются явными
+# (WebDriverWait / SeleniumWaiter). Попадания, промахи и их время считаются в ProbeStats.
+
+logger = logging.getLogger(__name__)
+
+Locator = Tuple[str, str]
+
+
+class ProbeStats:
+    """Счетчики поиска элементов: попадания, промахи и время на них"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.hit_time = 0.0
+        self.miss_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool, elapsed: float):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.hit_time += elapsed
+            else:
+                self.misses += 1
+                self.miss_time += elapsed
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'lookups': self.hits + self.misses,
+                'hits': self.hits,
+                'misses': self.misses,
+                'miss_time_sec': round(self.miss_time, 3),
+                'avg_miss_ms': round(1000 * self.miss_time / self.misses, 2) if self.misses else 0.0,
+                'avg_hit_ms': round(1000 * self.hit_time / self.hits, 2) if self.hits else 0.0
+            }
+
+
+class ElementProbe:
+    """find_elements-поиск в контейнере (элементе или драйвере); селекторы - через компилятор"""
+
+    def __init__(self, compiler: Optional[SelectorCompiler] = None, stats: Optional[ProbeStats] = None):
+        self.compiler = compiler
+        self.stats = stats or ProbeStats()
+
+    def _locator(self, selector: Union[str, Locator]) -> Locator:
+        if isinstance(selector, tuple):
+            return selector
+        return self.compiler.locator(selector) if self.compiler else (BY_CSS, selector)
+
+    def all(self, root, selector: Union[str, Locator]) -> List[Any]:
+        started = time.perf_counter()
+        elements = root.find_elements(*self._locator(selector))
+        self.stats.record(bool(elements), time.perf_counter() - started)
+        return elements
+
+    def first(self, root, selector: Union[str, Locator]) -> Optional[Any]:
+        """Первый найденный элемент или None (без исключения и без ожидания)"""
+        elements = self.all(root, selector)
+        return elements[0] if elements else None
+
+    def exists(self, root, selector: Union[str, Locator]) -> bool:
+        return bool(self.all(root, selector))
@@ -0,0 +1,407 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import importlib
+import importlib.machinery
+import importlib.util
+import io
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from element_probe import ElementProbe
+
+# Офлайн-бенчмарк извлечения данных на сохраненных HTML-страницах (без сети и аккаунта).
+# Корпус - файлы в каталоге фикстур: лента (feed), страница поста (permalink), модальное
+# окно поста (modal) и мобильная страница поста (mobile_post). Недостающие фикстуры
+# генерируются; их можно заменить настоящими сохраненными страницами с теми же именами.
+# Страницы открываются в локальном headless Chromium (file:// для Selenium, set_content
+# для Playwright), каждый путь извлечения замеряется на пост или на страницу комментариев:
+# время (p50/p95) и число обращений к драйверу. Результат - JSON для сравнения прогонов.
+#
+#     python extraction_bench.py --iterations 20
+#     python extraction_bench.py --compare bench_results/extraction_20260101_120000.json
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent
+FIXTURES = ('feed', 'permalink', 'modal', 'mobile_post')
+FEED_POST_SELECTOR = 'div[role="feed"] > div[role="article"]'
+COMMENT_SELECTOR = 'div[role="article"][aria-label*="Comment"]'
+BASE_TIME = 1700000000
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>{body}</body></html>
+"""
+
+
+def _comment_html(post_index: int, index: int) -> str:
+    return (
+        f'<div role="article" aria-label="Comment by Комментатор {index % 11}" data-testid="UFI2Comment/root">'
+        f'<a role="link" href="https://www.facebook.com/profile.php?id={100 + index % 11}">'
+        f'<strong>Комментатор {index % 11}</strong></a>'
+        f'<div dir="auto" data-testid="UFI2CommentBodyText">Комментарий {index} к посту {post_index}: '
+        f'достаточно длинный текст для экстракторов</div>'
+        f'<a role="link" href="https://www.facebook.com/groups/bench/posts/{post_index}/?comment_id={index}">'
+        f'<abbr data-utime="{BASE_TIME + index * 60}"><span title="{index} мин">{index} мин</span></abbr></a>'
+        f'<span aria-label="{index % 5} reactions">{index % 5}</span>'
+        f'</div>'
+    )
+
+
+def _article_html(index: int, comments: int) -> str:
+    return (
+        f'<div role="article" aria-posinset="{index + 1}">'
+        f'<h2><a role="link" href="https://www.facebook.com/profile.php?id={index % 17}">Автор {index % 17}</a></h2>'
+        f'<a href="https://www.facebook.com/groups/bench/posts/{1000 + index}/?__cft__=bench">'
+        f'<abbr data-utime="{BASE_TIME - index * 3600}" title="{index} ч">{index} ч</abbr></a>'
+        f'<div data-ad-comet-preview="message"><span>Тестовый пост номер {index} для замеров экстракторов. '
+        f'Ссылка: <a href="https://example.com/article/{index}">example.com</a></span></div>'
+        f'<img src="https://scontent.example/photo_{index}.jpg" alt="Фото {index}">'
+        f'<span aria-label="{index % 50} reactions">{index % 50}</span>'
+        f'<span aria-label="{index % 7} shares">{index % 7} shares</span>'
+        f'<div>{"".join(_comment_html(1000 + index, c) for c in range(comments))}</div>'
+        f'</div>'
+    )
+
+
+def _mobile_post_html(comments: int) -> str:
+    comment_blocks = ''.join(
+        f'<div data-sigil="comment"><h3><a href="/profile.php?id={100 + i % 11}">Комментатор {i % 11}</a></h3>'
+        f'<div data-sigil="comment-body">Комментарий {i} к мобильному посту</div></div>'
+        for i in range(comments)
+    )
+    return (
+        '<div id="screen-root"><div><div></div><div></div><div>'
+        '<div data-ft=\'{"top_level_post_id":"1000"}\'><h3><a href="/profile.php?id=1">Автор 1</a></h3>'
+        '<div data-sigil="m-story-dom-content"><p>Тестовый мобильный пост для замеров parse_post</p></div></div>'
+        f'{comment_blocks}'
+        '</div></div></div>'
+    )
+
+
+def write_fixtures(directory: Path, posts: int = 10, comments: int = 20) -> Dict[str, Path]:
+    """Пути фикстур; отсутствующие файлы генерируются (существующие не перезаписываются)"""
+    directory.mkdir(parents=True, exist_ok=True)
+    builders = {
+        'feed': lambda: _PAGE.format(
+            title="Лента группы",
+            body=f'<div role="feed">{"".join(_article_html(i, 3) for i in range(posts))}</div>'
+        ),
+        'permalink': lambda: _PAGE.format(title="Пост", body=_article_html(0, comments)),
+        'modal': lambda: _PAGE.format(
+            title="Группа",
+            body=f'<div role="dialog" aria-modal="true">{_article_html(0, comments)}</div>'
+        ),
+        'mobile_post': lambda: _PAGE.format(title="Пост", body=_mobile_post_html(comments)),
+    }
+    paths = {}
+    for name in FIXTURES:
+        path = directory / f"{name}.html"
+        if not path.exists():
+            path.write_text(builders[name](), encoding='utf-8')
+        paths[name] = path
+    return paths
+
+
+def _load_source(name: str, filename: str):
+    """Импорт модуля репозитория по имени файла (имена с пробелом и без расширения)"""
+    loader = importlib.machinery.SourceFileLoader(name, str(ROOT / filename))
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Ближайший ранг: наименьшее значение, не меньшее доли fraction выборки
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class SeleniumRoundTrips:
+    """Счетчик команд WebDriver: все вызовы драйвера и элементов проходят через driver.execute"""
+
+    def __init__(self, driver):
+        self.count = 0
+        original = driver.execute
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return original(*args, **kwargs)
+
+        driver.execute = counted
+
+
+class PlaywrightRoundTrips:
+    """Счетчик сообщений клиента Playwright драйверу (внутренний Connection; None - если API изменился)"""
+
+    def __init__(self):
+        self.count: Optional[int] = None
+        self._original = None
+        try:
+            from playwright._impl._connection import Connection
+        except ImportError:
+            return
+        original = getattr(Connection, '_send_message_to_server', None)
+        if original is None:
+            return
+        self.count = 0
+        self._connection_class = Connection
+        self._original = original
+
+        def counted(connection, *args, **kwargs):
+            self.count += 1
+            return original(connection, *args, **kwargs)
+
+        Connection._send_message_to_server = counted
+
+    def close(self):
+        if self._original is not None:
+            self._connection_class._send_message_to_server = self._original
+
+
+class PathTimer:
+    """Замеры одного пути извлечения: время, обращения к драйверу и число извлеченных элементов"""
+
+    def __init__(self, unit: str, counter=None):
+        self.unit = unit
+        self.counter = counter
+        self.samples: List[float] = []
+        self.round_trips: List[int] = []
+        self.items: List[int] = []
+
+    def _count(self) -> Optional[int]:
+        return self.counter.count if self.counter is not None else None
+
+    def _record(self, started: float, trips_before: Optional[int], result: Any):
+        self.samples.append(time.perf_counter() - started)
+        trips_after = self._count()
+        if trips_before is not None and trips_after is not None:
+            self.round_trips.append(trips_after - trips_before)
+        self.items.append(len(result) if isinstance(result, (list, tuple)) else int(result is not None))
+
+    def measure(self, fn: Callable[..., Any], *args) -> Any:
+        trips_before = self._count()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn(*args)
+        self._record(started, trips_before, result)
+        return result
+
+    async def measure_async(self, awaitable: Awaitable[Any]) -> Any:
+        trips_before = self._count()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = await awaitable
+        self._record(started, trips_before, result)
+        return result
+
+    def result(self) -> Dict[str, Any]:
+        samples_ms = [1000 * sample for sample in self.samples]
+        total_items = sum(self.items)
+        return {
+            'unit': self.unit,
+            'samples': len(samples_ms),
+            'p50_ms': round(_percentile(samples_ms, 0.50), 3),
+            'p95_ms': round(_percentile(samples_ms, 0.95), 3),
+            'mean_ms': round(sum(samples_ms) / len(samples_ms), 3) if samples_ms else 0.0,
+            'round_trips_mean': round(sum(self.round_trips) / len(self.round_trips), 2) if self.round_trips else None,
+            'items': total_items,
+            'per_item_ms': round(sum(samples_ms) / total_items, 3) if total_items else None
+        }
+
+
+def _selenium_driver(implicit_wait: float):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    driver = webdriver.Chrome(options=options)
+    driver.implicitly_wait(implicit_wait)
+    return driver
+
+
+def bench_v2(fixtures: Dict[str, Path], iterations: int, implicit_wait: float) -> Dict[str, Any]:
+    """v2: PostProcessor (JS-движок и поэлементный путь) на ленте, CommentExtractor на странице поста"""
+    v2 = _load_source('fb_scraper_v2', 'facebook_group_scraper_optimized v2.py')
+    driver = _selenium_driver(implicit_wait)
+    counter = SeleniumRoundTrips(driver)
+    probe = ElementProbe()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            for inpage in (True, False):
+                config = v2.ScrapingConfig(
+                    group_url='file://bench', output_dir=output_dir,
+                    log_level=v2.LogLevel.WARNING, inpage_extraction=inpage
+                )
+                logger_manager = v2.LoggerManager(config)
+                processor = v2.PostProcessor(
+                    config, logger_manager, v2.CacheManager(config, logger_manager), v2.RetryManager()
+                )
+                driver.get(fixtures['feed'].as_uri())
+                posts = probe.all(driver, FEED_POST_SELECTOR)
+                timer = PathTimer('post', counter)
+                for _ in range(iterations):
+                    for post in posts:
+                        # Без кэшей: каждый замер - полное извлечение
+                        processor.cache_manager.clear_cache()
+                        v2.AuthorExtractor.extract.cache_clear()
+                        timer.measure(processor._process_single_post, post)
+                results['v2.post.' + ('inpage' if inpage else 'per_call')] = timer.result()
+
+            driver.get(fixtures['permalink'].as_uri())
+            comments = probe.all(driver, COMMENT_SELECTOR)
+            timer = PathTimer('comment', counter)
+            for _ in range(iterations):
+                for comment in comments:
+                    timer.measure(processor.comment_extractor._extract_single_comment, comment)
+            results['v2.comment'] = timer.result()
+    finally:
+        driver.quit()
+    return results
+
+
+async def _bench_scraper20(fixtures: Dict[str, Path], iterations: int) -> Dict[str, Any]:
+    from playwright.async_api import async_playwright
+
+    scraper20 = _load_source('scraper20', 'Scraper20')
+    scraper = scraper20.FacebookScraper(headless=True, selector_stats=None)
+    counter = PlaywrightRoundTrips()
+    results = {}
+    try:
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            page = await browser.new_page()
+            for name, modal in (('permalink', False), ('modal', True)):
+                await page.set_content(fixtures[name].read_text(encoding='utf-8'))
+                for batched in (True, False):
+                    timer = PathTimer('page', counter)
+                    for _ in range(iterations):
+                        await timer.measure_async(scraper.extract_full_comments(page, modal=modal, batched=batched))
+                    results[f"scraper20.comments.{name}.{'batched' if batched else 'per_element'}"] = timer.result()
+            await browser.close()
+    finally:
+        counter.close()
+    return results
+
+
+def bench_scraper20(fixtures: Dict[str, Path], iterations: int) -> Dict[str, Any]:
+    """Scraper20.extract_full_comments: один evaluate и поэлементный путь, страница и модальное окно"""
+    return asyncio.run(_bench_scraper20(fixtures, iterations))
+
+
+def bench_mobile(fixtures: Dict[str, Path], iterations: int, implicit_wait: float) -> Dict[str, Any]:
+    """ScraperMobile4.parse_post на мобильной странице поста (вместе с ожиданиями самого parse_post)"""
+    mobile = importlib.import_module('ScraperMobile4')
+    driver = _selenium_driver(implicit_wait)
+    counter = SeleniumRoundTrips(driver)
+    probe = ElementProbe()
+    timer = PathTimer('post', counter)
+    try:
+        for _ in range(iterations):
+            post = timer.measure(mobile.parse_post, driver, fixtures['mobile_post'].as_uri(), probe)
+            # Элементов замера - комментарии поста
+            timer.items[-1] = len(post['comments']) if post else 0
+    finally:
+        driver.quit()
+    return {'mobile.parse_post': timer.result()}
+
+
+def run(fixtures_dir: Path, iterations: int, paths: List[str], implicit_wait: float = 0) -> Dict[str, Any]:
+    fixtures = write_fixtures(fixtures_dir)
+    report = {
+        'created': datetime.now().isoformat(),
+        'iterations': iterations,
+        'implicit_wait': implicit_wait,
+        'fixtures': {
+            name: hashlib.sha1(path.read_bytes()).hexdigest()[:12] for name, path in fixtures.items()
+        },
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'paths': {},
+        'skipped': {}
+    }
+    benches = {
+        'v2': lambda: bench_v2(fixtures, iterations, implicit_wait),
+        'scraper20': lambda: bench_scraper20(fixtures, iterations),
+        'mobile': lambda: bench_mobile(fixtures, iterations, implicit_wait),
+    }
+    for name in paths:
+        try:
+            report['paths'].update(benches[name]())
+        except ImportError as e:
+            # Путь требует браузерных зависимостей, которых нет в окружении
+            report['skipped'][name] = f"missing dependency: {e}"
+            logger.warning(f"Skipping {name}: {e}")
+    return report
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Строки сравнения p50/p95 и обращений к драйверу с прошлым прогоном"""
+    lines = []
+    if previous.get('fixtures') != current.get('fixtures'):
+        lines.append("warning: fixture corpus differs from the previous run")
+    for path, result in current['paths'].items():
+        before = previous.get('paths', {}).get(path)
+        if not before:
+            lines.append(f"{path}: new")
+            continue
+        parts = []
+        for key in ('p50_ms', 'p95_ms', 'round_trips_mean'):
+            if before.get(key) is None or result.get(key) is None:
+                continue
+            delta = result[key] - before[key]
+            ratio = f" ({delta / before[key]:+.1%})" if before[key] else ''
+            parts.append(f"{key} {before[key]} -> {result[key]}{ratio}")
+        lines.append(f"{path}: " + ', '.join(parts))
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк путей извлечения на HTML-фикстурах")
+    parser.add_argument('--fixtures', default=str(ROOT / 'bench_fixtures'))
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--paths', default='v2,scraper20,mobile', help="Через запятую: v2, scraper20, mobile")
+    parser.add_argument('--implicit-wait', type=float, default=0,
+                        help="implicitly_wait для Selenium (0 - режим проб, 5 - прежнее поведение v2)")
+    parser.add_argument('--out', default=str(ROOT / 'bench_results'))
+    parser.add_argument('--compare', help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = run(Path(args.fixtures), args.iterations, [p.strip() for p in args.paths.split(',') if p.strip()],
+                 args.implicit_wait)
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"extraction_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for path, result in report['paths'].items():
+        print(f"{path:45} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+              f"round trips {result['round_trips_mean']}")
+    for path, reason in report['skipped'].items():
+        print(f"{path:45} skipped: {reason}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            for line in compare(json.load(f), report):
+                print(line)
+    print(f"Results: {out_path}")
+    sys.exit(0 if report['paths'] else 1)
@@ -13,16 +13,17 @@ import time
 import json
 from datetime import datetime, timedelta
 import os
+import shutil
 import sys
 import logging
 from logging.handlers import RotatingFileHandler
 import weakref
 import gc
 from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from abc import ABC, abstractmethod
 import threading
-from queue import Queue, Empty, Full
+from queue import Queue, Empty
 import asyncio
 from urllib.parse import urljoin, urlparse
 import hashlib
@@ -31,6 +32,23 @@ from contextlib import contextmanager
 import traceback
 from enum import Enum
 
+from snapshot_parser import SnapshotParserPool
+from wait_engine import GRAPHQL_URL_PATTERN, SeleniumWaiter, WaitStats
+from feed_queue import SeleniumFeedQueue
+from rate_controller import RateController, selenium_page_text
+from result_sink import JsonlSink, compact_jsonl
+from sqlite_store import SQLiteStore
+from seen_index import SeenIndex
+from selector_registry import SelectorRegistry
+from selector_compiler import SelectorCompiler
+from element_probe import ElementProbe
+from metrics import ScrapeMetrics
+from process_tree import ROLES, ProcessTreeMonitor
+from recycle_policy import RecyclePolicy
+from incremental import IncrementalTracker, chronological_url
+from routing_profiles import (RoutingStats, apply_selenium_profile, collect_selenium_blocked,
+                              configure_selenium_options, get_profile)
+
 # Настройка логирования
 class LogLevel(Enum):
     DEBUG = logging.DEBUG
@@ -44,20 +62,48 @@ class ScrapingConfig:
     """Конфигурация для скрапинга"""
     group_url: str
     cookies_file: str = "cookies.json"
+    base_url: str = "https://www.facebook.com"  # Хост для куки; для замеров без Facebook - адрес fb_standin_server
     max_posts: int = 5
     batch_size: int = 5
     max_scroll_attempts: int = 400
     scroll_delay: float = 2.0
     page_load_timeout: int = 30
-    implicit_wait: int = 5
+    implicit_wait: int = 5  # Используется только без probe_mode
+    probe_mode: bool = True  # Поиск внутри постов без implicit wait (find_elements); ожидания страницы - явные
     output_dir: str = "output"
     log_level: LogLevel = LogLevel.INFO
     enable_gpu: bool = True
-    parallel_workers: int = 4
+    max_memory_usage: float = 85.0  # % памяти системы: выше - предупреждение с разбивкой по процессам
+    gc_threshold_mb: float = 50.0  # Рост RSS самого Python за пост, после которого вызывается gc.collect
     cache_size: int = 1000
     cache_ttl: int = 3600
     retry_attempts: int = 3
     retry_delay: float = 1.0
+    enable_async: bool = False
+    inpage_extraction: bool = True  # Извлечение поста одним execute_script
+    snapshot_parsing: bool = True  # Разбор снимков outerHTML в пуле процессов (False - разбор в потоке скрапинга)
+    parser_processes: int = 8
+    shard_processes: int = 0  # Процессов-шардов со своим драйвером (0 - один драйвер)
+    routing_profile: str = "full"  # full / text+image-urls / text-only
+    feed_queue: bool = True  # Новые посты из MutationObserver вместо поиска по всей странице
+    prune_feed: bool = False  # Прореживать обработанные посты выше окна просмотра
+    live_posts_window: int = 30  # Сколько обработанных постов оставлять в DOM нетронутыми
+    adaptive_rate: bool = False  # AIMD-темп: scroll_delay - стартовая задержка, дальше по ответам
+    min_delay: float = 0.5
+    max_delay: float = 30.0
+    stream_results: bool = False  # Каждый пост сразу дописывается в JSONL (results_file в output_dir)
+    results_file: str = "scraped_posts.jsonl"
+    results_rotate_mb: int = 256
+    sqlite_path: Optional[str] = None  # Upsert постов, комментариев и авторов в SQLite
+    seen_index_dir: Optional[str] = None  # Фильтр Блума виденных постов группы между запусками
+    incremental: bool = False  # Хронологическая лента до отметки прошлого запуска (state в seen_index_dir или output_dir/state)
+    incremental_stop_after: int = 5  # Столько известных постов подряд - конец новых
+    metrics_file: Optional[str] = None  # OpenMetrics-файл в output_dir (перезаписывается раз в 15 секунд)
+    metrics_port: int = 0  # Локальный HTTP /metrics (0 - выключен)
+    recycle_after_posts: int = 0  # Перезапуск вкладки/браузера каждые N постов (0 - выключено)
+    recycle_renderer_mb: float = 0.0  # ... или при RSS рендереров выше X МБ
+    recycle_after_minutes: float = 0.0  # ... или раз в T минут
+    recycle_scope: str = "browser"  # page - новая вкладка; context / browser - новый Chrome с куки
 
 @dataclass
 class AuthorInfo:
@@ -88,6 +134,14 @@ class CommentInfo:
         if self.reactions is None:
             self.reactions = {}
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CommentInfo':
+        """Восстановление из asdict() (чекпоинты, результаты шардов)"""
+        data = dict(data)
+        data['author'] = AuthorInfo(**data['author']) if data.get('author') else None
+        data['replies'] = [cls.from_dict(reply) for reply in data.get('replies') or []]
+        return cls(**data)
+
 @dataclass
 class PostInfo:
     """Информация о посте"""
@@ -111,6 +165,14 @@ class PostInfo:
         if self.tags is None:
             self.tags = []
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PostInfo':
+        """Восстановление из asdict() (чекпоинты, результаты шардов)"""
+        data = dict(data)
+        data['author'] = AuthorInfo(**data['author']) if data.get('author') else None
+        data['comments'] = [CommentInfo.from_dict(comment) for comment in data.get('comments') or []]
+        return cls(**data)
+
 class LoggerManager:
     """Централизованное управление логированием"""
     
@@ -190,36 +252,45 @@ class RetryManager:
         return wrapper
 
 class MemoryManager:
-    """Управление памятью и ресурсами"""
+    """Управление памятью и ресурсами: приращения RSS дерева процессов по ролям"""
     
-    def __init__(self, logger: LoggerManager):
+    def __init__(self, logger: LoggerManager, process_monitor: Optional[ProcessTreeMonitor] = None,
+                 gc_threshold_mb: float = 50.0):
         self.logger = logger
-        self.start_memory = psutil.virtual_memory().percent
+        self.process_monitor = process_monitor or ProcessTreeMonitor()
+        self.gc_threshold_mb = gc_threshold_mb
+        self.start_memory = self.process_monitor.sample()['total']['rss_mb']
         
     @contextmanager
     def memory_monitoring(self, operation_name: str):
-        """Контекстный менеджер для мониторинга памяти"""
-        start_memory = psutil.virtual_memory().percent
+        """Контекстный менеджер для мониторинга памяти (приращение за операцию - в отчет монитора)"""
+        # Снимок после прошлой операции - он же "до" этой: один обход дерева на пост
+        before = self.process_monitor.last
         start_time = time.time()
         
         try:
             yield
         finally:
-            end_memory = psutil.virtual_memory().percent
+            change = self.process_monitor.record_post(before, operation_name)
             duration = time.time() - start_time
-            memory_diff = end_memory - start_memory
             
             self.logger.log_performance(
                 operation_name,
                 duration,
-                memory_change=f"{memory_diff:+.1f}%",
-                final_memory=f"{end_memory:.1f}%"
+                memory_change=f"{change['total']['rss_mb']:+.1f}MB",
+                python_change=f"{change['python']['rss_mb']:+.1f}MB",
+                renderer_change=f"{change['renderer']['rss_mb']:+.1f}MB",
+                fds_change=f"{change['total']['fds']:+.0f}",
+                final_memory=f"{self.process_monitor.last['total']['rss_mb']:.1f}MB"
             )
             
-            # Принудительная очистка памяти при необходимости
-            if memory_diff > 10:  # Если память выросла более чем на 10%
+            # gc.collect освобождает только кучу Python: рост процессов браузера им не убрать
+            if change['python']['rss_mb'] > self.gc_threshold_mb:
                 gc.collect()
-                self.logger.logger.warning(f"Force garbage collection after {operation_name}")
+                self.logger.logger.warning(
+                    f"Force garbage collection after {operation_name}: "
+                    f"Python RSS grew by {change['python']['rss_mb']:.1f}MB"
+                )
 
 class CacheManager:
     """Улучшенное управление кэшированием"""
@@ -299,6 +370,14 @@ class ElementExtractor(ABC):
         self.cache_manager = cache_manager
         self.retry_manager = retry_manager
         self.logger = logger
+        # Порядок запасных селекторов по статистике (PostProcessor подставляет общий реестр)
+        self.selectors = SelectorRegistry()
+        # Проверенные локаторы Selenium (текстовые псевдоселекторы переведены в XPath)
+        self.compiler = SelectorCompiler('selenium')
+        # Поиск в контейнере без исключений и ожиданий; PostProcessor подставляет общий
+        self.probe = ElementProbe(self.compiler)
+        # Время этапов (скрапер подставляет общие метрики)
+        self.metrics = ScrapeMetrics('selenium')
         
     @abstractmethod
     def extract(self, post_element) -> Any:
@@ -319,15 +398,29 @@ class AuthorExtractor(ElementExtractor):
             'span.xt0psk2 a',
             'div[role="article"] h2 a[role="link"]'
         ]
+        self.avatar_selectors = [
+            'img[data-imgperflogname="profileCoverPhoto"]',
+            'div[role="article"] img[src*="profile"]',
+            'a[role="link"] img'
+        ]
+        self.verification_selectors = [
+            'svg[aria-label*="Verified"]',
+            '[data-testid="profile-verification-badge"]',
+            'img[alt*="verified"]'
+        ]
         
     @lru_cache(maxsize=500)
     def extract(self, post_element) -> Optional[AuthorInfo]:
         """Извлечение расширенной информации об авторе"""
         try:
-            for selector in self.author_selectors:
+            attempt = self.selectors.attempt('author.name', self.author_selectors)
+            for selector in attempt:
                 try:
-                    element = post_element.find_element(By.CSS_SELECTOR, selector)
-                    if element and element.text:
+                    element = self.probe.first(post_element, selector)
+                    if element is None:
+                        continue
+                    if element.text:
+                        attempt.hit()
                         # Базовая информация
                         name = element.text.strip()
                         profile_url = element.get_attribute('href')
@@ -350,7 +443,7 @@ class AuthorExtractor(ElementExtractor):
                     
             # Fallback: попробуем найти имя автора в заголовке поста
             try:
-                header = post_element.find_element(By.CSS_SELECTOR, 'h2')
+                header = self.probe.first(post_element, 'h2')
                 if header and header.text:
                     return AuthorInfo(name=header.text.strip())
             except:
@@ -362,17 +455,29 @@ class AuthorExtractor(ElementExtractor):
             self.logger.log_error_with_context(e, {'method': 'extract_author'})
             return None
     
+    def from_raw(self, raw_author: Optional[Dict[str, Any]]) -> Optional[AuthorInfo]:
+        """Построение AuthorInfo из словаря, собранного в браузере InPagePostExtractor"""
+        if not raw_author or not raw_author.get('name'):
+            return None
+        
+        profile_url = raw_author.get('profile_url')
+        if profile_url:
+            profile_url = profile_url.split('?')[0]
+        
+        return AuthorInfo(
+            name=raw_author['name'].strip(),
+            profile_url=profile_url,
+            avatar_url=raw_author.get('avatar_url'),
+            is_verified=bool(raw_author.get('is_verified'))
+        )
+    
     def _extract_avatar(self, post_element) -> Optional[str]:
         """Извлечение URL аватара автора"""
-        avatar_selectors = [
-            'img[data-imgperflogname="profileCoverPhoto"]',
-            'div[role="article"] img[src*="profile"]',
-            'a[role="link"] img'
-        ]
-        
-        for selector in avatar_selectors:
+        for selector in self.avatar_selectors:
             try:
-                img = post_element.find_element(By.CSS_SELECTOR, selector)
+                img = self.probe.first(post_element, selector)
+                if img is None:
+                    continue
                 src = img.get_attribute('src')
                 if src and 'profile' in src:
                     return src
@@ -382,15 +487,9 @@ class AuthorExtractor(ElementExtractor):
     
     def _check_verification(self, post_element) -> bool:
         """Проверка верификации пользователя"""
-        verification_selectors = [
-            'svg[aria-label*="Verified"]',
-            '[data-testid="profile-verification-badge"]',
-            'img[alt*="verified"]'
-        ]
-        
-        for selector in verification_selectors:
+        for selector in self.verification_selectors:
             try:
-                if post_element.find_element(By.CSS_SELECTOR, selector):
+                if self.probe.exists(post_element, selector):
                     return True
             except:
                 continue
@@ -407,6 +506,103 @@ class CommentExtractor(ElementExtractor):
             'div[data-testid="UFI2Comment/root_depth_0"]',
             'div.x1lliihq.x6ikm8r.x10wlt62.x1n2onr6.xlyipyv.xuxw1ft'
         ]
+        self.wait_stats = WaitStats()
+        self.author_selector = 'a[role="link"]'
+        self.text_selectors = [
+            'div[data-ad-comet-preview="message"]',
+            'div[dir="auto"]',
+            'span[dir="auto"]'
+        ]
+        self.time_selector = 'a[role="link"] span'
+        self.like_selectors = [
+            'span[aria-label*="like"]',
+            'span[aria-label*="reaction"]',
+            'div[aria-label*="like"]'
+        ]
+        self.reply_count_selectors = [
+            'span:contains("repl")',
+            'div[aria-label*="repl"]',
+            'button:contains("repl")'
+        ]
+        self.pin_selectors = [
+            'svg[aria-label*="Pinned"]',
+            'div[aria-label*="Pinned"]',
+            'span:contains("Pinned")'
+        ]
+        self.edit_selectors = [
+            'span:contains("Edited")',
+            'div[aria-label*="Edited"]',
+            'span:contains("edited")'
+        ]
+        self.reaction_selectors = [
+            'div[aria-label*="reaction"]',
+            'span[data-testid*="reaction"]'
+        ]
+        self.reply_selector = 'div[role="article"][aria-label*="Reply"]'
+        self.view_more_selectors = [
+            'span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.x1xmvt09.x1lliihq.x1s928wv.xhkezso.x1gmr53x.x1cpjm7i.x1fgarty.x1943h6x.xudqn12.x3x7a5m.x6prxxf.xvq8zen.x1s688f.xi81zsa',
+            'div[role="button"]:has-text("View more comments")',
+            'div[role="button"]:has-text("View previous comments")',
+            'span:contains("previous comments")',
+            'span:contains("View more comments")'
+        ]
+        
+    def snapshot_selectors(self) -> Dict[str, Any]:
+        """Селекторы для разбора снимка в snapshot_parser"""
+        return {
+            'containers': self.comment_selectors,
+            'author': self.author_selector,
+            'text': self.text_selectors,
+            'time': self.time_selector,
+            'likes': self.like_selectors,
+            'replies_count': self.reply_count_selectors,
+            'pinned': self.pin_selectors,
+            'edited': self.edit_selectors,
+            'reactions': self.reaction_selectors,
+            'reply': self.reply_selector
+        }
+    
+    def from_raw(self, raw_comment: Dict[str, Any]) -> Optional[CommentInfo]:
+        """Построение CommentInfo из словаря, разобранного snapshot_parser"""
+        author = raw_comment.get('author') or {}
+        if not raw_comment.get('text'):
+            return None
+        
+        profile_url = author.get('profile_url')
+        if profile_url:
+            profile_url = profile_url.split('?')[0]
+        
+        return CommentInfo(
+            author=AuthorInfo(name=(author.get('name') or '').strip(), profile_url=profile_url),
+            text=raw_comment['text'],
+            posted_time=raw_comment.get('posted_time') or 'Unknown',
+            scraped_time=datetime.utcnow().isoformat(),
+            likes_count=self._first_number(raw_comment.get('like_labels') or []),
+            replies_count=self._first_number(raw_comment.get('replies_labels') or []),
+            is_pinned=bool(raw_comment.get('is_pinned')),
+            is_edited=bool(raw_comment.get('is_edited')),
+            reactions=self._parse_reaction_labels(raw_comment.get('reaction_labels') or []),
+            replies=[
+                reply for reply in (self.from_raw(r) for r in raw_comment.get('replies') or [])
+                if reply
+            ]
+        )
+    
+    def _first_number(self, labels: List[str]) -> int:
+        """Первое число из списка подписей"""
+        for label in labels:
+            numbers = re.findall(r'\d+', label or '')
+            if numbers:
+                return int(numbers[0])
+        return 0
+    
+    def _parse_reaction_labels(self, labels: List[str]) -> Dict[str, int]:
+        """Разбор реакций из подписей вида '1 like, 2 love, 3 wow'"""
+        reactions = {}
+        for label in labels:
+            for count, reaction_type in re.findall(r'(\d+)\s+(\w+)', (label or '').lower()):
+                reactions[reaction_type] = int(count)
+        return reactions
         
     def extract(self, post_element) -> List[CommentInfo]:
         """Извлечение расширенных данных комментариев"""
@@ -414,19 +610,23 @@ class CommentExtractor(ElementExtractor):
             comments = []
             
             # Сначала пытаемся загрузить больше комментариев
-            self._load_more_comments(post_element)
+            with self.metrics.stage('expand_comments'):
+                self._load_more_comments(post_element)
             
-            for selector in self.comment_selectors:
+            attempt = self.selectors.attempt('comment.containers', self.comment_selectors)
+            for selector in attempt:
                 try:
-                    comment_elements = post_element.find_elements(By.CSS_SELECTOR, selector)
+                    comment_elements = self.probe.all(post_element, selector)
                     self.logger.logger.debug(f"Found {len(comment_elements)} comments with selector: {selector}")
                     
                     for comment_element in comment_elements:
-                        comment_data = self._extract_single_comment(comment_element)
+                        with self.metrics.stage('extract_comment'):
+                            comment_data = self._extract_single_comment(comment_element)
                         if comment_data:
                             comments.append(comment_data)
                     
                     if comments:  # Если нашли комментарии, прекращаем поиск
+                        attempt.hit()
                         break
                         
                 except Exception as e:
@@ -442,24 +642,18 @@ class CommentExtractor(ElementExtractor):
     
     def _load_more_comments(self, post_element):
         """Загружает больше комментариев нажатием на соответствующие кнопки"""
-        view_more_selectors = [
-            'span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.x1xmvt09.x1lliihq.x1s928wv.xhkezso.x1gmr53x.x1cpjm7i.x1fgarty.x1943h6x.xudqn12.x3x7a5m.x6prxxf.xvq8zen.x1s688f.xi81zsa',
-            'div[role="button"]:has-text("View more comments")',
-            'div[role="button"]:has-text("View previous comments")',
-            'span:contains("previous comments")',
-            'span:contains("View more comments")'
-        ]
-        
-        for selector in view_more_selectors:
+        for selector in self.view_more_selectors:
             try:
-                view_more_buttons = post_element.find_elements(By.CSS_SELECTOR, selector)
+                view_more_buttons = self.probe.all(post_element, selector)
                 for button in view_more_buttons:
                     try:
+                        driver = post_element.parent
+                        waiter = SeleniumWaiter(driver, self.wait_stats)
+                        previous = waiter.count(self.comment_selectors, post_element)
                         # Используем JavaScript для клика, чтобы избежать проблем с перекрытием
-                        post_element.find_element(By.TAG_NAME, 'body').send_keys('')  # Получаем driver через post_element
-                        driver = post_element._parent
                         driver.execute_script("arguments[0].click();", button)
-                        time.sleep(2)  # Ждем загрузку комментариев
+                        # Ждем новых комментариев, не дольше прежних 2 секунд
+                        waiter.for_count_increase(self.comment_selectors, previous, timeout=2, root=post_element)
                     except Exception as e:
                         self.logger.logger.debug(f"Error clicking view more button: {e}")
                         continue
@@ -521,7 +715,9 @@ class CommentExtractor(ElementExtractor):
     def _extract_comment_author(self, comment_element) -> Optional[AuthorInfo]:
         """Извлечение автора комментария"""
         try:
-            author_link = comment_element.find_element(By.CSS_SELECTOR, 'a[role="link"]')
+            author_link = self.probe.first(comment_element, self.author_selector)
+            if author_link is None:
+                return None
             name = author_link.text.strip()
             profile_url = author_link.get_attribute('href')
             if profile_url:
@@ -533,15 +729,11 @@ class CommentExtractor(ElementExtractor):
     
     def _extract_comment_text(self, comment_element) -> Optional[str]:
         """Извлечение текста комментария"""
-        text_selectors = [
-            'div[data-ad-comet-preview="message"]',
-            'div[dir="auto"]',
-            'span[dir="auto"]'
-        ]
-        
-        for selector in text_selectors:
+        for selector in self.text_selectors:
             try:
-                text_element = comment_element.find_element(By.CSS_SELECTOR, selector)
+                text_element = self.probe.first(comment_element, selector)
+                if text_element is None:
+                    continue
                 text = text_element.text.strip()
                 if text:
                     return text
@@ -552,22 +744,20 @@ class CommentExtractor(ElementExtractor):
     def _extract_comment_time(self, comment_element) -> Optional[str]:
         """Извлечение времени комментария"""
         try:
-            time_element = comment_element.find_element(By.CSS_SELECTOR, 'a[role="link"] span')
+            time_element = self.probe.first(comment_element, self.time_selector)
+            if time_element is None:
+                return None
             return time_element.get_attribute('title') or time_element.text
         except:
             return None
     
     def _extract_comment_likes(self, comment_element) -> int:
         """Извлечение количества лайков комментария"""
-        like_selectors = [
-            'span[aria-label*="like"]',
-            'span[aria-label*="reaction"]',
-            'div[aria-label*="like"]'
-        ]
-        
-        for selector in like_selectors:
+        for selector in self.like_selectors:
             try:
-                like_element = comment_element.find_element(By.CSS_SELECTOR, selector)
+                like_element = self.probe.first(comment_element, selector)
+                if like_element is None:
+                    continue
                 like_text = like_element.get_attribute('aria-label') or like_element.text
                 # Попытка извлечь число из текста
                 import re
@@ -580,15 +770,11 @@ class CommentExtractor(ElementExtractor):
     
     def _extract_comment_replies_count(self, comment_element) -> int:
         """Извлечение количества ответов на комментарий"""
-        reply_selectors = [
-            'span:contains("repl")',
-            'div[aria-label*="repl"]',
-            'button:contains("repl")'
-        ]
-        
-        for selector in reply_selectors:
+        for selector in self.reply_count_selectors:
             try:
-                reply_element = comment_element.find_element(By.CSS_SELECTOR, selector)
+                reply_element = self.probe.first(comment_element, selector)
+                if reply_element is None:
+                    continue
                 reply_text = reply_element.text
                 import re
                 numbers = re.findall(r'\d+', reply_text)
@@ -600,15 +786,9 @@ class CommentExtractor(ElementExtractor):
     
     def _check_comment_pinned(self, comment_element) -> bool:
         """Проверка, закреплен ли комментарий"""
-        pin_selectors = [
-            'svg[aria-label*="Pinned"]',
-            'div[aria-label*="Pinned"]',
-            'span:contains("Pinned")'
-        ]
-        
-        for selector in pin_selectors:
+        for selector in self.pin_selectors:
             try:
-                if comment_element.find_element(By.CSS_SELECTOR, selector):
+                if self.probe.exists(comment_element, selector):
                     return True
             except:
                 continue
@@ -616,15 +796,9 @@ class CommentExtractor(ElementExtractor):
     
     def _check_comment_edited(self, comment_element) -> bool:
         """Проверка, отредактирован ли комментарий"""
-        edit_selectors = [
-            'span:contains("Edited")',
-            'div[aria-label*="Edited"]',
-            'span:contains("edited")'
-        ]
-        
-        for selector in edit_selectors:
+        for selector in self.edit_selectors:
             try:
-                if comment_element.find_element(By.CSS_SELECTOR, selector):
+                if self.probe.exists(comment_element, selector):
                     return True
             except:
                 continue
@@ -633,14 +807,9 @@ class CommentExtractor(ElementExtractor):
     def _extract_comment_reactions(self, comment_element) -> Dict[str, int]:
         """Извлечение реакций на комментарий"""
         reactions = {}
-        reaction_selectors = [
-            'div[aria-label*="reaction"]',
-            'span[data-testid*="reaction"]'
-        ]
-        
-        for selector in reaction_selectors:
+        for selector in self.reaction_selectors:
             try:
-                reaction_elements = comment_element.find_elements(By.CSS_SELECTOR, selector)
+                reaction_elements = self.probe.all(comment_element, selector)
                 for element in reaction_elements:
                     aria_label = element.get_attribute('aria-label') or element.text
                     # Парсинг реакций из aria-label
@@ -659,10 +828,7 @@ class CommentExtractor(ElementExtractor):
         replies = []
         try:
             # Ищем вложенные комментарии
-            reply_elements = comment_element.find_elements(
-                By.CSS_SELECTOR, 
-                'div[role="article"][aria-label*="Reply"]'
-            )
+            reply_elements = comment_element.find_elements(By.CSS_SELECTOR, self.reply_selector)
             
             for reply_element in reply_elements[:5]:  # Ограничиваем количество ответов
                 reply_data = self._extract_single_comment(reply_element)
@@ -674,9 +840,228 @@ class CommentExtractor(ElementExtractor):
         
         return replies
 
+# JS-движок извлечения поста за один вызов execute_script.
+# Проходит те же списки селекторов, что и Python-экстракторы, и возвращает
+# "сырые" значения; разбор чисел, ссылок и времени остается на стороне Python.
+INPAGE_EXTRACTION_JS_LIB = r"""
+function allMatches(root, selector) {
+    // Текстовые псевдоселекторы :contains("...") и :has-text("...") - фильтром по тексту
+    var textMatch = selector.match(/^(.*):(?:contains|has-text)\(["'](.*)["']\)$/);
+    try {
+        if (textMatch) {
+            var needle = textMatch[2].toLowerCase();
+            return Array.prototype.filter.call(root.querySelectorAll(textMatch[1] || '*'), function (el) {
+                return (el.textContent || '').toLowerCase().indexOf(needle) !== -1;
+            });
+        }
+        return Array.prototype.slice.call(root.querySelectorAll(selector));
+    } catch (e) { return []; }
+}
+function firstMatch(root, selector) {
+    if (selector.indexOf(':contains(') !== -1 || selector.indexOf(':has-text(') !== -1) {
+        return allMatches(root, selector)[0] || null;
+    }
+    try { return root.querySelector(selector); } catch (e) { return null; }
+}
+function hrefOf(el) {
+    return el ? (el.href || el.getAttribute('href')) : null;
+}
+function extractPostUrl(root, selectors, hits) {
+    hits = hits || {};
+    hits.url = -1;
+    for (var i = 0; i < selectors.length; i++) {
+        var href = hrefOf(firstMatch(root, selectors[i]));
+        if (href && /posts|photos|videos/.test(href)) {
+            hits.url = i;
+            return href.split('?')[0];
+        }
+    }
+    var links = allMatches(root, 'a[href*="facebook.com"]');
+    for (var j = 0; j < links.length; j++) {
+        var fallback = hrefOf(links[j]);
+        if (fallback && /\/posts\/|\/photos\/|\/videos\//.test(fallback)) {
+            return fallback.split('?')[0];
+        }
+    }
+    return null;
+}
+function extractAuthor(root, sel, hits) {
+    hits.author = -1;
+    for (var i = 0; i < sel.author.length; i++) {
+        var el = firstMatch(root, sel.author[i]);
+        var name = el ? el.innerText : '';
+        if (!name) { continue; }
+        hits.author = i;
+        var avatar = null;
+        for (var a = 0; a < sel.avatar.length && !avatar; a++) {
+            var img = firstMatch(root, sel.avatar[a]);
+            var src = img ? (img.src || img.getAttribute('src')) : null;
+            if (src && src.indexOf('profile') !== -1) { avatar = src; }
+        }
+        return {
+            name: name,
+            profile_url: hrefOf(el),
+            avatar_url: avatar,
+            is_verified: sel.verification.some(function (s) { return firstMatch(root, s) !== null; })
+        };
+    }
+    var header = firstMatch(root, 'h2');
+    if (header && header.innerText) {
+        return {name: header.innerText};
+    }
+    return null;
+}
+function extractContent(root, selectors, hits) {
+    hits.content = -1;
+    for (var i = 0; i < selectors.length; i++) {
+        var parts = allMatches(root, selectors[i])
+            .map(function (el) { return (el.innerText || '').trim(); })
+            .filter(function (text) { return text.length > 10; });
+        if (parts.length) {
+            hits.content = i;
+            return parts.join(' ');
+        }
+    }
+    return null;
+}
+function extractTime(root, selectors, hits) {
+    hits.time = -1;
+    for (var i = 0; i < selectors.length; i++) {
+        var el = firstMatch(root, selectors[i]);
+        if (!el) { continue; }
+        var utime = el.getAttribute('data-utime');
+        var value = el.tagName === 'ABBR' && utime ? {utime: utime} : null;
+        var text = el.getAttribute('title') || el.getAttribute('aria-label') || (el.innerText || '').trim();
+        if (!value && text) { value = {value: text}; }
+        if (value) {
+            hits.time = i;
+            return value;
+        }
+    }
+    return null;
+}
+function firstLabels(root, selectors) {
+    var labels = [];
+    selectors.forEach(function (s) {
+        var el = firstMatch(root, s);
+        if (el) { labels.push(el.getAttribute('aria-label') || el.innerText || ''); }
+    });
+    return labels;
+}
+function extractPost(root, sel) {
+    try {
+        var imageSrcs = [];
+        sel.images.forEach(function (s) {
+            allMatches(root, s).forEach(function (img) {
+                var src = img.src || img.getAttribute('data-src');
+                if (src) { imageSrcs.push(src); }
+            });
+        });
+        var reactionLabel = null;
+        for (var i = 0; i < sel.reactions.length && !reactionLabel; i++) {
+            var reaction = firstMatch(root, sel.reactions[i]);
+            reactionLabel = reaction ? reaction.getAttribute('aria-label') : null;
+        }
+        var flags = {};
+        Object.keys(sel.type_markers).forEach(function (key) {
+            flags[key] = firstMatch(root, sel.type_markers[key]) !== null;
+        });
+        // Номер сработавшего селектора по полям (-1 - ни один) - для SelectorRegistry
+        var hits = {};
+        return {
+            post_url: extractPostUrl(root, sel.url, hits),
+            author: extractAuthor(root, sel, hits),
+            content: extractContent(root, sel.content, hits),
+            time: extractTime(root, sel.time, hits),
+            selector_hits: hits,
+            hrefs: allMatches(root, 'a[href]').map(hrefOf),
+            image_srcs: imageSrcs,
+            like_labels: firstLabels(root, sel.likes),
+            share_labels: firstLabels(root, sel.shares),
+            reaction_label: reactionLabel,
+            flags: flags
+        };
+    } catch (e) {
+        return null;
+    }
+}
+"""
+
+INPAGE_EXTRACT_POST_JS = INPAGE_EXTRACTION_JS_LIB + "return extractPost(arguments[0], arguments[1]);"
+INPAGE_EXTRACT_BATCH_JS = INPAGE_EXTRACTION_JS_LIB + """
+var sel = arguments[1];
+return arguments[0].map(function (el) { return extractPost(el, sel); });
+"""
+INPAGE_EXTRACT_URLS_JS = INPAGE_EXTRACTION_JS_LIB + """
+var sel = arguments[1];
+return arguments[0].map(function (el) {
+    try { return extractPostUrl(el, sel.url); } catch (e) { return null; }
+});
+"""
+
+INPAGE_EXTRACT_TIMES_JS = INPAGE_EXTRACTION_JS_LIB + """
+var sel = arguments[1];
+return arguments[0].map(function (el) {
+    try {
+        var time = extractTime(el, sel.time, {});
+        return time ? (time.utime || time.value) : null;
+    } catch (e) { return null; }
+});
+"""
+
+class InPagePostExtractor(ElementExtractor):
+    """Извлечение всех полей поста одним вызовом execute_script вместо десятков find_element"""
+    
+    def __init__(self, *args, selector_lists: Dict[str, Any], **kwargs):
+        super().__init__(*args, **kwargs)
+        # Списки селекторов для JS-движка; self.selectors - реестр статистики, как у других экстракторов
+        self.selector_lists = selector_lists
+        
+    def extract(self, post_element) -> Optional[Dict[str, Any]]:
+        """Сырые данные одного поста (один round trip к chromedriver)"""
+        try:
+            return post_element.parent.execute_script(INPAGE_EXTRACT_POST_JS, post_element, self.selector_lists)
+        except Exception as e:
+            self.logger.logger.debug(f"In-page extraction failed: {e}")
+            return None
+    
+    def extract_batch(self, post_elements: List[Any]) -> List[Optional[Dict[str, Any]]]:
+        """Сырые данные пачки постов за один round trip"""
+        if not post_elements:
+            return []
+        try:
+            return post_elements[0].parent.execute_script(INPAGE_EXTRACT_BATCH_JS, post_elements, self.selector_lists)
+        except Exception as e:
+            self.logger.logger.debug(f"In-page batch extraction failed: {e}")
+            return [None] * len(post_elements)
+    
+    def extract_urls(self, post_elements: List[Any]) -> Optional[List[Optional[str]]]:
+        """URL всех переданных постов за один round trip (None при ошибке)"""
+        if not post_elements:
+            return []
+        try:
+            return post_elements[0].parent.execute_script(INPAGE_EXTRACT_URLS_JS, post_elements, self.selector_lists)
+        except Exception as e:
+            self.logger.logger.debug(f"In-page URL extraction failed: {e}")
+            return None
+    
+    def extract_times(self, post_elements: List[Any]) -> Optional[List[Optional[str]]]:
+        """Время всех переданных постов (data-utime или подпись) за один round trip (None при ошибке)"""
+        if not post_elements:
+            return []
+        try:
+            return post_elements[0].parent.execute_script(INPAGE_EXTRACT_TIMES_JS, post_elements, self.selector_lists)
+        except Exception as e:
+            self.logger.logger.debug(f"In-page time extraction failed: {e}")
+            return None
+
 class PostProcessor:
     """Асинхронная обработка постов"""
     
+    # Поля JS-движка и разбора снимков -> группы SelectorRegistry
+    SELECTOR_GROUPS = {'url': 'post.url', 'author': 'author.name', 'content': 'post.content', 'time': 'post.time'}
+    SELECTOR_REFRESH_EVERY = 50
+    
     def __init__(self, config: ScrapingConfig, logger: LoggerManager, 
                  cache_manager: CacheManager, retry_manager: RetryManager):
         self.config = config
@@ -685,57 +1070,223 @@ class PostProcessor:
         self.retry_manager = retry_manager
         self.memory_manager = MemoryManager(logger)
         
+        # Списки селекторов (общие для Python-пути и JS-движка)
+        self.url_selectors = [
+            'a[href*="/posts/"]',
+            'a[href*="/photos/"]',
+            'a[href*="/videos/"]',
+            'a[aria-label*="minutes"][href]',
+            'a[aria-label*="hours"][href]',
+            'a[aria-label*="days"][href]',
+            'span._6n3u a[href]',
+            'div[data-testid="story-subtitle"] a'
+        ]
+        self.content_selectors = [
+            'div[data-ad-comet-preview="message"] span',
+            'div[data-testid="post_message"]',
+            'div.x11i5rnm.xat24cr.x1mh8g0r.x1vvkbs span[dir="auto"]',
+            'div[class*="userContent"] span',
+            'div.userContent p',
+            'span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.x1xmvt09.x1lliihq.x1s928wv.xhkezso.x1gmr53x.x1cpjm7i.x1fgarty.x1943h6x.x4zkp8e.x676frb.x1nxh6w3.x1sibtaa.x1s688f.xzsf02u',
+            'div[role="article"] span[dir="auto"]:not([aria-hidden="true"])'
+        ]
+        self.time_selectors = [
+            'abbr[data-utime]',
+            'a[aria-label*="minutes"]',
+            'a[aria-label*="hours"]',
+            'a[aria-label*="days"]',
+            'span[title]',
+            'abbr[title]',
+            'a[href*="posts"] span[title]'
+        ]
+        self.image_selectors = [
+            'img[src*="scontent"]',
+            'img[data-src*="scontent"]',
+            'div[role="img"] img',
+            'div[data-testid="photo"] img',
+            'img[alt]:not([alt=""])'
+        ] if get_profile(config.routing_profile).record_image_urls else []
+        self.like_selectors = [
+            'span[aria-label*="reaction"]',
+            'div[aria-label*="reaction"]',
+            'span[data-testid="UFI2ReactionsCount/root"]',
+            'div._81hb span',
+            'span._3dlh._3dli'
+        ]
+        self.share_selectors = [
+            'span[aria-label*="share"]',
+            'div[aria-label*="share"]',
+            'span[data-testid*="share"]',
+            'div._3dlh._3dli:contains("share")'
+        ]
+        self.reaction_selectors = [
+            'div[aria-label*="reaction"]',
+            'span[data-testid="UFI2ReactionsCount/root"]',
+            'div._1g06 span'
+        ]
+        self.post_type_markers = {
+            'video': 'video, div[aria-label*="video"]',
+            'photo': 'img[src*="scontent"]',
+            'poll': 'div[aria-label*="poll"], div[data-testid*="poll"]',
+            'event': 'div[aria-label*="event"]'
+        }
+        
         # Инициализируем экстракторы
         self.author_extractor = AuthorExtractor(cache_manager, retry_manager, logger)
         self.comment_extractor = CommentExtractor(cache_manager, retry_manager, logger)
+        # Статистика попаданий запасных селекторов (общая для экстракторов, хранится между запусками)
+        self.selectors = SelectorRegistry(os.path.join(config.output_dir, "selector_stats.json"))
+        self._raw_posts = 0
+        self._selector_lock = threading.Lock()
+        self.author_extractor.selectors = self.selectors
+        self.comment_extractor.selectors = self.selectors
+        
+        # Проверка всех списков селекторов при запуске: в горячий цикл попадают только валидные
+        self.compiler = SelectorCompiler('selenium')
+        self.author_extractor.compiler = self.compiler
+        self.comment_extractor.compiler = self.compiler
+        self.compiler.compile_lists(self, [
+            'url_selectors', 'content_selectors', 'time_selectors', 'image_selectors',
+            'like_selectors', 'share_selectors', 'reaction_selectors'
+        ])
+        self.compiler.compile_lists(self.author_extractor, [
+            'author_selectors', 'avatar_selectors', 'verification_selectors'
+        ])
+        self.compiler.compile_lists(self.comment_extractor, [
+            'comment_selectors', 'text_selectors', 'like_selectors', 'reply_count_selectors',
+            'pin_selectors', 'edit_selectors', 'reaction_selectors', 'view_more_selectors'
+        ])
+        for selector in self.post_type_markers.values():
+            self.compiler.compile(selector)
+        # Общие счетчики промахов поиска для всех экстракторов
+        self.probe = ElementProbe(self.compiler)
+        self.author_extractor.probe = self.probe
+        self.comment_extractor.probe = self.probe
+        self.inpage_extractor = InPagePostExtractor(
+            cache_manager, retry_manager, logger, selector_lists=self._inpage_selectors()
+        )
+        
+        # Время этапов (скрапер подставляет общие метрики и в экстрактор комментариев)
+        self.metrics = ScrapeMetrics('selenium', config.group_url)
+        
+        # Повторные попытки для обработки поста
+        self._process_single_post = retry_manager.retry(self._process_single_post)
         
-        # Очередь для обработки постов
-        self.processing_queue = Queue(maxsize=config.max_posts * 2)
+        # Готовые посты (драйвер трогает только поток скрапинга, разбор - в пуле процессов или в нем же)
         self.results_queue = Queue()
         
-        # Флаг для остановки обработки
-        self.stop_processing = threading.Event()
+        # Пул процессов для разбора снимков и счетчик незавершенных задач
+        self.snapshot_pool = None
+        self.pending_snapshots = 0
+        self.pending_condition = threading.Condition()
         
     def start_async_processing(self):
-        """Запуск асинхронной обработки постов"""
-        self.workers = []
-        
-        for i in range(self.config.parallel_workers):
-            worker = threading.Thread(
-                target=self._process_worker,
-                name=f"PostProcessor-{i}",
-                daemon=True
-            )
-            worker.start()
-            self.workers.append(worker)
-            
-        self.logger.logger.info(f"Started {len(self.workers)} processing workers")
+        """Запуск пула разбора снимков (без snapshot_parsing посты разбираются в потоке скрапинга)"""
+        if self.config.snapshot_parsing:
+            self.snapshot_pool = SnapshotParserPool(self.config.parser_processes)
+            self.logger.logger.info(f"Started snapshot parser pool with {self.config.parser_processes} processes")
+        else:
+            self.logger.logger.info("Snapshot parsing is off, posts are extracted on the scraping thread")
     
-    def _process_worker(self):
-        """Рабочий поток для обработки постов"""
-        while not self.stop_processing.is_set():
-            try:
-                # Получаем пост из очереди с таймаутом
-                post_element = self.processing_queue.get(timeout=1.0)
-                
-                with self.memory_manager.memory_monitoring(f"process_post"):
-                    result = self._process_single_post(post_element)
-                    if result:
-                        self.results_queue.put(result)
-                
-                self.processing_queue.task_done()
-                
-            except Empty:
+    def add_post_for_processing(self, post_element):
+        """Обработка поста: снимок в пул процессов или разбор сразу.
+        Вызывается только из потока скрапинга - WebDriver не потокобезопасен"""
+        if self.snapshot_pool is not None:
+            self._submit_snapshot(post_element)
+            return
+        
+        try:
+            with self.memory_manager.memory_monitoring("process_post"):
+                result = self._process_single_post(post_element)
+            if result:
+                self.results_queue.put(result)
+        except Exception as e:
+            self.logger.log_error_with_context(e, {'method': 'add_post_for_processing'})
+    
+    def add_posts_for_processing(self, post_elements: List[Any]):
+        """Новые посты цикла. Без пула снимков поля всей пачки собираются одним execute_script
+        (extract_batch); посты, которые движок не разобрал, идут прежним путем"""
+        if self.snapshot_pool is not None or not self.config.inpage_extraction:
+            for post_element in post_elements:
+                self.add_post_for_processing(post_element)
+            return
+        if not post_elements:
+            return
+        
+        selectors = self.inpage_extractor.selector_lists
+        batch_started = time.perf_counter()
+        raw_posts = self.inpage_extractor.extract_batch(post_elements)
+        # Время общего вызова делится между постами пачки
+        batch_share = (time.perf_counter() - batch_started) / len(post_elements)
+        for post_element, raw_post in zip(post_elements, raw_posts):
+            if raw_post is None:
+                self.add_post_for_processing(post_element)
                 continue
+            try:
+                with self.memory_manager.memory_monitoring("process_post"):
+                    self._record_selector_hits(raw_post, selectors)
+                    started = time.perf_counter()
+                    result = self._process_raw_post(raw_post, post_element)
+                    self.metrics.observe('extract_post', batch_share + time.perf_counter() - started)
+                if result:
+                    self.results_queue.put(result)
             except Exception as e:
-                self.logger.log_error_with_context(e, {'worker': threading.current_thread().name})
+                self.metrics.record_error('extract_post')
+                self.logger.log_error_with_context(e, {'method': 'add_posts_for_processing'})
     
-    def add_post_for_processing(self, post_element):
-        """Добавление поста в очередь обработки"""
+    def pending(self) -> int:
+        """Сколько снимков еще разбирается в пуле"""
+        with self.pending_condition:
+            return self.pending_snapshots
+    
+    def _submit_snapshot(self, post_element):
+        """Снимок outerHTML поста (один round trip) и отправка на разбор в пул процессов.
+        Комментарии раскрываются до снимка, как в CommentExtractor.extract"""
+        try:
+            # Вызывается из потока скрапинга - кликать по кнопкам здесь безопасно
+            with self.metrics.stage('expand_comments'):
+                self.comment_extractor._load_more_comments(post_element)
+            html = post_element.parent.execute_script("return arguments[0].outerHTML;", post_element)
+            selectors = self.inpage_extractor.selector_lists
+            future = self.snapshot_pool.submit_post(
+                html,
+                selectors,
+                self.config.group_url,
+                self.comment_extractor.snapshot_selectors()
+            )
+        except Exception as e:
+            self.logger.logger.debug(f"Failed to snapshot post element: {e}")
+            return
+        
+        with self.pending_condition:
+            self.pending_snapshots += 1
+        future.add_done_callback(partial(self._on_snapshot_parsed, selectors))
+    
+    def _on_snapshot_parsed(self, selectors: Dict[str, Any], future):
+        """Сборка PostInfo из разобранного снимка (selectors - списки, с которыми он разбирался)"""
         try:
-            self.processing_queue.put(post_element, timeout=1.0)
-        except Full:
-            self.logger.logger.warning("Processing queue is full, skipping post")
+            raw_post = future.result()
+            if raw_post is not None:
+                self._record_selector_hits(raw_post, selectors)
+                with self.metrics.stage('extract_post'):
+                    result = self._process_raw_post(raw_post)
+                if result:
+                    self.results_queue.put(result)
+        except Exception as e:
+            self.logger.log_error_with_context(e, {'method': '_on_snapshot_parsed'})
+        finally:
+            with self.pending_condition:
+                self.pending_snapshots -= 1
+                self.pending_condition.notify_all()
+    
+    def wait_until_idle(self):
+        """Ожидание обработки всех поставленных постов"""
+        if self.snapshot_pool is None:
+            # Без пула посты разобраны уже в add_post_for_processing
+            return
+        
+        with self.pending_condition:
+            self.pending_condition.wait_for(lambda: self.pending_snapshots == 0)
     
     def get_processed_posts(self) -> List[PostInfo]:
         """Получение обработанных постов"""
@@ -750,113 +1301,220 @@ class PostProcessor:
     
     def stop_async_processing(self):
         """Остановка асинхронной обработки"""
-        self.stop_processing.set()
-        
-        # Ждем завершения всех воркеров
-        for worker in self.workers:
-            worker.join(timeout=5.0)
+        if self.snapshot_pool is not None:
+            self.snapshot_pool.shutdown()
+            self.snapshot_pool = None
             
         self.logger.logger.info("Stopped all processing workers")
     
-    @retry_manager.retry
+    def _record_selector_hits(self, raw_post: Dict[str, Any], selectors: Dict[str, Any]):
+        """Сработавшие селекторы JS-движка / разбора снимка - в реестр; порядок для движка
+        перечитывается раз в SELECTOR_REFRESH_EVERY постов"""
+        for field, index in (raw_post.get('selector_hits') or {}).items():
+            self.selectors.record_index(self.SELECTOR_GROUPS[field], selectors[field], index)
+        with self._selector_lock:
+            self._raw_posts += 1
+            refresh = self._raw_posts % self.SELECTOR_REFRESH_EVERY == 0
+        if refresh:
+            self.inpage_extractor.selector_lists = self._inpage_selectors()
+    
+    def _inpage_selectors(self) -> Dict[str, Any]:
+        """Селекторы в виде, который передается в JS-движок"""
+        return {
+            'url': self.selectors.order('post.url', self.url_selectors),
+            'author': self.selectors.order('author.name', self.author_extractor.author_selectors),
+            'avatar': self.author_extractor.avatar_selectors,
+            'verification': self.author_extractor.verification_selectors,
+            'content': self.selectors.order('post.content', self.content_selectors),
+            'time': self.selectors.order('post.time', self.time_selectors),
+            'images': self.image_selectors,
+            'likes': self.like_selectors,
+            'shares': self.share_selectors,
+            'reactions': self.reaction_selectors,
+            'type_markers': self.post_type_markers
+        }
+    
+    def get_post_urls(self, post_elements: List[Any]) -> List[Optional[str]]:
+        """URL для списка постов: один execute_script, при ошибке - поэлементно"""
+        if self.config.inpage_extraction:
+            urls = self.inpage_extractor.extract_urls(post_elements)
+            if urls is not None:
+                return urls
+        return [self._get_post_url(element) for element in post_elements]
+    
+    def get_post_times(self, post_elements: List[Any]) -> List[Optional[str]]:
+        """Время публикации для списка постов (для инкрементального режима): один execute_script"""
+        if self.config.inpage_extraction:
+            times = self.inpage_extractor.extract_times(post_elements)
+            if times is not None:
+                return times
+        return [self._extract_post_time(element) for element in post_elements]
+    
     def _process_single_post(self, post_element) -> Optional[PostInfo]:
-        """Обработка одного поста с повторными попытками"""
+        """Обработка одного поста: JS-движок с откатом на поэлементный Python-путь"""
+        with self.metrics.stage('extract_post'):
+            if self.config.inpage_extraction:
+                selectors = self.inpage_extractor.selector_lists
+                raw_post = self.inpage_extractor.extract(post_element)
+                if raw_post is not None:
+                    self._record_selector_hits(raw_post, selectors)
+                    return self._process_raw_post(raw_post, post_element)
+                self.logger.logger.debug("In-page extraction unavailable, falling back to per-call extraction")
+            
+            return self._process_single_post_per_call(post_element)
+    
+    def _process_raw_post(self, raw_post: Dict[str, Any], post_element=None) -> Optional[PostInfo]:
+        """Построение PostInfo из словаря, собранного JS-движком или разобранного из снимка"""
         try:
             start_time = time.time()
             
-            # Проверяем кэш
-            post_url = self._get_post_url(post_element)
+            post_url = raw_post.get('post_url')
             if not post_url:
                 return None
-                
+            
             cached_post = self.cache_manager.get_cached_post(post_url)
             if cached_post:
                 self.logger.logger.debug(f"Using cached data for post: {post_url}")
                 return cached_post
             
-            # Извлекаем автора поста
-            author_data = self.author_extractor.extract(post_element)
+            author_data = self.author_extractor.from_raw(raw_post.get('author'))
             if not author_data:
                 self.logger.logger.warning(f"Could not extract author for post: {post_url}")
                 return None
             
-            # Извлекаем содержимое поста
-            post_content = self._extract_post_content(post_element)
-            
-            # Извлекаем время поста
-            post_time = self._extract_post_time(post_element)
+            post_content = raw_post.get('content')
+            external_links = self._clean_external_links(raw_post.get('hrefs') or [])
             
-            # Извлекаем внешние ссылки
-            external_links = self._extract_external_links(post_element)
-            
-            # Извлекаем изображения
-            images = self._extract_images(post_element)
-            
-            # Извлекаем метаданные реакций и взаимодействий
-            likes_count = self._extract_likes_count(post_element)
-            shares_count = self._extract_shares_count(post_element)
-            reactions = self._extract_reactions(post_element)
-            post_type = self._detect_post_type(post_element)
-            tags = self._extract_hashtags(post_content)
-            
-            # Извлекаем комментарии (асинхронно если включено)
-            comments = []
-            if self.config.enable_async:
-                comments = await self._extract_comments_async(post_element)
+            # Комментарии из снимка уже разобраны, иначе читаем их из живого элемента
+            if 'comments' in raw_post:
+                comments = [
+                    comment for comment in (self.comment_extractor.from_raw(c) for c in raw_post['comments'])
+                    if comment
+                ]
             else:
-                comments = self.comment_extractor.extract(post_element)
+                comments = self._extract_comments(post_element)
             
-            # Создаем объект поста
-            post_data = PostInfo(
-                author=author_data,
-                content=post_content or "",
-                posted_time=post_time or 'Unknown',
+            post_data = self._build_post_info(
+                comments,
+                author_data=author_data,
+                post_content=post_content,
+                post_time=self._parse_raw_time(raw_post.get('time')),
                 post_url=post_url,
                 external_links=external_links,
-                images=images,
-                comments=comments,
-                scraped_time=datetime.utcnow().isoformat(),
-                likes_count=likes_count,
-                shares_count=shares_count,
-                reactions=reactions,
-                post_type=post_type,
-                tags=tags
+                images=self._clean_image_urls(raw_post.get('image_srcs') or []),
+                likes_count=self._parse_count_labels(raw_post.get('like_labels') or []),
+                shares_count=self._parse_count_labels(raw_post.get('share_labels') or []),
+                reactions=self._parse_reaction_label(raw_post.get('reaction_label')),
+                post_type=self._post_type_from_flags(raw_post.get('flags') or {}, external_links)
             )
             
-            # Кэшируем данные поста
-            self.cache_manager.cache_post_data(post_url, post_data)
-            
-            # Логируем производительность
-            processing_time = time.time() - start_time
-            self.logger.log_performance("process_single_post", processing_time, post_url=post_url)
-            
+            self.logger.log_performance("process_single_post_inpage", time.time() - start_time, post_url=post_url)
             return post_data
             
         except Exception as e:
             self.logger.log_error_with_context(e, {
-                'method': '_process_single_post',
-                'post_url': getattr(self, '_current_post_url', 'unknown')
+                'method': '_process_raw_post',
+                'post_url': raw_post.get('post_url', 'unknown')
             })
             return None
     
-    def _get_post_url(self, post_element) -> Optional[str]:
-        """Извлечение URL поста"""
-        url_selectors = [
-            'a[href*="/posts/"]',
-            'a[href*="/photos/"]',
-            'a[href*="/videos/"]',
-            'a[aria-label*="minutes"][href]',
-            'a[aria-label*="hours"][href]',
-            'a[aria-label*="days"][href]',
-            'span._6n3u a[href]',
-            'div[data-testid="story-subtitle"] a'
-        ]
+    def _process_single_post_per_call(self, post_element) -> Optional[PostInfo]:
+        """Обработка одного поста отдельными вызовами WebDriver (запасной путь)"""
+        try:
+            start_time = time.time()
+            
+            # Проверяем кэш
+            post_url = self._get_post_url(post_element)
+            if not post_url:
+                return None
+                
+            cached_post = self.cache_manager.get_cached_post(post_url)
+            if cached_post:
+                self.logger.logger.debug(f"Using cached data for post: {post_url}")
+                return cached_post
+            
+            # Извлекаем автора поста
+            author_data = self.author_extractor.extract(post_element)
+            if not author_data:
+                self.logger.logger.warning(f"Could not extract author for post: {post_url}")
+                return None
+            
+            # Извлекаем содержимое поста
+            post_content = self._extract_post_content(post_element)
+            
+            post_data = self._build_post_info(
+                self._extract_comments(post_element),
+                author_data=author_data,
+                post_content=post_content,
+                post_time=self._extract_post_time(post_element),
+                post_url=post_url,
+                external_links=self._extract_external_links(post_element),
+                images=self._extract_images(post_element),
+                likes_count=self._extract_likes_count(post_element),
+                shares_count=self._extract_shares_count(post_element),
+                reactions=self._extract_reactions(post_element),
+                post_type=self._detect_post_type(post_element)
+            )
+            
+            # Логируем производительность
+            processing_time = time.time() - start_time
+            self.logger.log_performance("process_single_post", processing_time, post_url=post_url)
+            
+            return post_data
+            
+        except Exception as e:
+            self.logger.log_error_with_context(e, {
+                'method': '_process_single_post',
+                'post_url': getattr(self, '_current_post_url', 'unknown')
+            })
+            return None
+    
+    def _extract_comments(self, post_element) -> List[CommentInfo]:
+        """Извлечение комментариев из живого элемента (асинхронно если включено)"""
+        if self.config.enable_async:
+            return asyncio.run(self._extract_comments_async(post_element))
+        return self.comment_extractor.extract(post_element)
+    
+    def _build_post_info(self, comments: List[CommentInfo], author_data: AuthorInfo, post_content: Optional[str],
+                         post_time: Optional[str], post_url: str, external_links: List[str],
+                         images: List[str], likes_count: int, shares_count: int,
+                         reactions: Dict[str, int], post_type: str) -> PostInfo:
+        """Сборка PostInfo и кэширование"""
+        tags = self._extract_hashtags(post_content)
+        
+        # Создаем объект поста
+        post_data = PostInfo(
+            author=author_data,
+            content=post_content or "",
+            posted_time=post_time or 'Unknown',
+            post_url=post_url,
+            external_links=external_links,
+            images=images,
+            comments=comments,
+            scraped_time=datetime.utcnow().isoformat(),
+            likes_count=likes_count,
+            shares_count=shares_count,
+            reactions=reactions,
+            post_type=post_type,
+            tags=tags
+        )
         
-        for selector in url_selectors:
+        # Кэшируем данные поста
+        self.cache_manager.cache_post_data(post_url, post_data)
+        
+        return post_data
+    
+    def _get_post_url(self, post_element) -> Optional[str]:
+        """Извлечение URL поста"""
+        attempt = self.selectors.attempt('post.url', self.url_selectors)
+        for selector in attempt:
             try:
-                link_element = post_element.find_element(By.CSS_SELECTOR, selector)
+                link_element = self.probe.first(post_element, selector)
+                if link_element is None:
+                    continue
                 href = link_element.get_attribute('href')
                 if href and ('posts' in href or 'photos' in href or 'videos' in href):
+                    attempt.hit()
                     # Очищаем URL от лишних параметров
                     clean_url = href.split('?')[0] if '?' in href else href
                     return clean_url
@@ -877,19 +1535,10 @@ class PostProcessor:
     
     def _extract_post_content(self, post_element) -> Optional[str]:
         """Извлечение содержимого поста с улучшенными селекторами"""
-        content_selectors = [
-            'div[data-ad-comet-preview="message"] span',
-            'div[data-testid="post_message"]',
-            'div.x11i5rnm.xat24cr.x1mh8g0r.x1vvkbs span[dir="auto"]',
-            'div[class*="userContent"] span',
-            'div.userContent p',
-            'span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.x1xmvt09.x1lliihq.x1s928wv.xhkezso.x1gmr53x.x1cpjm7i.x1fgarty.x1943h6x.x4zkp8e.x676frb.x1nxh6w3.x1sibtaa.x1s688f.xzsf02u',
-            'div[role="article"] span[dir="auto"]:not([aria-hidden="true"])'
-        ]
-        
-        for selector in content_selectors:
+        attempt = self.selectors.attempt('post.content', self.content_selectors)
+        for selector in attempt:
             try:
-                content_elements = post_element.find_elements(By.CSS_SELECTOR, selector)
+                content_elements = self.probe.all(post_element, selector)
                 if content_elements:
                     # Объединяем текст из всех найденных элементов
                     content_parts = []
@@ -899,6 +1548,7 @@ class PostProcessor:
                             content_parts.append(text)
                     
                     if content_parts:
+                        attempt.hit()
                         return ' '.join(content_parts)
             except Exception as e:
                 self.logger.logger.debug(f"Error with content selector {selector}: {e}")
@@ -908,40 +1558,38 @@ class PostProcessor:
     
     def _extract_post_time(self, post_element) -> Optional[str]:
         """Извлечение времени публикации поста"""
-        time_selectors = [
-            'abbr[data-utime]',
-            'a[aria-label*="minutes"]',
-            'a[aria-label*="hours"]',
-            'a[aria-label*="days"]',
-            'span[title]',
-            'abbr[title]',
-            'a[href*="posts"] span[title]'
-        ]
-        
-        for selector in time_selectors:
+        attempt = self.selectors.attempt('post.time', self.time_selectors)
+        for selector in attempt:
             try:
-                time_element = post_element.find_element(By.CSS_SELECTOR, selector)
+                time_element = self.probe.first(post_element, selector)
+                if time_element is None:
+                    continue
+                # Элемент найден; если в нем нет времени, перебор продолжается (попадание - только со значением)
                 
                 # Пытаемся получить точное время из атрибутов
                 if time_element.tag_name == 'abbr':
                     utime = time_element.get_attribute('data-utime')
                     if utime:
                         timestamp = int(utime)
+                        attempt.hit()
                         return datetime.fromtimestamp(timestamp).isoformat()
                 
                 # Пытаемся получить из title атрибута
                 title = time_element.get_attribute('title')
                 if title:
+                    attempt.hit()
                     return title
                 
                 # Пытаемся получить из aria-label
                 aria_label = time_element.get_attribute('aria-label')
                 if aria_label:
+                    attempt.hit()
                     return aria_label
                 
                 # Получаем текст элемента
                 text = time_element.text.strip()
                 if text:
+                    attempt.hit()
                     return text
                     
             except Exception as e:
@@ -950,207 +1598,215 @@ class PostProcessor:
         
         return None
     
+    def _parse_raw_time(self, raw_time: Optional[Dict[str, str]]) -> Optional[str]:
+        """Время поста из результата JS-движка"""
+        if not raw_time:
+            return None
+        if raw_time.get('utime'):
+            try:
+                return datetime.fromtimestamp(int(raw_time['utime'])).isoformat()
+            except ValueError:
+                return None
+        return raw_time.get('value')
+    
     def _extract_external_links(self, post_element) -> List[str]:
         """Извлечение внешних ссылок из поста"""
-        external_links = []
+        hrefs = []
         
         try:
             # Ищем все ссылки в посте
             link_elements = post_element.find_elements(By.CSS_SELECTOR, 'a[href]')
-            
-            for link in link_elements:
-                href = link.get_attribute('href')
-                if href:
-                    # Фильтруем только внешние ссылки (не Facebook)
-                    if not any(fb_domain in href for fb_domain in ['facebook.com', 'fb.com', 'instagram.com']):
-                        # Очищаем ссылку от Facebook-редиректов
-                        if 'facebook.com/l.php' in href:
-                            # Извлекаем оригинальную ссылку из параметра u
-                            import urllib.parse
-                            parsed = urllib.parse.urlparse(href)
-                            params = urllib.parse.parse_qs(parsed.query)
-                            if 'u' in params:
-                                original_url = urllib.parse.unquote(params['u'][0])
-                                external_links.append(original_url)
-                        else:
-                            external_links.append(href)
+            hrefs = [link.get_attribute('href') for link in link_elements]
         
         except Exception as e:
             self.logger.logger.debug(f"Error extracting external links: {e}")
         
+        return self._clean_external_links(hrefs)
+    
+    def _clean_external_links(self, hrefs: List[Optional[str]]) -> List[str]:
+        """Фильтрация внешних ссылок (не Facebook) и снятие редиректов"""
+        external_links = []
+        
+        for href in hrefs:
+            if href:
+                # Фильтруем только внешние ссылки (не Facebook)
+                if not any(fb_domain in href for fb_domain in ['facebook.com', 'fb.com', 'instagram.com']):
+                    # Очищаем ссылку от Facebook-редиректов
+                    if 'facebook.com/l.php' in href:
+                        # Извлекаем оригинальную ссылку из параметра u
+                        import urllib.parse
+                        parsed = urllib.parse.urlparse(href)
+                        params = urllib.parse.parse_qs(parsed.query)
+                        if 'u' in params:
+                            original_url = urllib.parse.unquote(params['u'][0])
+                            external_links.append(original_url)
+                    else:
+                        external_links.append(href)
+        
         return list(set(external_links))  # Удаляем дубликаты
     
     def _extract_images(self, post_element) -> List[str]:
         """Извлечение изображений из поста"""
-        images = []
-        
-        image_selectors = [
-            'img[src*="scontent"]',
-            'img[data-src*="scontent"]',
-            'div[role="img"] img',
-            'div[data-testid="photo"] img',
-            'img[alt]:not([alt=""])'
-        ]
+        srcs = []
         
-        for selector in image_selectors:
+        for selector in self.image_selectors:
             try:
-                img_elements = post_element.find_elements(By.CSS_SELECTOR, selector)
+                img_elements = self.probe.all(post_element, selector)
                 for img in img_elements:
-                    src = img.get_attribute('src') or img.get_attribute('data-src')
-                    if src and 'scontent' in src:  # Facebook CDN изображения
-                        # Получаем оригинальное разрешение
-                        if '&_nc_cat=' in src:
-                            # Убираем параметры масштабирования для получения оригинала
-                            clean_src = re.sub(r'&s=\d+x\d+', '', src)
-                            images.append(clean_src)
-                        else:
-                            images.append(src)
+                    srcs.append(img.get_attribute('src') or img.get_attribute('data-src'))
             except Exception as e:
                 self.logger.logger.debug(f"Error with image selector {selector}: {e}")
                 continue
         
+        return self._clean_image_urls(srcs)
+    
+    def _clean_image_urls(self, srcs: List[Optional[str]]) -> List[str]:
+        """Отбор изображений Facebook CDN и очистка параметров масштабирования"""
+        images = []
+        
+        for src in srcs:
+            if src and 'scontent' in src:  # Facebook CDN изображения
+                # Получаем оригинальное разрешение
+                if '&_nc_cat=' in src:
+                    # Убираем параметры масштабирования для получения оригинала
+                    clean_src = re.sub(r'&s=\d+x\d+', '', src)
+                    images.append(clean_src)
+                else:
+                    images.append(src)
+        
         return list(set(images))  # Удаляем дубликаты
     
     def _extract_likes_count(self, post_element) -> int:
         """Извлечение количества лайков"""
-        like_selectors = [
-            'span[aria-label*="reaction"]',
-            'div[aria-label*="reaction"]',
-            'span[data-testid="UFI2ReactionsCount/root"]',
-            'div._81hb span',
-            'span._3dlh._3dli'
-        ]
-        
-        for selector in like_selectors:
-            try:
-                like_element = post_element.find_element(By.CSS_SELECTOR, selector)
-                aria_label = like_element.get_attribute('aria-label') or like_element.text
-                
-                # Извлекаем числа из текста
-                numbers = re.findall(r'(\d+(?:,\d+)*(?:\.\d+)?)', aria_label.replace(',', ''))
-                if numbers:
-                    # Преобразуем в число (обрабатываем K, M)
-                    count_str = numbers[0]
-                    if 'K' in aria_label.upper():
-                        return int(float(count_str) * 1000)
-                    elif 'M' in aria_label.upper():
-                        return int(float(count_str) * 1000000)
-                    else:
-                        return int(count_str)
-                        
-            except Exception as e:
-                self.logger.logger.debug(f"Error with like selector {selector}: {e}")
-                continue
-        
-        return 0
+        return self._extract_count(post_element, self.like_selectors, 'like')
     
     def _extract_shares_count(self, post_element) -> int:
         """Извлечение количества репостов"""
-        share_selectors = [
-            'span[aria-label*="share"]',
-            'div[aria-label*="share"]',
-            'span[data-testid*="share"]',
-            'div._3dlh._3dli:contains("share")'
-        ]
-        
-        for selector in share_selectors:
+        return self._extract_count(post_element, self.share_selectors, 'share')
+    
+    def _extract_count(self, post_element, selectors: List[str], kind: str) -> int:
+        """Первое распознанное число из aria-label/текста по списку селекторов"""
+        for selector in selectors:
             try:
-                share_element = post_element.find_element(By.CSS_SELECTOR, selector)
-                aria_label = share_element.get_attribute('aria-label') or share_element.text
+                count_element = self.probe.first(post_element, selector)
+                if count_element is None:
+                    continue
+                label = count_element.get_attribute('aria-label') or count_element.text
                 
-                numbers = re.findall(r'(\d+(?:,\d+)*(?:\.\d+)?)', aria_label.replace(',', ''))
-                if numbers:
-                    count_str = numbers[0]
-                    if 'K' in aria_label.upper():
-                        return int(float(count_str) * 1000)
-                    elif 'M' in aria_label.upper():
-                        return int(float(count_str) * 1000000)
-                    else:
-                        return int(count_str)
+                count = self._parse_count_label(label)
+                if count is not None:
+                    return count
                         
             except Exception as e:
-                self.logger.logger.debug(f"Error with share selector {selector}: {e}")
+                self.logger.logger.debug(f"Error with {kind} selector {selector}: {e}")
                 continue
         
         return 0
     
+    def _parse_count_labels(self, labels: List[str]) -> int:
+        """Первое распознанное число из списка подписей (результат JS-движка)"""
+        for label in labels:
+            count = self._parse_count_label(label)
+            if count is not None:
+                return count
+        return 0
+    
+    def _parse_count_label(self, label: Optional[str]) -> Optional[int]:
+        """Разбор числа из подписи с учетом суффиксов K и M"""
+        if not label:
+            return None
+        
+        # Извлекаем числа из текста
+        numbers = re.findall(r'(\d+(?:,\d+)*(?:\.\d+)?)', label.replace(',', ''))
+        if not numbers:
+            return None
+        
+        # Преобразуем в число (обрабатываем K, M)
+        count_str = numbers[0]
+        if 'K' in label.upper():
+            return int(float(count_str) * 1000)
+        elif 'M' in label.upper():
+            return int(float(count_str) * 1000000)
+        else:
+            return int(float(count_str))
+    
     def _extract_reactions(self, post_element) -> Dict[str, int]:
         """Извлечение детализированных реакций"""
-        reactions = {}
-        
         # Пытаемся найти детальную информацию о реакциях
-        reaction_selectors = [
-            'div[aria-label*="reaction"]',
-            'span[data-testid="UFI2ReactionsCount/root"]',
-            'div._1g06 span'
-        ]
-        
-        for selector in reaction_selectors:
+        for selector in self.reaction_selectors:
             try:
-                reaction_element = post_element.find_element(By.CSS_SELECTOR, selector)
+                reaction_element = self.probe.first(post_element, selector)
+                if reaction_element is None:
+                    continue
                 aria_label = reaction_element.get_attribute('aria-label')
                 
                 if aria_label:
-                    # Парсим различные типы реакций
-                    reaction_patterns = {
-                        'like': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?(?:liked|like)',
-                        'love': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?love',
-                        'haha': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?(?:haha|laugh)',
-                        'wow': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?wow',
-                        'sad': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?(?:sad|cry)',
-                        'angry': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?angry'
-                    }
-                    
-                    for reaction_type, pattern in reaction_patterns.items():
-                        matches = re.findall(pattern, aria_label.lower())
-                        if matches:
-                            reactions[reaction_type] = int(matches[0])
-                    
-                    # Если не смогли распарсить детально, берем общее количество
-                    if not reactions:
-                        total_match = re.search(r'(\d+)', aria_label)
-                        if total_match:
-                            reactions['total'] = int(total_match.group(1))
-                    
-                    break
+                    return self._parse_reaction_label(aria_label)
                     
             except Exception as e:
                 self.logger.logger.debug(f"Error with reaction selector {selector}: {e}")
                 continue
         
+        return {}
+    
+    def _parse_reaction_label(self, aria_label: Optional[str]) -> Dict[str, int]:
+        """Разбор типов реакций из aria-label"""
+        reactions = {}
+        if not aria_label:
+            return reactions
+        
+        # Парсим различные типы реакций
+        reaction_patterns = {
+            'like': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?(?:liked|like)',
+            'love': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?love',
+            'haha': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?(?:haha|laugh)',
+            'wow': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?wow',
+            'sad': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?(?:sad|cry)',
+            'angry': r'(\d+)\s*(?:people\s*)?(?:reacted\s*with\s*)?angry'
+        }
+        
+        for reaction_type, pattern in reaction_patterns.items():
+            matches = re.findall(pattern, aria_label.lower())
+            if matches:
+                reactions[reaction_type] = int(matches[0])
+        
+        # Если не смогли распарсить детально, берем общее количество
+        if not reactions:
+            total_match = re.search(r'(\d+)', aria_label)
+            if total_match:
+                reactions['total'] = int(total_match.group(1))
+        
         return reactions
     
     def _detect_post_type(self, post_element) -> str:
         """Определение типа поста"""
         try:
-            # Проверяем наличие видео
-            if post_element.find_elements(By.CSS_SELECTOR, 'video, div[aria-label*="video"]'):
-                return "video"
-            
-            # Проверяем наличие изображений
-            if post_element.find_elements(By.CSS_SELECTOR, 'img[src*="scontent"]'):
-                return "photo"
-            
-            # Проверяем наличие ссылок на внешние ресурсы
-            external_links = self._extract_external_links(post_element)
-            if external_links:
-                return "link"
-            
-            # Проверяем опросы
-            if post_element.find_elements(By.CSS_SELECTOR, 'div[aria-label*="poll"], div[data-testid*="poll"]'):
-                return "poll"
-            
-            # Проверяем события
-            if post_element.find_elements(By.CSS_SELECTOR, 'div[aria-label*="event"]'):
-                return "event"
-            
-            # По умолчанию - текстовый пост
-            return "text"
+            flags = {
+                post_type: bool(self.probe.all(post_element, selector))
+                for post_type, selector in self.post_type_markers.items()
+            }
+            return self._post_type_from_flags(flags, self._extract_external_links(post_element))
             
         except Exception as e:
             self.logger.logger.debug(f"Error detecting post type: {e}")
             return "unknown"
     
+    def _post_type_from_flags(self, flags: Dict[str, bool], external_links: List[str]) -> str:
+        """Тип поста по найденным маркерам (видео > фото > ссылка > опрос > событие > текст)"""
+        if flags.get('video'):
+            return "video"
+        if flags.get('photo'):
+            return "photo"
+        if external_links:
+            return "link"
+        if flags.get('poll'):
+            return "poll"
+        if flags.get('event'):
+            return "event"
+        
+        # По умолчанию - текстовый пост
+        return "text"
+    
     def _extract_hashtags(self, content: str) -> List[str]:
         """Извлечение хэштегов из содержимого"""
         if not content:
@@ -1184,9 +1840,14 @@ class PostProcessor:
 class PerformanceMonitor:
     """Монитор производительности и ресурсов"""
     
-    def __init__(self, config: ScrapingConfig, logger: LoggerManager):
+    def __init__(self, config: ScrapingConfig, logger: LoggerManager, stage_metrics: ScrapeMetrics,
+                 process_monitor: Optional[ProcessTreeMonitor] = None):
         self.config = config
         self.logger = logger
+        # Время этапов - гистограммы в ScrapeMetrics (p50/p95/p99 в отчете)
+        self.stage_metrics = stage_metrics
+        # Ресурсы по процессам (python, driver, browser, renderer, gpu): пики - в самом мониторе
+        self.process_monitor = process_monitor or ProcessTreeMonitor()
         self.start_time = time.time()
         self.metrics = {
             'posts_processed': 0,
@@ -1194,8 +1855,7 @@ class PerformanceMonitor:
             'errors_count': 0,
             'cache_hits': 0,
             'cache_misses': 0,
-            'memory_peaks': [],
-            'processing_times': []
+            'memory_peaks': []
         }
         
         # Флаг для мониторинга
@@ -1219,14 +1879,21 @@ class PerformanceMonitor:
                 # Мониторинг памяти
                 memory_percent = psutil.virtual_memory().percent
                 self.metrics['memory_peaks'].append(memory_percent)
+                tree = self.process_monitor.sample()
                 
-                # Предупреждение при высоком использовании памяти
+                # Предупреждение при высоком использовании памяти - с разбивкой по процессам
                 if memory_percent > self.config.max_memory_usage:
+                    breakdown = ", ".join(f"{role}={tree[role]['rss_mb']:.0f}MB" for role in ROLES)
                     self.logger.logger.warning(
-                        f"High memory usage: {memory_percent:.1f}% (threshold: {self.config.max_memory_usage}%)"
+                        f"High memory usage: {memory_percent:.1f}% (threshold: {self.config.max_memory_usage}%); "
+                        f"process tree RSS: {breakdown}"
                     )
-                    # Принудительная очистка
-                    gc.collect()
+                    # gc.collect помогает, только если память держит сам Python
+                    largest = self.process_monitor.largest_role()
+                    if largest == 'python':
+                        gc.collect()
+                    else:
+                        self.logger.logger.warning(f"Largest memory consumer is {largest}, not the Python heap")
                 
                 # Мониторинг GPU (если включен)
                 if self.config.enable_gpu:
@@ -1245,27 +1912,26 @@ class PerformanceMonitor:
                 if len(self.metrics['memory_peaks']) > 100:
                     self.metrics['memory_peaks'] = self.metrics['memory_peaks'][-50:]
                 
-                if len(self.metrics['processing_times']) > 100:
-                    self.metrics['processing_times'] = self.metrics['processing_times'][-50:]
-                
                 time.sleep(5)  # Проверка каждые 5 секунд
                 
             except Exception as e:
                 self.logger.logger.debug(f"Error in resource monitoring: {e}")
                 time.sleep(10)
     
-    def record_post_processed(self, processing_time: float):
-        """Запись обработанного поста"""
+    def record_post_processed(self, comments: int = 0):
+        """Запись обработанного поста (время обработки - в гистограмме extract_post)"""
         self.metrics['posts_processed'] += 1
-        self.metrics['processing_times'].append(processing_time)
+        self.record_comments_extracted(comments)
+        self.stage_metrics.record_post(comments)
     
     def record_comments_extracted(self, count: int):
         """Запись извлеченных комментариев"""
         self.metrics['comments_extracted'] += count
     
-    def record_error(self):
+    def record_error(self, stage: str = 'extract_post'):
         """Запись ошибки"""
         self.metrics['errors_count'] += 1
+        self.stage_metrics.record_error(stage)
     
     def record_cache_hit(self):
         """Запись попадания в кэш"""
@@ -1280,11 +1946,6 @@ class PerformanceMonitor:
         current_time = time.time()
         total_time = current_time - self.start_time
         
-        avg_processing_time = (
-            sum(self.metrics['processing_times']) / len(self.metrics['processing_times'])
-            if self.metrics['processing_times'] else 0
-        )
-        
         posts_per_minute = (
             self.metrics['posts_processed'] / (total_time / 60)
             if total_time > 0 else 0
@@ -1304,11 +1965,12 @@ class PerformanceMonitor:
             'comments_extracted': self.metrics['comments_extracted'],
             'errors_count': self.metrics['errors_count'],
             'posts_per_minute': f"{posts_per_minute:.2f}",
-            'avg_processing_time': f"{avg_processing_time:.2f}s",
+            'stages': self.stage_metrics.report(),
             'cache_hit_rate': f"{cache_hit_rate:.2%}",
             'current_memory_usage': f"{current_memory:.1f}%",
             'peak_memory_usage': f"{max_memory:.1f}%",
-            'memory_threshold': f"{self.config.max_memory_usage:.1f}%"
+            'memory_threshold': f"{self.config.max_memory_usage:.1f}%",
+            'process_tree': self.process_monitor.report()
         }
     
     def stop_monitoring(self):
@@ -1319,78 +1981,151 @@ class PerformanceMonitor:
         self.logger.logger.info("Performance monitoring stopped")
 
 class CheckpointManager:
-    """Управление чекпоинтами для восстановления после сбоев"""
+    """Чекпоинты в виде журнала: дописываются только новые посты и запись курсора.
+    Журнал периодически сжимается, загрузка - проигрыш журнала"""
     
-    def __init__(self, config: ScrapingConfig, logger: LoggerManager):
+    JOURNAL_NAME = "journal.jsonl"
+    
+    def __init__(self, config: ScrapingConfig, logger: LoggerManager, compact_every: int = 200):
         self.config = config
         self.logger = logger
         self.checkpoint_dir = Path(config.output_dir) / "checkpoints"
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.current_checkpoint = {
-            'processed_posts': [],
-            'last_scroll_position': 0,
-            'timestamp': datetime.utcnow().isoformat(),
-            'config': asdict(config)
-        }
+        self.journal_path = self.checkpoint_dir / self.JOURNAL_NAME
+        
+        # Что уже в журнале: посты по URL и сколько элементов списка постов записано
+        self._journaled_urls = set()
+        self._journaled_count = 0
+        # Записи курсора копятся до сжатия журнала
+        self.compact_every = compact_every
+        self._cursor_records = 0
     
     def save_checkpoint(self, processed_posts: List[PostInfo], scroll_position: int):
-        """Сохранение чекпоинта"""
+        """Сохранение чекпоинта: в журнал дописываются посты, добавленные после прошлого вызова"""
         try:
-            self.current_checkpoint.update({
-                'processed_posts': [asdict(post) for post in processed_posts],
-                'last_scroll_position': scroll_position,
-                'timestamp': datetime.utcnow().isoformat()
-            })
-            
-            checkpoint_file = self.checkpoint_dir / f"checkpoint_{int(time.time())}.json"
-            
-            with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(self.current_checkpoint, f, ensure_ascii=False, indent=2)
-            
-            # Удаляем старые чекпоинты (оставляем последние 5)
-            self._cleanup_old_checkpoints()
+            # processed_posts только растет; после замены списка (слияние шардов) начинаем сначала
+            start = self._journaled_count if self._journaled_count <= len(processed_posts) else 0
+            lines = []
+            if not self.journal_path.exists():
+                lines.append(self._record('meta', config=asdict(self.config)))
+            for post in processed_posts[start:]:
+                if post.post_url and post.post_url in self._journaled_urls:
+                    continue
+                lines.append(self._record('post', post=asdict(post)))
+                if post.post_url:
+                    self._journaled_urls.add(post.post_url)
+            self._journaled_count = len(processed_posts)
+            lines.append(self._record(
+                'cursor',
+                last_scroll_position=scroll_position,
+                posts=len(processed_posts),
+                timestamp=datetime.utcnow().isoformat()
+            ))
+            
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self._cursor_records += 1
+            
+            if self._cursor_records >= self.compact_every:
+                self.compact()
             
-            self.logger.logger.info(f"Checkpoint saved: {checkpoint_file}")
+            self.logger.logger.info(
+                f"Checkpoint saved: {len(lines) - 1} new records, {len(processed_posts)} posts total"
+            )
             
         except Exception as e:
             self.logger.log_error_with_context(e, {'method': 'save_checkpoint'})
     
     def load_latest_checkpoint(self) -> Optional[Dict[str, Any]]:
-        """Загрузка последнего чекпоинта"""
+        """Загрузка чекпоинта проигрышем журнала (или из старого файла checkpoint_*.json)"""
         try:
-            checkpoint_files = list(self.checkpoint_dir.glob("checkpoint_*.json"))
-            if not checkpoint_files:
-                return None
-            
-            # Находим самый свежий чекпоинт
-            latest_checkpoint = max(checkpoint_files, key=lambda f: f.stat().st_mtime)
+            if not self.journal_path.exists():
+                return self._load_legacy_checkpoint()
             
-            with open(latest_checkpoint, 'r', encoding='utf-8') as f:
-                checkpoint_data = json.load(f)
+            posts, cursor, meta = self._replay()
+            if not posts and cursor is None:
+                return None
             
-            self.logger.logger.info(f"Loaded checkpoint: {latest_checkpoint}")
-            return checkpoint_data
+            self._journaled_urls = set(posts)
+            self._journaled_count = len(posts)
+            self.logger.logger.info(f"Loaded checkpoint journal: {self.journal_path} ({len(posts)} posts)")
+            return {
+                'processed_posts': list(posts.values()),
+                'last_scroll_position': (cursor or {}).get('last_scroll_position', 0),
+                'timestamp': (cursor or {}).get('timestamp'),
+                'config': (meta or {}).get('config')
+            }
             
         except Exception as e:
             self.logger.log_error_with_context(e, {'method': 'load_latest_checkpoint'})
             return None
     
-    def _cleanup_old_checkpoints(self):
-        """Очистка старых чекпоинтов"""
+    def compact(self):
+        """Сжатие журнала: по одной записи на пост и последний курсор (атомарная замена файла)"""
         try:
-            checkpoint_files = sorted(
-                self.checkpoint_dir.glob("checkpoint_*.json"),
-                key=lambda f: f.stat().st_mtime,
-                reverse=True
-            )
-            
-            # Удаляем все кроме последних 5
-            for old_checkpoint in checkpoint_files[5:]:
+            posts, cursor, meta = self._replay()
+            tmp_path = self.journal_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                if meta:
+                    f.write(self._record('meta', **meta))
+                for post_data in posts.values():
+                    f.write(self._record('post', post=post_data))
+                if cursor:
+                    f.write(self._record('cursor', **cursor))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+            self._cursor_records = 0
+            
+            # Старые полные снимки больше не нужны
+            for old_checkpoint in self.checkpoint_dir.glob("checkpoint_*.json"):
                 old_checkpoint.unlink()
-                
+            
+            self.logger.logger.info(f"Checkpoint journal compacted: {len(posts)} posts")
+            
         except Exception as e:
-            self.logger.logger.debug(f"Error cleaning old checkpoints: {e}")
+            self.logger.logger.debug(f"Error compacting checkpoint journal: {e}")
+    
+    def _record(self, kind: str, **fields) -> str:
+        # default=str: в конфигурации есть Enum (LogLevel)
+        return json.dumps({'type': kind, **fields}, ensure_ascii=False, default=str) + '\n'
+    
+    def _replay(self):
+        """Посты по URL (порядок первого появления, данные последней записи), последний курсор и meta"""
+        posts = {}
+        cursor = None
+        meta = None
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Оборванная последняя строка после сбоя
+                    continue
+                kind = record.pop('type', None)
+                if kind == 'post':
+                    post_data = record['post']
+                    posts[post_data.get('post_url') or f"#{len(posts)}"] = post_data
+                elif kind == 'cursor':
+                    cursor = record
+                elif kind == 'meta':
+                    meta = record
+        return posts, cursor, meta
+    
+    def _load_legacy_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Последний полный снимок checkpoint_*.json (прогоны до перехода на журнал)"""
+        checkpoint_files = list(self.checkpoint_dir.glob("checkpoint_*.json"))
+        if not checkpoint_files:
+            return None
+        
+        latest_checkpoint = max(checkpoint_files, key=lambda f: f.stat().st_mtime)
+        with open(latest_checkpoint, 'r', encoding='utf-8') as f:
+            checkpoint_data = json.load(f)
+        
+        self.logger.logger.info(f"Loaded legacy checkpoint: {latest_checkpoint}")
+        return checkpoint_data
 
 class EnhancedFacebookScraper:
     """Улучшенный скрапер Facebook групп с расширенными возможностями"""
@@ -1405,18 +2140,97 @@ class EnhancedFacebookScraper:
             delay=config.retry_delay
         )
         self.cache_manager = CacheManager(config, self.logger)
-        self.memory_manager = MemoryManager(self.logger)
-        self.performance_monitor = PerformanceMonitor(config, self.logger)
+        # Время этапов (navigate, scroll, expand_comments, extract_post, extract_comment, write) в OpenMetrics
+        self.metrics = ScrapeMetrics(
+            'selenium',
+            config.group_url,
+            path=os.path.join(config.output_dir, config.metrics_file) if config.metrics_file else None,
+            port=config.metrics_port
+        )
+        # RSS, CPU% и дескрипторы дерева процессов: Python, chromedriver, браузер, рендереры, GPU
+        self.process_monitor = ProcessTreeMonitor(metrics=self.metrics)
+        self.memory_manager = MemoryManager(self.logger, self.process_monitor, config.gc_threshold_mb)
+        self.performance_monitor = PerformanceMonitor(config, self.logger, self.metrics, self.process_monitor)
         self.checkpoint_manager = CheckpointManager(config, self.logger)
         
         # Обработчик постов
         self.post_processor = PostProcessor(
             config, self.logger, self.cache_manager, self.retry_manager
         )
+        self.post_processor.metrics = self.metrics
+        self.post_processor.comment_extractor.metrics = self.metrics
+        self.post_processor.memory_manager = self.memory_manager
         
-        # Веб-драйвер
+        # Веб-драйвер и профиль блокировки запросов
         self.driver = None
         self.scraped_posts = []
+        self.post_selectors = [
+            'div[role="article"]',
+            'div[data-pagelet="FeedUnit_"]',
+            'div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z' # Новый селектор для постов
+        ]
+        self.load_more_selectors = [
+            'div[role="button"]:contains("See more")',
+            'span:contains("See more posts")',
+            'div[role="button"][tabindex="0"]',
+            'a[aria-label*="See more"]'
+        ]
+        self.compiler = self.post_processor.compiler
+        self.compiler.compile_lists(self, ['post_selectors', 'load_more_selectors'])
+        selector_report = self.compiler.report()
+        self.logger.logger.info(
+            f"Selectors compiled: {selector_report['compiled']}, translated to XPath: "
+            f"{len(selector_report['translated'])}, rejected: {len(selector_report['rejected'])}"
+        )
+        for selector, reason in selector_report['rejected'].items():
+            self.logger.logger.warning(f"Selector rejected at startup: {reason}")
+        # Очередь новых постов на странице и посты, у которых еще не было URL (id -> (элемент, попытки))
+        self.feed_queue = None
+        self._deferred_posts = {}
+        self.pruned_posts = 0
+        self.routing_profile = get_profile(config.routing_profile)
+        self.routing_stats = RoutingStats(self.routing_profile)
+        # Перезапуск вкладки или браузера в длинных прогонах (у Selenium context = browser)
+        self.recycle_policy = RecyclePolicy(
+            config.recycle_after_posts, config.recycle_renderer_mb,
+            config.recycle_after_minutes, config.recycle_scope
+        )
+        
+        # Ожидания по событиям (общая статистика со скрапером комментариев)
+        self.wait_stats = WaitStats()
+        self.post_processor.comment_extractor.wait_stats = self.wait_stats
+        self.waiter = None
+        # Потоковая запись постов (пачками с fsync, ротация по размеру)
+        self.results_sink = JsonlSink(
+            os.path.join(config.output_dir, config.results_file),
+            max_bytes=config.results_rotate_mb * 1024 * 1024,
+            # Дописывается только при возобновлении с чекпоинта, иначе - новый файл
+            append=self.checkpoint_manager.journal_path.exists()
+        ) if config.stream_results else None
+        self.store = SQLiteStore(config.sqlite_path) if config.sqlite_path else None
+        # Инкрементальному режиму нужен индекс виденных между запусками: у ссылок pfbid нет
+        # числового ID, и без времени поста известные посты узнаются только по нему
+        if config.incremental and not config.seen_index_dir:
+            config.seen_index_dir = os.path.join(config.output_dir, "state")
+            self.logger.logger.warning(
+                f"Incremental mode needs a persistent seen index; using seen_index_dir={config.seen_index_dir}"
+            )
+        # Виденные URL постов (дедупликация за O(1); с seen_index_dir - и посты прошлых запусков)
+        self.seen = SeenIndex(config.group_url, config.seen_index_dir)
+        # Инкрементальный режим: отметка самого нового поста группы с прошлого запуска
+        self.incremental = IncrementalTracker(
+            config.group_url,
+            config.seen_index_dir or os.path.join(config.output_dir, "state"),
+            stop_after=config.incremental_stop_after,
+            seen=self.seen
+        ) if config.incremental else None
+        # Темп прокрутки и загрузки постов (без adaptive_rate задержка постоянна)
+        self.rate_controller = RateController(
+            initial_delay=config.scroll_delay,
+            min_delay=config.min_delay,
+            max_delay=config.max_delay,
+            adaptive=config.adaptive_rate
+        )
         
         # Обработчик сигналов для graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -1447,8 +2261,24 @@ class EnhancedFacebookScraper:
             if hasattr(self.post_processor, 'stop_async_processing'):
                 self.post_processor.stop_async_processing()
             
+            self.logger.logger.info(f"Wait report: {json.dumps(self.wait_stats.report())}")
+            self.logger.logger.info(f"Rate report: {json.dumps(self.rate_controller.report())}")
+            self.logger.logger.info(f"Probe report: {json.dumps(self.post_processor.probe.stats.report())}")
+            self.logger.logger.info(f"Stage report: {json.dumps(self.metrics.report())}")
+            self.logger.logger.info(f"Recycle report: {json.dumps(self.recycle_policy.report())}")
+            self.metrics.close()
+            if self.results_sink:
+                self.results_sink.flush()
+            if self.store:
+                self.store.close()
+            self.seen.save()
+            self.post_processor.selectors.save()
+            if self.config.prune_feed:
+                self.logger.logger.info(f"Feed pruning: {self.pruned_posts} posts pruned")
+            
             # Закрываем драйвер
             if self.driver:
+                self._report_routing()
                 self.driver.quit()
                 
             # Очищаем кэш
@@ -1485,10 +2315,18 @@ class EnhancedFacebookScraper:
             else:
                 self.logger.logger.info("GPU usage disabled or not available.")
 
+            configure_selenium_options(options, self.routing_profile)
+
             # Инициализация драйвера
             self.driver = uc.Chrome(options=options)
             self.driver.set_page_load_timeout(self.config.page_load_timeout)
-            self.driver.implicitly_wait(self.config.implicit_wait)
+            # В режиме проб промах поиска в загруженном посте не ждет implicit wait
+            self.driver.implicitly_wait(0 if self.config.probe_mode else self.config.implicit_wait)
+            self.routing_stats = apply_selenium_profile(self.driver, self.routing_profile, self.routing_stats)
+            self.waiter = SeleniumWaiter(self.driver, self.wait_stats)
+            self.feed_queue = SeleniumFeedQueue(self.driver, ', '.join(self.post_selectors))
+            # Базовый снимок с браузером: "до" первого поста - не снимок без Chrome
+            self.process_monitor.sample()
             
             self.logger.logger.info("Chromedriver initialized successfully.")
             
@@ -1507,7 +2345,7 @@ class EnhancedFacebookScraper:
                 cookies = json.load(f)
             
             # Необходимо перейти на домен, прежде чем добавлять куки
-            self.driver.get("https://www.facebook.com")
+            self.driver.get(self.config.base_url)
             
             for cookie in cookies:
                 # Undetected Chromedriver может иметь проблемы с некоторыми полями куки.
@@ -1539,16 +2377,23 @@ class EnhancedFacebookScraper:
         except Exception as e:
             self.logger.log_error_with_context(e, {'method': '_save_cookies'})
 
+    def _report_routing(self):
+        """Итоговая статистика заблокированных запросов"""
+        collect_selenium_blocked(self.driver, self.routing_stats)
+        self.logger.logger.info(f"Routing report: {json.dumps(self.routing_stats.report())}")
+
     def _navigate_to_group(self):
         """Переход на страницу группы"""
         try:
-            self.logger.logger.info(f"Navigating to group URL: {self.config.group_url}")
-            self.driver.get(self.config.group_url)
-            
-            # Ожидание загрузки страницы
-            WebDriverWait(self.driver, self.config.page_load_timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="feed"]'))
-            )
+            group_url = chronological_url(self.config.group_url) if self.incremental else self.config.group_url
+            self.logger.logger.info(f"Navigating to group URL: {group_url}")
+            with self.metrics.stage('navigate'):
+                self.driver.get(group_url)
+                
+                # Ожидание загрузки страницы
+                WebDriverWait(self.driver, self.config.page_load_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="feed"]'))
+                )
             self.logger.logger.info("Successfully navigated to group page.")
             return True
             
@@ -1562,6 +2407,59 @@ class EnhancedFacebookScraper:
             self.logger.log_error_with_context(e, {'url': self.config.group_url, 'method': '_navigate_to_group'})
             return False
 
+    def _recycle_browser(self, reason: str):
+        """Перезапуск вкладки или браузера (recycle_scope) с возвратом к позиции ленты"""
+        started = time.time()
+        # Элементы старой страницы станут недействительны: сначала дорабатываем очередь
+        self.post_processor.wait_until_idle()
+        for post in self.post_processor.get_processed_posts():
+            if len(self.scraped_posts) >= self.config.max_posts:
+                break
+            if post.post_url not in self.seen:
+                self._append_post(post)
+                self.performance_monitor.record_post_processed(len(post.comments))
+        if len(self.scraped_posts) >= self.config.max_posts:
+            # Лимит набран доработанной очередью - перезапуск уже не нужен
+            return
+        self._deferred_posts = {}
+        
+        position = self.driver.execute_script("return window.pageYOffset;")
+        self.checkpoint_manager.save_checkpoint(self.scraped_posts, position)
+        self.logger.logger.info(f"Recycling {self.config.recycle_scope} ({reason}) at scroll position {position}")
+        collect_selenium_blocked(self.driver, self.routing_stats)
+        
+        if self.config.recycle_scope == 'page':
+            # Новая вкладка - новый процесс рендерера; куки остаются в браузере
+            old_window = self.driver.current_window_handle
+            self.driver.switch_to.new_window('tab')
+            new_window = self.driver.current_window_handle
+            self.driver.switch_to.window(old_window)
+            self.driver.close()
+            self.driver.switch_to.window(new_window)
+            apply_selenium_profile(self.driver, self.routing_profile, self.routing_stats)
+            navigated = self._navigate_to_group()
+        else:
+            self._save_cookies()
+            self.driver.quit()
+            self._initialize_driver()
+            navigated = self._load_cookies() and self._navigate_to_group()
+        if not navigated:
+            raise RuntimeError(f"Could not reopen the group after recycling ({reason})")
+        
+        self._restore_position(position)
+        self.recycle_policy.record(reason, len(self.scraped_posts), time.time() - started)
+
+    def _restore_position(self, position: int, max_steps: int = 50):
+        """Прокрутка новой страницы к прежней позиции: лента догружается по шагам.
+        Уже обработанные посты на пути отсеиваются по self.seen"""
+        for _ in range(max_steps):
+            feed_state = self.waiter.feed_state()
+            self.driver.execute_script("window.scrollTo(0, arguments[0]);", position)
+            if self.driver.execute_script("return window.pageYOffset;") >= position:
+                break
+            if not self.waiter.for_feed_growth(feed_state, timeout=self.config.scroll_delay):
+                break
+
     def _scroll_down(self, scroll_attempts: int):
         """Прокрутка страницы вниз для загрузки новых постов"""
         current_scroll_attempts = 0
@@ -1573,9 +2471,15 @@ class EnhancedFacebookScraper:
                 f"Posts scraped: {len(self.scraped_posts)}/{self.config.max_posts}"
             )
             
-            # Прокрутка до конца страницы
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(self.config.scroll_delay)
+            # Прокрутка до конца страницы и ожидание новых постов (scroll_delay - верхняя граница)
+            with self.metrics.stage('scroll'):
+                feed_state = self.waiter.feed_state()
+                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                load_started = time.time()
+                grown = self.waiter.for_feed_growth(feed_state, timeout=self.config.scroll_delay)
+            self._record_feed_load(grown, time.time() - load_started)
+            # Журнал производительности разбирается по ходу, чтобы не копился в памяти
+            collect_selenium_blocked(self.driver, self.routing_stats)
             
             new_height = self.driver.execute_script("return document.body.scrollHeight")
             if new_height == last_height:
@@ -1587,8 +2491,8 @@ class EnhancedFacebookScraper:
             last_height = new_height
             current_scroll_attempts += 1
             
-            # Дополнительная задержка после прокрутки
-            time.sleep(1) 
+            # Даем догрузиться ответам GraphQL (не дольше секунды)
+            self.waiter.for_network_quiet(GRAPHQL_URL_PATTERN, quiet=0.3, timeout=1)
             
             # Сохранение чекпоинта каждые N прокруток
             if current_scroll_attempts % 10 == 0:
@@ -1599,23 +2503,36 @@ class EnhancedFacebookScraper:
         
         self.logger.logger.info(f"Finished scrolling. Total scroll attempts: {current_scroll_attempts}")
 
+    def _record_feed_load(self, grown: bool, latency: float):
+        """Сигналы для контроллера темпа: страница блокировки, пустая догрузка, время догрузки"""
+        throttle = self.rate_controller.check_page(self.driver.current_url, selenium_page_text(self.driver))
+        if throttle:
+            self.logger.logger.warning(f"Throttling detected ({throttle}), rate lowered to {self.rate_controller.current_rate:.2f}/s")
+        elif grown:
+            self.rate_controller.record_success(latency)
+        else:
+            self.rate_controller.record_empty()
+
+    def _pace_cycle(self, cycle_started: float):
+        """Пауза между итерациями: до затихания запросов ленты; с adaptive_rate - не короче текущей задержки"""
+        delay = self.rate_controller.delay
+        self.waiter.for_network_quiet(GRAPHQL_URL_PATTERN, timeout=delay)
+        if self.config.adaptive_rate:
+            remaining = delay - (time.time() - cycle_started)
+            if remaining > 0:
+                time.sleep(remaining)
+
     def _click_load_more_button(self) -> bool:
         """Попытка нажать на кнопку 'Показать больше'"""
-        load_more_selectors = [
-            'div[role="button"]:contains("See more")',
-            'span:contains("See more posts")',
-            'div[role="button"][tabindex="0"]',
-            'a[aria-label*="See more"]'
-        ]
-        
-        for selector in load_more_selectors:
+        for selector in self.load_more_selectors:
             try:
                 button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+                    EC.element_to_be_clickable(self.compiler.locator(selector))
                 )
+                feed_state = self.waiter.feed_state()
                 self.driver.execute_script("arguments[0].click();", button)
                 self.logger.logger.info(f"Clicked 'Load More' button with selector: {selector}")
-                time.sleep(self.config.scroll_delay) # Ждем загрузки нового контента
+                self.waiter.for_feed_growth(feed_state, timeout=self.config.scroll_delay) # Ждем загрузки нового контента
                 return True
             except TimeoutException:
                 continue # Кнопка не найдена по этому селектору
@@ -1627,16 +2544,10 @@ class EnhancedFacebookScraper:
 
     def _get_post_elements(self) -> List[Any]:
         """Получение элементов постов со страницы"""
-        post_selectors = [
-            'div[role="article"]',
-            'div[data-pagelet="FeedUnit_"]',
-            'div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z' # Новый селектор для постов
-        ]
-        
         post_elements = []
-        for selector in post_selectors:
+        for selector in self.post_selectors:
             try:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                elements = self.driver.find_elements(*self.compiler.locator(selector))
                 if elements:
                     self.logger.logger.debug(f"Found {len(elements)} post elements with selector: {selector}")
                     post_elements.extend(elements)
@@ -1663,8 +2574,287 @@ class EnhancedFacebookScraper:
         self.logger.logger.info(f"Total unique post elements found: {len(unique_post_elements)}")
         return unique_post_elements
 
+    def _shard_config(self, shard_id: int) -> ScrapingConfig:
+        """Конфигурация шарда: свой каталог (лог, чекпоинты) и своя копия куки"""
+        shard_dir = Path(self.config.output_dir) / "shards" / f"shard_{shard_id}"
+        shard_dir.mkdir(parents=True, exist_ok=True)
+
+        shard_cookies = shard_dir / "cookies.json"
+        if not shard_cookies.exists() and os.path.exists(self.config.cookies_file):
+            shutil.copyfile(self.config.cookies_file, shard_cookies)
+
+        return replace(
+            self.config,
+            cookies_file=str(shard_cookies),
+            output_dir=str(shard_dir),
+            shard_processes=0,
+            snapshot_parsing=False,
+            # Посты шардов пишет родитель
+            stream_results=False,
+            sqlite_path=None,
+            seen_index_dir=None,
+            incremental=False,
+            # /metrics отдает родитель; файл метрик шарда - в его каталоге
+            metrics_port=0
+        )
+
+    def _load_sharded_checkpoints(self) -> List[PostInfo]:
+        """Слияние чекпоинтов родителя и всех шардов (без дубликатов по URL)"""
+        checkpoints = [self.checkpoint_manager.load_latest_checkpoint()]
+        for shard_id in range(self.config.shard_processes):
+            shard_manager = CheckpointManager(self._shard_config(shard_id), self.logger)
+            checkpoints.append(shard_manager.load_latest_checkpoint())
+
+        merged = {}
+        for checkpoint in checkpoints:
+            for post_data in (checkpoint or {}).get('processed_posts', []):
+                post = PostInfo.from_dict(post_data)
+                merged.setdefault(post.post_url, post)
+        return list(merged.values())
+
+    def _collect_shard_results(self, result_queue, in_flight: set, timeout: float = 0) -> int:
+        """Прием результатов шардов; возвращает количество завершившихся шардов"""
+        finished = 0
+        while True:
+            try:
+                kind, shard_id, post_url, payload = result_queue.get(timeout=timeout) if timeout else result_queue.get_nowait()
+            except Empty:
+                return finished
+
+            if kind == 'done':
+                finished += 1
+                self.logger.logger.info(f"Shard {shard_id} finished")
+                continue
+
+            in_flight.discard(post_url)
+            if kind == 'error':
+                self.performance_monitor.record_error('extract_post')
+                self.logger.logger.warning(f"Shard {shard_id} failed on {post_url}: {payload}")
+                continue
+
+            post = PostInfo.from_dict(payload)
+            if post.post_url not in self.seen:
+                self._append_post(post)
+                self.performance_monitor.record_post_processed(len(post.comments))
+                if len(self.scraped_posts) % self.config.batch_size == 0:
+                    self.checkpoint_manager.save_checkpoint(self.scraped_posts, 0)
+
+    def scrape_sharded(self) -> List[PostInfo]:
+        """Скрапинг несколькими процессами: родитель собирает URL постов из ленты,
+        шарды (каждый со своим драйвером и куки) обрабатывают их из общей очереди"""
+        self.performance_monitor.start_monitoring()
+        shard_count = self.config.shard_processes
+        context = multiprocessing.get_context('spawn')
+        url_queue = context.Queue()
+        result_queue = context.Queue()
+        processes = []
+
+        try:
+            self.scraped_posts = self._load_sharded_checkpoints()
+            self.seen.update(post.post_url for post in self.scraped_posts)
+            if self.scraped_posts:
+                self.logger.logger.info(f"Resuming from shard checkpoints with {len(self.scraped_posts)} posts")
+
+            self._initialize_driver()
+            if not self._load_cookies() or not self._navigate_to_group():
+                self.logger.logger.critical("Initial setup (cookies or navigation) failed. Aborting.")
+                return self.scraped_posts
+
+            for shard_id in range(shard_count):
+                process = context.Process(
+                    target=run_shard_worker,
+                    args=(self._shard_config(shard_id), shard_id, url_queue, result_queue),
+                    name=f"Shard-{shard_id}"
+                )
+                process.start()
+                processes.append(process)
+            self.logger.logger.info(f"Started {shard_count} shard processes")
+
+            # Отправленные шардам в этом запуске; уже собранные - в self.seen
+            queued = set()
+            in_flight = set()
+            finished = 0
+            scroll_attempts = 0
+            idle_scrolls = 0
+
+            while (len(self.scraped_posts) + len(in_flight) < self.config.max_posts
+                   and scroll_attempts < self.config.max_scroll_attempts):
+                new_urls = 0
+                post_elements = self._next_post_elements()
+                post_urls = self.post_processor.get_post_urls(post_elements)
+                post_times = (self.post_processor.get_post_times(post_elements) if self.incremental
+                              else [None] * len(post_elements))
+                self._defer_unresolved(post_elements, post_urls)
+                # В родителе от поста нужен только URL - прореживать можно сразу
+                self._release_posts([element for element, post_url in zip(post_elements, post_urls) if post_url])
+                for post_url, post_time in zip(post_urls, post_times):
+                    if not post_url or post_url in queued:
+                        continue
+                    if self.incremental and self.incremental.observe(post_url, post_time, seen_key=post_url):
+                        continue
+                    if post_url in self.seen:
+                        continue
+                    if len(self.scraped_posts) + len(in_flight) >= self.config.max_posts:
+                        break
+                    url_queue.put(post_url)
+                    queued.add(post_url)
+                    in_flight.add(post_url)
+                    new_urls += 1
+
+                finished += self._collect_shard_results(result_queue, in_flight)
+                self.logger.logger.info(
+                    f"Scraped {len(self.scraped_posts)} posts so far. In flight: {len(in_flight)}"
+                )
+
+                if self._reached_known_posts():
+                    break
+
+                # Если 5 прокруток подряд не дали новых URL - лента закончилась
+                idle_scrolls = idle_scrolls + 1 if new_urls == 0 else 0
+                if idle_scrolls > 5:
+                    self.logger.logger.warning("No new posts found after several scrolls. Exiting loop.")
+                    break
+
+                self._scroll_down(1)
+                scroll_attempts += 1
+
+            self.logger.logger.info("Feed collection finished. Waiting for shards...")
+            for _ in processes:
+                url_queue.put(None)
+
+            while finished < len(processes):
+                finished += self._collect_shard_results(result_queue, in_flight, timeout=1.0)
+                if not any(process.is_alive() for process in processes):
+                    finished += self._collect_shard_results(result_queue, in_flight)
+                    break
+
+            if self.incremental:
+                self.incremental.commit()
+            self._save_cookies()
+            self.logger.logger.info(f"Sharded scraping completed: {len(self.scraped_posts)} posts")
+
+        except Exception as e:
+            self.logger.log_error_with_context(e, {'method': 'scrape_sharded'})
+        finally:
+            for process in processes:
+                process.join(timeout=30)
+                if process.is_alive():
+                    process.terminate()
+            self._cleanup()
+            self.logger.logger.info("Scraping process finished. Performance report:")
+            self.logger.logger.info(json.dumps(self.performance_monitor.get_performance_report(), indent=2))
+
+        return self.scraped_posts[:self.config.max_posts]
+
+    def process_shard(self, shard_id: int, url_queue, result_queue):
+        """Рабочий цикл шарда: URL поста из очереди -> PostInfo в очередь результатов"""
+        try:
+            self._initialize_driver()
+            self._load_cookies()
+
+            while True:
+                post_url = url_queue.get()
+                if post_url is None:
+                    break
+
+                start_time = time.time()
+                # Снимок после прошлого поста - он же "до" этого: один обход дерева на пост
+                tree_before = self.process_monitor.last
+                try:
+                    with self.metrics.stage('navigate'):
+                        self.driver.get(post_url)
+                        if self.rate_controller.check_page(self.driver.current_url, selenium_page_text(self.driver)):
+                            raise ValueError("throttling page instead of post")
+                        post_element = WebDriverWait(self.driver, self.config.page_load_timeout).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="article"]'))
+                        )
+                    self.rate_controller.record_success(time.time() - start_time)
+                    post = self.post_processor._process_single_post(post_element)
+                    if not post:
+                        raise ValueError("post was not extracted")
+                    post.post_url = post.post_url or post_url
+
+                    self.scraped_posts.append(post)
+                    self.performance_monitor.record_post_processed(len(post.comments))
+                    self.process_monitor.record_post(tree_before, post_url)
+                    result_queue.put(('post', shard_id, post_url, asdict(post)))
+                    collect_selenium_blocked(self.driver, self.routing_stats)
+
+                    if len(self.scraped_posts) % self.config.batch_size == 0:
+                        self.checkpoint_manager.save_checkpoint(self.scraped_posts, 0)
+
+                except Exception as e:
+                    self.logger.log_error_with_context(e, {'method': 'process_shard', 'url': post_url})
+                    result_queue.put(('error', shard_id, post_url, str(e)))
+
+                # Пауза между постами всегда: без adaptive_rate контроллер держит постоянную задержку
+                self.rate_controller.pause()
+
+            self._save_cookies()
+
+        finally:
+            self._cleanup()
+            result_queue.put(('done', shard_id, None, None))
+
+    def _next_post_elements(self) -> List[Any]:
+        """Посты для очередного цикла: новые из очереди страницы и отложенные без URL"""
+        if not self.config.feed_queue:
+            return self._get_post_elements()
+
+        drained = self.feed_queue.drain()
+        if drained is None:
+            return self._get_post_elements()
+
+        deferred = [element for element, _ in self._deferred_posts.values()]
+        self.logger.logger.debug(f"Feed queue: {len(drained)} new, {len(deferred)} deferred")
+        return deferred + drained
+
+    def _defer_unresolved(self, post_elements: List[Any], post_urls: List[Optional[str]]):
+        """Посты без URL (еще не догрузились) повторяются в следующих циклах, не больше 3 раз"""
+        if not self.config.feed_queue:
+            return
+
+        previous = self._deferred_posts
+        self._deferred_posts = {}
+        for element, post_url in zip(post_elements, post_urls):
+            if post_url:
+                continue
+            attempts = previous.get(element.id, (element, 0))[1] + 1
+            if attempts <= 3:
+                self._deferred_posts[element.id] = (element, attempts)
+
+    def _append_post(self, post: PostInfo):
+        """Новый пост: в список результатов и сразу в JSONL / SQLite, если они включены"""
+        self.scraped_posts.append(post)
+        self.seen.add(post.post_url)
+        if self.results_sink or self.store:
+            with self.metrics.stage('write'):
+                record = asdict(post)
+                if self.results_sink:
+                    self.results_sink.write(record)
+                if self.store:
+                    self.store.write(record, group_url=self.config.group_url)
+
+    def _reached_known_posts(self) -> bool:
+        """Инкрементальный режим: подряд incremental_stop_after известных постов - новых дальше нет"""
+        if self.incremental and self.incremental.should_stop:
+            self.logger.logger.info(
+                f"Reached {self.incremental.known_streak} already-known posts in a row. "
+                f"Stopping incremental crawl with {self.incremental.new_posts} new posts."
+            )
+            return True
+        return False
+
+    def _release_posts(self, post_elements: List[Any]):
+        """Прореживание полностью обработанных постов (только с prune_feed и очередью ленты)"""
+        if self.config.prune_feed and self.feed_queue is not None and post_elements:
+            self.pruned_posts += self.feed_queue.release(post_elements, self.config.live_posts_window)
+
     def scrape(self) -> List[PostInfo]:
         """Основной метод скрапинга"""
+        if self.config.shard_processes > 0:
+            return self.scrape_sharded()
+
         self.performance_monitor.start_monitoring()
         self.post_processor.start_async_processing()
         
@@ -1674,7 +2864,8 @@ class EnhancedFacebookScraper:
             # Попытка загрузить последний чекпоинт
             last_checkpoint = self.checkpoint_manager.load_latest_checkpoint()
             if last_checkpoint:
-                self.scraped_posts = [PostInfo(**p) for p in last_checkpoint['processed_posts']]
+                self.scraped_posts = [PostInfo.from_dict(p) for p in last_checkpoint['processed_posts']]
+                self.seen.update(post.post_url for post in self.scraped_posts)
                 self.logger.logger.info(
                     f"Resuming from checkpoint with {len(self.scraped_posts)} "
                     f"posts and scroll position {last_checkpoint['last_scroll_position']}"
@@ -1682,7 +2873,7 @@ class EnhancedFacebookScraper:
                 # Переходим на страницу и прокручиваем до последней позиции
                 self._navigate_to_group()
                 self.driver.execute_script(f"window.scrollTo(0, {last_checkpoint['last_scroll_position']});")
-                time.sleep(self.config.scroll_delay) # Даем время на загрузку
+                self.waiter.for_network_quiet(GRAPHQL_URL_PATTERN, timeout=self.config.scroll_delay) # Даем время на загрузку
             else:
                 if not self._load_cookies() or not self._navigate_to_group():
                     self.logger.logger.critical("Initial setup (cookies or navigation) failed. Aborting.")
@@ -1690,29 +2881,42 @@ class EnhancedFacebookScraper:
                 
             retrieved_posts_count = 0
             scroll_attempts = 0
+            self.recycle_policy.start(len(self.scraped_posts))
 
             while retrieved_posts_count < self.config.max_posts and scroll_attempts < self.config.max_scroll_attempts:
                 start_scrape_cycle_time = time.time()
                 
-                # Получаем все текущие элементы постов
-                post_elements = self._get_post_elements()
+                # Получаем новые элементы постов (с очередью - только появившиеся с прошлого цикла)
+                post_elements = self._next_post_elements()
                 
                 # Отправляем необработанные посты в асинхронный обработчик
-                for element in post_elements:
+                post_urls = self.post_processor.get_post_urls(post_elements)
+                # Время постов нужно только инкрементальному режиму (сравнение с отметкой прошлого запуска)
+                post_times = (self.post_processor.get_post_times(post_elements) if self.incremental
+                              else [None] * len(post_elements))
+                self._defer_unresolved(post_elements, post_urls)
+                finished_elements = []
+                new_elements = []
+                for element, post_url, post_time in zip(post_elements, post_urls, post_times):
+                    # Инкрементальный режим: пост не новее отметки прошлого запуска не обрабатывается
+                    if post_url and self.incremental and self.incremental.observe(post_url, post_time, seen_key=post_url):
+                        finished_elements.append(element)
+                        continue
                     # Проверяем, был ли этот пост уже обработан (по URL, если возможно)
-                    post_url = self.post_processor._get_post_url(element)
-                    if post_url and post_url not in [p.post_url for p in self.scraped_posts]:
-                        self.post_processor.add_post_for_processing(element)
+                    if post_url and post_url not in self.seen:
+                        new_elements.append(element)
+                    elif post_url:
+                        finished_elements.append(element)
+                # Снимки сняты или пачка разобрана одним вызовом - элементы больше не нужны
+                self.post_processor.add_posts_for_processing(new_elements)
+                finished_elements.extend(new_elements)
                         
                 # Получаем обработанные посты из очереди результатов
                 newly_processed_posts = self.post_processor.get_processed_posts()
                 for post in newly_processed_posts:
-                    if post.post_url not in [p.post_url for p in self.scraped_posts]:
-                        self.scraped_posts.append(post)
-                        self.performance_monitor.record_post_processed(
-                            time.time() - start_scrape_cycle_time # Приблизительное время обработки
-                        )
-                        self.performance_monitor.record_comments_extracted(len(post.comments))
+                    if post.post_url not in self.seen:
+                        self._append_post(post)
+                        self.performance_monitor.record_post_processed(len(post.comments))
                         retrieved_posts_count = len(self.scraped_posts)
                         
                         if retrieved_posts_count >= self.config.max_posts:
@@ -1721,11 +2925,20 @@ class EnhancedFacebookScraper:
                             )
                             break
 
+                self._release_posts(finished_elements)
+
+                queue_size = self.post_processor.pending()
+                self.metrics.set_gauge('posts_scraped', retrieved_posts_count)
+                self.metrics.set_gauge('processing_queue', queue_size)
+                self.metrics.set_gauge('rate_delay_seconds', self.rate_controller.delay)
                 self.logger.logger.info(
                     f"Scraped {retrieved_posts_count} posts so far. "
-                    f"Queue size: {self.post_processor.processing_queue.qsize()}"
+                    f"Queue size: {queue_size}"
                 )
                 
+                if self._reached_known_posts():
+                    break
+                
                 # Прокрутка страницы для загрузки новых постов
                 if retrieved_posts_count < self.config.max_posts:
                     self._scroll_down(1) # Прокручиваем по одному разу за цикл
@@ -1738,22 +2951,33 @@ class EnhancedFacebookScraper:
                         self.driver.execute_script("return window.pageYOffset;")
                     )
                 
+                # Перезапуск по числу постов, RSS рендереров (замер монитора ресурсов) или возрасту
+                reason = self.recycle_policy.due(
+                    len(self.scraped_posts), self.process_monitor.last['renderer']['rss_mb']
+                )
+                if reason and retrieved_posts_count < self.config.max_posts:
+                    self._recycle_browser(reason)
+                    retrieved_posts_count = len(self.scraped_posts)
+                
                 # Условие выхода, если новые посты не появляются
                 if len(newly_processed_posts) == 0 and scroll_attempts > 5: # Если 5 прокруток ничего не дали
                     self.logger.logger.warning("No new posts found after several scrolls. Exiting loop.")
                     break
                     
-                time.sleep(self.config.scroll_delay) # Пауза между итерациями скрапинга
+                self._pace_cycle(start_scrape_cycle_time)
 
             self.logger.logger.info("Scraping finished. Waiting for remaining posts to be processed...")
-            self.post_processor.processing_queue.join() # Ждем завершения всех задач в очереди
+            self.post_processor.wait_until_idle() # Ждем завершения всех задач в очереди
 
             # Забираем последние обработанные посты
             final_processed_posts = self.post_processor.get_processed_posts()
             for post in final_processed_posts:
-                if post.post_url not in [p.post_url for p in self.scraped_posts]:
-                    self.scraped_posts.append(post)
+                if post.post_url not in self.seen:
+                    self._append_post(post)
+                    self.performance_monitor.record_post_processed(len(post.comments))
 
+            if self.incremental:
+                self.incremental.commit()
             self._save_cookies() # Сохраняем куки после успешного скрапинга
             self.logger.logger.info("All posts processed and scraping completed.")
             
@@ -1771,6 +2995,16 @@ class EnhancedFacebookScraper:
         """Сохранение результатов скрапинга в JSON файл"""
         output_path = os.path.join(self.config.output_dir, filename)
         
+        if self.results_sink:
+            # Посты уже на диске - массив собирается из JSONL, не из памяти
+            try:
+                self.results_sink.close()
+                compact_jsonl(self.results_sink.parts, output_path)
+                self.logger.logger.info(f"Scraped data compacted from {', '.join(self.results_sink.parts)} to {output_path}")
+            except Exception as e:
+                self.logger.log_error_with_context(e, {'method': 'save_results', 'file': output_path})
+            return
+        
         try:
             # Преобразуем объекты PostInfo в словари для JSON сериализации
             serializable_posts = [asdict(post) for post in posts]
@@ -1783,6 +3017,11 @@ class EnhancedFacebookScraper:
         except Exception as e:
             self.logger.log_error_with_context(e, {'method': 'save_results', 'file': output_path})
 
+def run_shard_worker(config: ScrapingConfig, shard_id: int, url_queue, result_queue):
+    """Точка входа процесса-шарда (должна быть на уровне модуля для spawn)"""
+    scraper = EnhancedFacebookScraper(config)
+    scraper.process_shard(shard_id, url_queue, result_queue)
+
 # Добавим импорт для Path и signal
 from pathlib import Path
 import signal
@@ -1797,7 +3036,8 @@ if __name__ == "__main__":
         scroll_delay=3.0,
         log_level=LogLevel.INFO,
         enable_gpu=False, # Установите True, если у вас есть GPU и хотите его использовать
-        parallel_workers=2,
+        routing_profile="text+image-urls", # Картинки, видео, шрифты и трекеры не загружаются
+        shard_processes=0, # >0 - несколько процессов Chrome, каждый со своей копией куки
         cache_size=500,
         cache_ttl=1800,
         retry_attempts=5,
@@ -0,0 +1,625 @@
+import argparse
+import html
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, quote, urlsplit
+
+# Локальная замена Facebook для проверки скраперов без сети и без аккаунта.
+# Отдает страницу группы с бесконечной прокруткой, страницу поста с подгрузкой
+# комментариев по кнопке "View more comments", модальное окно поста из ленты,
+# мобильные страницы (/m/...: лента со ссылками story.php и permalink-страницы поста),
+# вход по куки и страницу checkpoint при троттлинге. Страницы группы и поста сами
+# запрашивают первую порцию данных через POST /api/graphql/ (как настоящий Facebook),
+# а на повторные запросы с курсором сервер отвечает следующими страницами - этого
+# достаточно для GraphQLCapture и курсорной пагинации. Задержка ответов, размеры
+# страниц ленты и комментариев, обязательный вход и троттлинг настраиваются.
+#
+#     python fb_standin_server.py --port 8765 --posts 200 --comments 30 --latency 0.2
+#     python fb_standin_server.py --require-login --write-cookies standin_cookies.json --throttle-after 50
+#
+# Скраперы направляются на сервер базовым URL: ScrapingConfig.base_url (v2),
+# FacebookScraper(base_url=...) (Scraper20), main(base_url=...) (ScraperMobile4,
+# мобильные страницы - с префиксом /m).
+
+logger = logging.getLogger(__name__)
+
+JSON_GUARD_PREFIX = 'for (;;);'
+FEED_QUERY = 'GroupsCometFeedRegularStoriesPaginationQuery'
+POST_QUERY = 'CometSinglePostContentQuery'
+COMMENTS_QUERY = 'CommentsListComponentsPaginationQuery'
+BASE_TIME = 1700000000
+MOBILE_PREFIX = 'm'
+LOGIN_COOKIES = {'c_user': '100000000000001', 'xs': 'standin-session'}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{navigation}
+{body}
+<script>
+async function graphql(name, docId, variables) {{
+    const body = new URLSearchParams({{
+        fb_api_req_friendly_name: name,
+        doc_id: docId,
+        variables: JSON.stringify(variables)
+    }});
+    const response = await fetch('/api/graphql/', {{method: 'POST', body: body}});
+    return response.text();
+}}
+{behaviour}
+{script}
+</script>
+</body></html>
+"""
+
+# Подгрузка по data-атрибутам: лента (data-more / data-next), комментарии
+# (data-more-comments / data-offset) и модальное окно поста (data-comments)
+BEHAVIOUR_SCRIPT = """
+async function loadFragment(url) {
+    const response = await fetch(url, {credentials: 'same-origin'});
+    const next = response.headers.get('X-Next-Offset');
+    return {html: await response.text(), next: next === null ? -1 : parseInt(next, 10)};
+}
+let feedLoading = false;
+async function loadMorePosts() {
+    const feed = document.querySelector('[data-more]');
+    if (!feed || feedLoading || parseInt(feed.dataset.next, 10) < 0) { return; }
+    feedLoading = true;
+    try {
+        const page = await loadFragment(feed.dataset.more + '?offset=' + feed.dataset.next);
+        feed.insertAdjacentHTML('beforeend', page.html);
+        feed.dataset.next = String(page.next);
+    } finally {
+        feedLoading = false;
+    }
+}
+window.addEventListener('scroll', () => {
+    if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 800) { loadMorePosts(); }
+});
+async function loadMoreComments(button) {
+    if (button.dataset.loading) { return; }
+    button.dataset.loading = '1';
+    const page = await loadFragment(button.dataset.moreComments + '?offset=' + button.dataset.offset);
+    button.insertAdjacentHTML('beforebegin', page.html);
+    delete button.dataset.loading;
+    if (page.next < 0) { button.remove(); } else { button.dataset.offset = String(page.next); }
+}
+function closeDialog() {
+    document.querySelectorAll('[role="dialog"]').forEach((dialog) => dialog.remove());
+}
+async function openDialog(url) {
+    closeDialog();
+    const dialog = document.createElement('div');
+    dialog.setAttribute('role', 'dialog');
+    dialog.setAttribute('aria-modal', 'true');
+    dialog.innerHTML = '<div role="button" aria-label="Закрыть" data-close="1">×</div>';
+    document.body.appendChild(dialog);
+    dialog.insertAdjacentHTML('beforeend', (await loadFragment(url)).html);
+}
+document.addEventListener('click', (event) => {
+    const target = event.target.closest('[data-more-comments], [data-comments], [data-close]');
+    if (!target) { return; }
+    event.preventDefault();
+    if (target.dataset.moreComments) { loadMoreComments(target); }
+    else if (target.dataset.comments) { openDialog(target.dataset.comments); }
+    else { closeDialog(); }
+});
+document.addEventListener('keydown', (event) => { if (event.key === 'Escape') { closeDialog(); } });
+"""
+
+
+class StandinData:
+    """Детерминированные посты и комментарии одной группы"""
+
+    def __init__(self, group_id: str = "standin", posts: int = 200, comments_per_post: int = 30):
+        self.group_id = group_id
+        self.posts = posts
+        self.comments_per_post = comments_per_post
+
+    def post_url(self, base_url: str, index: int) -> str:
+        return f"{base_url}/groups/{self.group_id}/posts/{index}/"
+
+    def story(self, base_url: str, index: int) -> Dict[str, Any]:
+        return {
+            '__typename': 'Story',
+            'id': f"S:{index}",
+            'post_id': str(index),
+            'url': self.post_url(base_url, index),
+            'actors': [{'__typename': 'User', 'id': f"U:{index % 17}", 'name': f"Автор {index % 17}"}],
+            'message': {'text': f"Тестовый пост номер {index} из локальной группы"},
+            'creation_time': BASE_TIME - index * 3600,
+            'feedback': {
+                '__typename': 'Feedback',
+                'id': f"F:{index}",
+                'reaction_count': {'count': index % 50},
+                'comment_count': {'total_count': self.comments_per_post},
+                'share_count': {'count': index % 7}
+            }
+        }
+
+    def comment(self, post_index: int, index: int) -> Dict[str, Any]:
+        return {
+            '__typename': 'Comment',
+            'id': f"C:{post_index}:{index}",
+            'author': {'__typename': 'User', 'name': f"Комментатор {index % 11}"},
+            'body': {'text': f"Комментарий {index} к посту {post_index}"},
+            'created_time': BASE_TIME - post_index * 3600 + index * 60,
+            'feedback': {'__typename': 'Feedback', 'reactors': {'count': index % 5}}
+        }
+
+
+class StandinOptions:
+    """Поведение сервера: задержка ответов, размеры страниц, обязательный вход и троттлинг.
+
+    throttle_after > 0 - после каждых throttle_after просмотров страниц следующие
+    throttle_pages просмотров перенаправляются на /checkpoint/ (как при блокировке).
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, page_size: int = 3,
+                 comments_page_size: int = 10, require_login: bool = False,
+                 throttle_after: int = 0, throttle_pages: int = 3):
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = max(1, page_size)
+        self.comments_page_size = max(1, comments_page_size)
+        self.require_login = require_login
+        self.throttle_after = throttle_after
+        self.throttle_pages = throttle_pages
+        self.counts: Dict[str, int] = {}
+        self._page_views = 0
+        self._lock = threading.Lock()
+
+    def count(self, kind: str):
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def delay(self):
+        """Задержка перед ответом (latency + равномерная случайная добавка до jitter)"""
+        wait = self.latency + (random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+        if wait > 0:
+            time.sleep(wait)
+
+    def page_view(self) -> bool:
+        """Учесть просмотр страницы; True - вместо нее отдается checkpoint"""
+        if self.throttle_after <= 0:
+            return False
+        with self._lock:
+            position = self._page_views % (self.throttle_after + self.throttle_pages)
+            self._page_views += 1
+        return position >= self.throttle_after
+
+    def report(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+def _offset(cursor: Optional[str]) -> int:
+    try:
+        return int(cursor.split(':', 1)[1]) if cursor else 0
+    except (IndexError, ValueError):
+        return 0
+
+
+def _connection(edges: List[Dict[str, Any]], end: int, total: int) -> Dict[str, Any]:
+    return {
+        'edges': edges,
+        'page_info': {'has_next_page': end < total, 'end_cursor': f"cursor:{end}"}
+    }
+
+
+def _cookies(header: Optional[str]) -> Dict[str, str]:
+    cookies = {}
+    for part in (header or '').split(';'):
+        name, _, value = part.strip().partition('=')
+        if name:
+            cookies[name] = value
+    return cookies
+
+
+def write_cookies_file(path: str, host: str = '127.0.0.1'):
+    """Файл куки входа для сервера (формат подходит и Playwright, и Selenium)"""
+    cookies = [
+        {'name': name, 'value': value, 'domain': host, 'path': '/',
+         'httpOnly': False, 'secure': False, 'sameSite': 'Lax'}
+        for name, value in LOGIN_COOKIES.items()
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cookies, f, ensure_ascii=False, indent=2)
+    logger.info(f"Куки входа записаны в {path}")
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Маршруты: /, /login/, /checkpoint/, /groups/<id>, /groups/<id>/posts/<n>/, /ajax/...,
+    /m/groups/<id>, /m/groups/<id>/permalink/<n>/, /m/story.php, POST /api/graphql/"""
+
+    data: StandinData = StandinData()
+    options: StandinOptions = StandinOptions()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.headers.get('Host', 'localhost')}"
+
+    @property
+    def first_page_size(self) -> int:
+        return self.options.page_size
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send(self, status: int, body: str, content_type: str, headers: Optional[Dict[str, str]] = None):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _html(self, body: str, headers: Optional[Dict[str, str]] = None):
+        self._send(200, body, 'text/html; charset=utf-8', headers)
+
+    def _redirect(self, location: str, cookies: Optional[Dict[str, str]] = None):
+        self.send_response(302)
+        self.send_header('Location', location)
+        for name, value in (cookies or {}).items():
+            self.send_header('Set-Cookie', f"{name}={value}; Path=/; SameSite=Lax")
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _not_found(self):
+        self._send(404, 'Not found', 'text/plain; charset=utf-8')
+
+    def _logged_in(self) -> bool:
+        return not self.options.require_login or _cookies(self.headers.get('Cookie')).get('c_user') == LOGIN_COOKIES['c_user']
+
+    def do_GET(self):
+        self.options.delay()
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+
+        if parts in (['login'], [MOBILE_PREFIX, 'login']):
+            self.options.count('login')
+            self._html(self._login_page(query.get('next', '/')))
+            return
+        if parts in (['checkpoint'], [MOBILE_PREFIX, 'checkpoint']):
+            self.options.count('checkpoint')
+            self._html(self._checkpoint_page())
+            return
+        if not self._logged_in():
+            self._redirect(f"/login/?next={quote(self.path, safe='')}")
+            return
+
+        mobile = bool(parts) and parts[0] == MOBILE_PREFIX
+        if mobile:
+            parts = parts[1:]
+        if parts and parts[0] == 'ajax':
+            self.options.count('ajax')
+            self._ajax(parts[1:], query, mobile)
+            return
+
+        if self.options.page_view():
+            self._redirect(f"/checkpoint/?next={quote(self.path, safe='')}")
+            return
+        self.options.count('mobile_page' if mobile else 'page')
+        if mobile:
+            self._mobile_route(parts, query)
+        else:
+            self._desktop_route(parts)
+
+    def _desktop_route(self, parts: List[str]):
+        if not parts:
+            self._html(self._group_page(title="Facebook"))
+        elif len(parts) == 2 and parts[0] == 'groups' and parts[1] == self.data.group_id:
+            self._html(self._group_page())
+        elif (len(parts) == 4 and parts[0] == 'groups' and parts[1] == self.data.group_id
+              and parts[2] == 'posts' and self._post_index(parts[3]) is not None):
+            self._html(self._post_page(int(parts[3])))
+        else:
+            self._not_found()
+
+    def _mobile_route(self, parts: List[str], query: Dict[str, str]):
+        if not parts or (len(parts) == 2 and parts[0] == 'groups' and parts[1] == self.data.group_id):
+            self._html(self._mobile_feed_page())
+        elif parts == ['story.php'] and self._post_index(query.get('story_fbid', '')) is not None:
+            self._redirect(f"/{MOBILE_PREFIX}/groups/{self.data.group_id}/permalink/{query['story_fbid']}/")
+        elif (len(parts) == 4 and parts[0] == 'groups' and parts[1] == self.data.group_id
+              and parts[2] == 'permalink' and self._post_index(parts[3]) is not None):
+            self._html(self._mobile_post_page(int(parts[3])))
+        else:
+            self._not_found()
+
+    def _ajax(self, parts: List[str], query: Dict[str, str], mobile: bool):
+        """Фрагменты HTML для подгрузки; X-Next-Offset - смещение следующей порции (-1 - конец)"""
+        offset = int(query['offset']) if query.get('offset', '').isdigit() else 0
+        if len(parts) == 2 and parts[0] == 'feed' and parts[1] == self.data.group_id:
+            end = min(offset + self.options.page_size, self.data.posts)
+            article = self._mobile_article if mobile else self._article
+            self._html(''.join(article(index) for index in range(offset, end)),
+                       {'X-Next-Offset': str(end if end < self.data.posts else -1)})
+        elif len(parts) == 2 and parts[0] == 'comments' and self._post_index(parts[1]) is not None:
+            end = min(offset + self.options.comments_page_size, self.data.comments_per_post)
+            comment = self._mobile_comment if mobile else self._comment
+            self._html(''.join(comment(int(parts[1]), index) for index in range(offset, end)),
+                       {'X-Next-Offset': str(end if end < self.data.comments_per_post else -1)})
+        elif len(parts) == 2 and parts[0] == 'post' and self._post_index(parts[1]) is not None:
+            self._html(self._article(int(parts[1]), with_comments=True))
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        self.options.delay()
+        length = int(self.headers.get('Content-Length') or 0)
+        raw_form = self.rfile.read(length).decode('utf-8')
+        form = {key: values[0] for key, values in parse_qs(raw_form).items()}
+
+        if urlsplit(self.path).path.rstrip('/') in ('/login', f'/{MOBILE_PREFIX}/login'):
+            if form.get('email') and form.get('pass'):
+                self.options.count('login_success')
+                next_url = form.get('next') or '/'
+                self._redirect(next_url if next_url.startswith('/') else '/', LOGIN_COOKIES)
+            else:
+                self._html(self._login_page(form.get('next', '/')))
+            return
+
+        if not self.path.startswith('/api/graphql'):
+            self._not_found()
+            return
+        if not self._logged_in():
+            self._send(401, JSON_GUARD_PREFIX + json.dumps({'error': 'not logged in'}), 'application/json')
+            return
+
+        self.options.count('graphql')
+        name = form.get('fb_api_req_friendly_name', '')
+        try:
+            variables = json.loads(form.get('variables') or '{}')
+        except json.JSONDecodeError:
+            self._send(400, 'Bad variables', 'text/plain; charset=utf-8')
+            return
+
+        if name == FEED_QUERY:
+            payload = self._feed(variables)
+        elif name == POST_QUERY:
+            payload = {'data': {'node': self.data.story(self.base_url, int(variables.get('postID', 0)))}}
+        elif name == COMMENTS_QUERY:
+            payload = self._comments(variables)
+        else:
+            self._send(400, f'Unknown query {name}', 'text/plain; charset=utf-8')
+            return
+        self._send(200, JSON_GUARD_PREFIX + json.dumps(payload, ensure_ascii=False), 'application/json')
+
+    def _post_index(self, value: str) -> Optional[int]:
+        if value.isdigit() and int(value) < self.data.posts:
+            return int(value)
+        return None
+
+    def _feed(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        start = _offset(variables.get('cursor'))
+        end = min(start + int(variables.get('count', 3)), self.data.posts)
+        edges = [
+            {'cursor': f"cursor:{index + 1}", 'node': self.data.story(self.base_url, index)}
+            for index in range(start, end)
+        ]
+        return {'data': {'node': {
+            '__typename': 'Group',
+            'id': self.data.group_id,
+            'group_feed': _connection(edges, end, self.data.posts)
+        }}}
+
+    def _comments(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        feedback_id = variables.get('id', 'F:0')
+        post_index = int(feedback_id.split(':')[-1]) if feedback_id.split(':')[-1].isdigit() else 0
+        start = _offset(variables.get('cursor'))
+        end = min(start + int(variables.get('count', 10)), self.data.comments_per_post)
+        edges = [{'node': self.data.comment(post_index, index)} for index in range(start, end)]
+        return {'data': {'node': {
+            '__typename': 'Feedback',
+            'id': feedback_id,
+            'display_comments': _connection(edges, end, self.data.comments_per_post)
+        }}}
+
+    def _comment(self, post_index: int, index: int) -> str:
+        comment = self.data.comment(post_index, index)
+        author = html.escape(comment['author']['name'])
+        return (
+            f'<div role="article" aria-label="Comment by {author}" data-testid="UFI2Comment/root">'
+            f'<a role="link" href="/profile.php?id={100 + index % 11}"><strong>{author}</strong></a>'
+            f'<div dir="auto" data-testid="UFI2CommentBodyText">{html.escape(comment["body"]["text"])}</div>'
+            f'<a role="link" href="{self.data.post_url(self.base_url, post_index)}?comment_id={index}">'
+            f'<abbr data-utime="{comment["created_time"]}"><span title="{index} мин">{index} мин</span></abbr></a>'
+            f'<span aria-label="{comment["feedback"]["reactors"]["count"]} reactions">'
+            f'{comment["feedback"]["reactors"]["count"]}</span></div>'
+        )
+
+    def _comments_block(self, index: int, mobile: bool = False) -> str:
+        """Первая порция комментариев и кнопка подгрузки остальных"""
+        first = min(self.options.comments_page_size, self.data.comments_per_post)
+        comment = self._mobile_comment if mobile else self._comment
+        block = ''.join(comment(index, number) for number in range(first))
+        if first < self.data.comments_per_post:
+            prefix = f'/{MOBILE_PREFIX}' if mobile else ''
+            if mobile:
+                label, sigil = 'Показать больше комментариев', ' data-sigil="m-more-comments"'
+            else:
+                label, sigil = 'View more comments', ''
+            block += (
+                f'<div role="button"{sigil} data-more-comments="{prefix}/ajax/comments/{index}/" '
+                f'data-offset="{first}">{label}</div>'
+            )
+        return block
+
+    def _article(self, index: int, with_comments: bool = False) -> str:
+        story = self.data.story(self.base_url, index)
+        actor = story['actors'][0]
+        feedback = story['feedback']
+        if with_comments:
+            comments = f'<div data-comments-for="{index}">{self._comments_block(index)}</div>'
+        else:
+            comments = (
+                f'<div role="button" data-comments="/ajax/post/{index}/">'
+                f'Комментарии: {feedback["comment_count"]["total_count"]}</div>'
+            )
+        return (
+            f'<div role="article" aria-posinset="{index + 1}">'
+            f'<h3><span class="x193iq5w"><a role="link" href="/profile.php?id={actor["id"][2:]}">'
+            f'{html.escape(actor["name"])}</a></span></h3>'
+            f'<a href="{story["url"]}"><abbr data-utime="{story["creation_time"]}" '
+            f'title="{story["creation_time"]}">{index + 1} ч</abbr></a>'
+            f'<div data-ad-preview="message" data-ad-comet-preview="message">'
+            f'<span>{html.escape(story["message"]["text"])}</span></div>'
+            f'<span aria-label="{feedback["reaction_count"]["count"]} Нравится reactions">'
+            f'{feedback["reaction_count"]["count"]}</span>'
+            f'<span aria-label="{feedback["share_count"]["count"]} shares">{feedback["share_count"]["count"]} shares</span>'
+            f'{comments}</div>'
+        )
+
+    def _mobile_comment(self, post_index: int, index: int) -> str:
+        comment = self.data.comment(post_index, index)
+        return (
+            f'<div data-sigil="comment"><h3><a href="/{MOBILE_PREFIX}/profile.php?id={100 + index % 11}">'
+            f'{html.escape(comment["author"]["name"])}</a></h3>'
+            f'<div data-sigil="comment-body">{html.escape(comment["body"]["text"])}</div></div>'
+        )
+
+    def _mobile_article(self, index: int) -> str:
+        story = self.data.story(self.base_url, index)
+        return (
+            f'<div data-ft=\'{{"top_level_post_id":"{index}"}}\' class="story">'
+            f'<h3><a href="/{MOBILE_PREFIX}/profile.php?id={story["actors"][0]["id"][2:]}">'
+            f'{html.escape(story["actors"][0]["name"])}</a></h3>'
+            f'<div data-sigil="m-story-dom-content"><p>{html.escape(story["message"]["text"])}</p></div>'
+            f'<a href="{self.base_url}/{MOBILE_PREFIX}/story.php?id={self.data.group_id}&amp;story_fbid={index}">'
+            f'Комментарии: {self.data.comments_per_post}</a></div>'
+        )
+
+    def _page(self, title: str, body: str, script: str = '') -> str:
+        navigation = '<div role="navigation" aria-label="Account" data-testid="blue_bar"></div>'
+        return PAGE_TEMPLATE.format(
+            title=html.escape(title), navigation=navigation, body=body,
+            behaviour=BEHAVIOUR_SCRIPT, script=script
+        )
+
+    def _feed_container(self, article, more_url: str) -> str:
+        count = min(self.first_page_size, self.data.posts)
+        following = count if count < self.data.posts else -1
+        return (
+            f'<div role="feed" id="feed" data-more="{more_url}" data-next="{following}">'
+            f'{"".join(article(index) for index in range(count))}</div>'
+        )
+
+    def _group_page(self, title: Optional[str] = None) -> str:
+        script = (
+            f"graphql('{FEED_QUERY}', '1001', "
+            f"{{groupID: '{self.data.group_id}', cursor: null, count: {self.first_page_size}}});"
+        )
+        return self._page(
+            title or f"Группа {self.data.group_id}",
+            self._feed_container(self._article, f"/ajax/feed/{self.data.group_id}/"),
+            script
+        )
+
+    def _post_page(self, index: int) -> str:
+        script = (
+            f"graphql('{POST_QUERY}', '1002', {{postID: '{index}'}}).then(() => "
+            f"graphql('{COMMENTS_QUERY}', '1003', {{id: 'F:{index}', cursor: null, "
+            f"count: {self.options.comments_page_size}}}));"
+        )
+        return self._page(f"Пост {index}", self._article(index, with_comments=True), script)
+
+    def _mobile_feed_page(self) -> str:
+        feed = self._feed_container(self._mobile_article, f"/{MOBILE_PREFIX}/ajax/feed/{self.data.group_id}/")
+        return self._page(f"Группа {self.data.group_id}", f'<div id="screen-root">{feed}</div>')
+
+    def _mobile_post_page(self, index: int) -> str:
+        story = self.data.story(self.base_url, index)
+        body = (
+            '<div id="screen-root"><div><div></div><div></div><div>'
+            f'<div data-ft=\'{{"top_level_post_id":"{index}"}}\'>'
+            f'<h3><a href="/{MOBILE_PREFIX}/profile.php?id={story["actors"][0]["id"][2:]}">'
+            f'{html.escape(story["actors"][0]["name"])}</a></h3>'
+            f'<div data-sigil="m-story-dom-content"><p>{html.escape(story["message"]["text"])}</p></div></div>'
+            f'{self._comments_block(index, mobile=True)}'
+            '</div></div></div>'
+        )
+        return self._page(f"Пост {index}", body)
+
+    def _login_page(self, next_url: str) -> str:
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Вход на Facebook</title></head><body>'
+            '<form method="post" action="/login/">'
+            f'<input type="hidden" name="next" value="{html.escape(next_url)}">'
+            '<input type="text" name="email" data-testid="royal_email">'
+            '<input type="password" name="pass">'
+            '<button type="submit" name="login">Вход</button></form></body></html>'
+        )
+
+    def _checkpoint_page(self) -> str:
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Вы временно заблокированы</title></head><body>'
+            "<div role=\"main\"><h2>You're Temporarily Blocked</h2>"
+            '<p>It looks like you were misusing this feature by going too fast. Try again later.</p></div>'
+            '</body></html>'
+        )
+
+
+def _configured_handler(data: Optional[StandinData], options: Optional[StandinOptions]):
+    return type('ConfiguredStandinHandler', (StandinHandler,), {
+        'data': data or StandinData(),
+        'options': options or StandinOptions()
+    })
+
+
+def start_standin_server(host: str = '127.0.0.1', port: int = 0, data: Optional[StandinData] = None,
+                         options: Optional[StandinOptions] = None) -> ThreadingHTTPServer:
+    """Запуск сервера в фоновом потоке; адрес - server.server_address, остановка - server.shutdown()"""
+    server = ThreadingHTTPServer((host, port), _configured_handler(data, options))
+    thread = threading.Thread(target=server.serve_forever, name="StandinServer", daemon=True)
+    thread.start()
+    logger.info(f"Локальный сервер запущен: http://{host}:{server.server_address[1]}")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Локальная замена Facebook для скраперов")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--group', default='standin')
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--comments', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.0, help="Задержка каждого ответа, секунды")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Случайная добавка к задержке, секунды")
+    parser.add_argument('--page-size', type=int, default=3, help="Постов в порции ленты")
+    parser.add_argument('--comments-page-size', type=int, default=10, help="Комментариев в порции")
+    parser.add_argument('--require-login', action='store_true', help="Без куки c_user - редирект на /login/")
+    parser.add_argument('--write-cookies', help="Записать файл куки входа для скраперов")
+    parser.add_argument('--throttle-after', type=int, default=0, help="Просмотров страниц до checkpoint (0 - без троттлинга)")
+    parser.add_argument('--throttle-pages', type=int, default=3, help="Сколько просмотров подряд отдается checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.write_cookies:
+        write_cookies_file(args.write_cookies, args.host)
+    options = StandinOptions(
+        latency=args.latency, jitter=args.jitter, page_size=args.page_size,
+        comments_page_size=args.comments_page_size, require_login=args.require_login,
+        throttle_after=args.throttle_after, throttle_pages=args.throttle_pages
+    )
+    server = ThreadingHTTPServer((args.host, args.port), _configured_handler(
+        StandinData(args.group, args.posts, args.comments), options
+    ))
+    base = f"http://{args.host}:{args.port}"
+    print(f"Группа: {base}/groups/{args.group}")
+    print(f"Мобильная группа: {base}/{MOBILE_PREFIX}/groups/{args.group}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Запросы: {json.dumps(options.report(), ensure_ascii=False)}")
@@ -0,0 +1,168 @@
+import logging
+from typing import Any, List, Optional
+
+# Очередь новых постов ленты на стороне страницы.
+# MutationObserver складывает в window.__scraperQueue каждый вставленный пост верхнего
+# уровня (вложенные role="article" - комментарии - пропускаются), drain забирает из
+# очереди только еще не выданные элементы. Стоимость цикла не зависит от глубины ленты:
+# страница больше не сканируется целиком после каждой прокрутки.
+#
+# Прореживание (release): полностью обработанные посты, ушедшие выше окна просмотра,
+# опустошаются на месте и получают фиксированную высоту - прокрутка не сдвигается,
+# картинки и видео освобождаются, а в живых остается не больше keep_live постов.
+# Узел не заменяется другим, чтобы не ломать ссылки, которые держит код самой страницы.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POST_SELECTOR = 'div[role="article"]'
+
+# Установка наблюдателя (идемпотентна: после перехода на другую страницу ставится заново)
+# и выдача до limit элементов из очереди
+DRAIN_FN = r"""
+function (selector, limit) {
+    if (!window.__scraperQueue) {
+        var queue = window.__scraperQueue = [];
+        var seen = new WeakSet();
+        var isTopLevel = function (el) {
+            return !(el.parentElement && el.parentElement.closest(selector));
+        };
+        var enqueue = function (el) {
+            if (!seen.has(el) && isTopLevel(el)) {
+                seen.add(el);
+                queue.push(el);
+            }
+        };
+        var scan = function (node) {
+            if (node.nodeType !== 1) { return; }
+            if (node.matches(selector)) { enqueue(node); }
+            node.querySelectorAll(selector).forEach(enqueue);
+        };
+        scan(document.body);
+        new MutationObserver(function (mutations) {
+            mutations.forEach(function (mutation) {
+                mutation.addedNodes.forEach(scan);
+            });
+        }).observe(document.body, {childList: true, subtree: true});
+    }
+    var q = window.__scraperQueue;
+    // Отсоединенные от документа элементы (виртуализация ленты) не выдаются
+    var batch = q.splice(0, limit > 0 ? limit : q.length);
+    return batch.filter(function (el) { return el.isConnected; });
+}
+"""
+
+PENDING_JS = "return window.__scraperQueue ? window.__scraperQueue.length : 0;"
+
+# Отметка обработанных постов и прореживание старых; возвращает [прорежено, живых, всего прорежено]
+RELEASE_FN = r"""
+function (elements, keepLive, margin) {
+    var done = window.__scraperDone || [];
+    elements.forEach(function (el) { if (el && el.isConnected) { done.push(el); } });
+    var excess = done.length - keepLive;
+    var kept = [];
+    var pruned = 0;
+    done.forEach(function (el) {
+        if (!el.isConnected) { return; }
+        var rect = excess > 0 ? el.getBoundingClientRect() : null;
+        if (rect && rect.bottom < -margin) {
+            el.replaceChildren();
+            el.style.height = rect.height + 'px';
+            el.style.contain = 'strict';
+            el.setAttribute('data-scraper-pruned', '1');
+            pruned++;
+            excess--;
+        } else {
+            kept.push(el);
+        }
+    });
+    window.__scraperDone = kept;
+    window.__scraperPruned = (window.__scraperPruned || 0) + pruned;
+    return [pruned, kept.length, window.__scraperPruned];
+}
+"""
+
+
+class SeleniumFeedQueue:
+    """Очередь новых постов для Selenium-драйвера"""
+
+    def __init__(self, driver, selector: str = DEFAULT_POST_SELECTOR):
+        self.driver = driver
+        self.selector = selector
+        self.drained = 0
+
+    def drain(self, limit: int = 0) -> Optional[List[Any]]:
+        """Новые посты с прошлого вызова (None - очередь недоступна, нужен полный поиск)"""
+        try:
+            elements = self.driver.execute_script(
+                f"return ({DRAIN_FN})(arguments[0], arguments[1]);", self.selector, limit
+            )
+        except Exception as e:
+            logger.debug(f"Feed queue drain failed: {e}")
+            return None
+        self.drained += len(elements)
+        return elements
+
+    def pending(self) -> int:
+        """Сколько постов ждет в очереди"""
+        return self.driver.execute_script(PENDING_JS)
+
+    def release(self, elements: List[Any], keep_live: int = 30, margin: int = 1000) -> int:
+        """Отметить посты обработанными и проредить старые выше окна просмотра; возвращает число прореженных"""
+        try:
+            pruned, live, total = self.driver.execute_script(
+                f"return ({RELEASE_FN})(arguments[0], arguments[1], arguments[2]);", elements, keep_live, margin
+            )
+        except Exception as e:
+            logger.debug(f"Feed pruning failed: {e}")
+            return 0
+        if pruned:
+            logger.debug(f"Feed pruning: {pruned} pruned, {live} live, {total} total")
+        return pruned
+
+
+class PlaywrightFeedQueue:
+    """Очередь новых постов для страниц Playwright"""
+
+    def __init__(self, selector: str = DEFAULT_POST_SELECTOR):
+        self.selector = selector
+        self.drained = 0
+
+    async def drain(self, page, limit: int = 0) -> Optional[List[Any]]:
+        """Новые посты с прошлого вызова в виде ElementHandle (None - очередь недоступна)"""
+        try:
+            batch = await page.evaluate_handle(
+                f"(args) => ({DRAIN_FN})(args.selector, args.limit)",
+                {'selector': self.selector, 'limit': limit}
+            )
+            properties = await batch.get_properties()
+            await batch.dispose()
+        except Exception as e:
+            logger.debug(f"Feed queue drain failed: {e}")
+            return None
+
+        elements = [
+            handle.as_element()
+            for key, handle in sorted(properties.items(), key=lambda item: int(item[0]) if item[0].isdigit() else -1)
+            if key.isdigit() and handle.as_element()
+        ]
+        self.drained += len(elements)
+        return elements
+
+    async def pending(self, page) -> int:
+        """Сколько постов ждет в очереди"""
+        return await page.evaluate(f"() => {{ {PENDING_JS} }}")
+
+    async def release(self, page, elements: List[Any], keep_live: int = 30, margin: int = 1000) -> int:
+        """Отметить посты обработанными и проредить старые выше окна просмотра; возвращает число прореженных"""
+        try:
+            # ElementHandle передаются в evaluate как аргументы и приходят в страницу узлами
+            pruned, live, total = await page.evaluate(
+                f"(args) => ({RELEASE_FN})(args.elements, args.keepLive, args.margin)",
+                {'elements': elements, 'keepLive': keep_live, 'margin': margin}
+            )
+        except Exception as e:
+            logger.debug(f"Feed pruning failed: {e}")
+            return 0
+        if pruned:
+            logger.debug(f"Feed pruning: {pruned} pruned, {live} live, {total} total")
+        return pruned
@@ -0,0 +1,345 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs
+
+# Перехват ответов /api/graphql/ вместо разбора DOM.
+# Лента и ветки комментариев приходят JSON-ответами; посты (узлы Story) и комментарии
+# (узлы Comment) извлекаются из уже загруженных данных, с точным временем создания и
+# счетчиками. Слой разбора (GraphQLCapture.feed) не зависит от браузера, поэтому его
+# можно проверять на сохраненных ответах: python graphql_capture.py ответ1.json ...
+# Первый увиденный запрос ленты/комментариев запоминается как шаблон; дальше страницы
+# запрашиваются по курсору напрямую через context.request, без прокрутки и рендеринга.
+
+logger = logging.getLogger(__name__)
+
+GRAPHQL_URL_MARKER = '/api/graphql'
+JSON_GUARD_PREFIX = 'for (;;);'
+NODE_BOUNDARY_TYPES = ('Story', 'Comment')
+
+
+def iter_payloads(body: str) -> Iterator[Any]:
+    """JSON-объекты ответа: Facebook отдает несколько объектов по одному на строку"""
+    if body.startswith(JSON_GUARD_PREFIX):
+        body = body[len(JSON_GUARD_PREFIX):]
+    for line in body.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            logger.debug(f"Пропущена строка ответа, не являющаяся JSON: {line[:80]}")
+
+
+def _find(node: Any, key: str) -> Any:
+    """Первое значение ключа в глубину, не заходя во вложенные Story/Comment"""
+    stack = [node]
+    first = True
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if not first and current.get('__typename') in NODE_BOUNDARY_TYPES:
+                continue
+            first = False
+            if current.get(key) is not None:
+                return current[key]
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+    return None
+
+
+def _count(value: Any) -> int:
+    """Счетчик из числа, словаря {count: ...} или строки вида '1,2 тыс.' / '3K'"""
+    if isinstance(value, dict):
+        value = value.get('count', value.get('total_count', value.get('count_reduced')))
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not isinstance(value, str):
+        return 0
+
+    match = re.search(r'(\d+(?:[.,]\d+)?)\s*(K|M|тыс|млн)?', value, re.IGNORECASE)
+    if not match:
+        return 0
+    number = float(match.group(1).replace(',', '.'))
+    multiplier = {'k': 1000, 'тыс': 1000, 'm': 1000000, 'млн': 1000000}.get((match.group(2) or '').lower(), 1)
+    return int(number * multiplier)
+
+
+def _timestamp(value: Any) -> str:
+    """Unix-время из ответа в ISO-строку"""
+    if isinstance(value, (int, float)) and value > 0:
+        return datetime.fromtimestamp(value).isoformat()
+    return ''
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, dict):
+        return value.get('text') or ''
+    return value if isinstance(value, str) else ''
+
+
+def _story(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Поля поста из узла Story"""
+    actors = _find(node, 'actors') or []
+    feedback = _find(node, 'feedback') or {}
+    comet_feedback = _find(node, 'comet_ufi_summary_and_actions_renderer') or {}
+    summary = _find(comet_feedback, 'feedback') or feedback
+
+    reactions = {}
+    for edge in (_find(summary, 'top_reactions') or {}).get('edges', []):
+        name = _find(edge, 'localized_name')
+        if name:
+            reactions[name] = _count(edge.get('reaction_count'))
+
+    return {
+        'id': node.get('post_id') or node['id'],
+        'node_id': node['id'],
+        'feedback_id': feedback.get('id') if isinstance(feedback, dict) else None,
+        'url': node.get('url') or node.get('permalink_url') or _find(node, 'permalink_url') or '',
+        'author': actors[0].get('name', '') if actors and isinstance(actors[0], dict) else '',
+        'text': _text(_find(node, 'message')),
+        'timestamp': _timestamp(_find(node, 'creation_time')),
+        'likes': _count(_find(summary, 'reaction_count')),
+        'comments_count': _count(_find(summary, 'total_comment_count') or _find(summary, 'comment_count')),
+        'shares': _count(_find(summary, 'share_count')),
+        'reactions': reactions
+    }
+
+
+def _comment(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Поля комментария из узла Comment"""
+    author = node.get('author') or {}
+    feedback = node.get('feedback') or {}
+    return {
+        'id': node['id'],
+        'author': author.get('name', '') if isinstance(author, dict) else '',
+        'text': _text(node.get('body')) or _text(_find(node, 'body')),
+        'timestamp': _timestamp(node.get('created_time') or _find(node, 'created_time')),
+        'likes': _count(_find(feedback, 'reactors') or _find(feedback, 'reaction_count')),
+        'depth': node.get('depth') or 0
+    }
+
+
+class GraphQLCapture:
+    """Сбор постов и комментариев из ответов GraphQL (живой страницы или сохраненных файлов)"""
+
+    def __init__(self, save_dir: Optional[str] = None):
+        # save_dir - куда складывать сырые ответы, чтобы потом разбирать их как фикстуры
+        self.save_dir = save_dir
+        self.posts: Dict[str, Dict[str, Any]] = {}
+        self.comments: Dict[str, Dict[str, Any]] = {}
+        # Индексы комментариев по story_id и feedback_id и номер поступления каждого
+        self._comments_by_story: Dict[str, List[str]] = {}
+        self._comments_by_feedback: Dict[str, List[str]] = {}
+        self._arrival: Dict[str, int] = {}
+        self.responses = 0
+        # Шаблоны запросов с курсором: имя запроса -> url, форма, переменные, page_info
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        self.last_page_info: Optional[Dict[str, Any]] = None
+        self._pending = set()
+        self._pages = []
+
+    # --- Живая страница ---
+
+    def attach(self, page):
+        """Подписка на ответы страницы (до перехода на пост)"""
+        page.on("response", self._on_response)
+        self._pages.append(page)
+
+    def detach(self):
+        """Отписка от всех страниц"""
+        for page in self._pages:
+            page.remove_listener("response", self._on_response)
+        self._pages.clear()
+
+    def _on_response(self, response):
+        if GRAPHQL_URL_MARKER not in response.url:
+            return
+        task = asyncio.ensure_future(self._read_response(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read_response(self, response):
+        try:
+            body = await response.text()
+        except Exception as e:
+            # Тело недоступно (редирект, страница уже закрыта)
+            logger.debug(f"Не удалось прочитать ответ GraphQL {response.url}: {e}")
+            return
+        self.last_page_info = None
+        self.feed(body)
+        self._record_template(response.request)
+
+    def _record_template(self, request):
+        """Запоминает запрос с курсором в переменных, чтобы повторять его со следующими курсорами"""
+        form = {key: values[0] for key, values in parse_qs(request.post_data or '').items()}
+        try:
+            variables = json.loads(form.get('variables') or '{}')
+        except json.JSONDecodeError:
+            return
+        if not isinstance(variables, dict) or 'cursor' not in variables:
+            return
+
+        name = form.get('fb_api_req_friendly_name') or request.headers.get('x-fb-friendly-name') or form.get('doc_id', '')
+        self.templates[name] = {
+            'url': request.url,
+            'form': form,
+            'variables': variables,
+            'page_info': self.last_page_info or {}
+        }
+        logger.debug(f"Шаблон пагинации: {name}")
+
+    def template(self, kind: str) -> Optional[Dict[str, Any]]:
+        """Последний шаблон, имя которого содержит kind ('Feed', 'Comment')"""
+        matches = [template for name, template in self.templates.items() if kind.lower() in name.lower()]
+        return matches[-1] if matches else None
+
+    async def paginate(self, request_context, kind: str, page_size: int = 50, max_pages: int = 100,
+                       max_items: Optional[int] = None) -> int:
+        """Догрузка страниц по курсору через APIRequestContext (куки общие с контекстом браузера).
+        Возвращает количество загруженных страниц (0 - шаблона нет или страниц больше нет)"""
+        template = self.template(kind)
+        if not template:
+            return 0
+
+        page_info = template['page_info']
+        items = self.posts if kind.lower() == 'feed' else self.comments
+        pages = 0
+        while pages < max_pages and page_info.get('has_next_page') and page_info.get('end_cursor'):
+            if max_items is not None and len(items) >= max_items:
+                break
+
+            variables = dict(template['variables'], cursor=page_info['end_cursor'])
+            for size_key in ('count', 'first'):
+                if size_key in variables:
+                    variables[size_key] = page_size
+            form = dict(template['form'], variables=json.dumps(variables))
+
+            response = await request_context.post(template['url'], form=form)
+            if not response.ok:
+                logger.warning(f"Пагинация {kind} остановлена: HTTP {response.status}")
+                break
+
+            self.last_page_info = None
+            self.feed(await response.text())
+            page_info = self.last_page_info or {}
+            template['page_info'] = page_info
+            pages += 1
+
+        logger.info(f"Пагинация {kind}: загружено страниц {pages}, всего узлов {len(items)}")
+        return pages
+
+    async def settle(self):
+        """Дождаться разбора всех уже полученных ответов"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    # --- Разбор ---
+
+    def feed(self, body: str) -> int:
+        """Разбор одного тела ответа; возвращает количество найденных постов и комментариев"""
+        self.responses += 1
+        if self.save_dir:
+            os.makedirs(self.save_dir, exist_ok=True)
+            path = os.path.join(self.save_dir, f"graphql_{self.responses:04d}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(body)
+
+        before = len(self.posts) + len(self.comments)
+        for payload in iter_payloads(body):
+            self._walk(payload, None, None, None)
+            page_info = _find(payload, 'page_info')
+            if isinstance(page_info, dict):
+                self.last_page_info = page_info
+        found = len(self.posts) + len(self.comments) - before
+        if found:
+            logger.debug(f"Ответ GraphQL #{self.responses}: новых узлов {found}")
+        return found
+
+    def feed_file(self, path: str) -> int:
+        """Разбор сохраненного ответа"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return self.feed(f.read())
+
+    def _walk(self, node: Any, story_id: Optional[str], feedback_id: Optional[str], parent_id: Optional[str]):
+        if isinstance(node, list):
+            for item in node:
+                self._walk(item, story_id, feedback_id, parent_id)
+            return
+        if not isinstance(node, dict):
+            return
+
+        typename = node.get('__typename')
+        if typename == 'Story' and node.get('id'):
+            story = _story(node)
+            # Частичные узлы из пагинации дополняют уже известный пост
+            known = self.posts.setdefault(story['id'], story)
+            if known is not story:
+                known.update({key: value for key, value in story.items() if value})
+            story_id, feedback_id, parent_id = story['id'], story['feedback_id'] or feedback_id, None
+        elif typename == 'Comment' and node.get('id'):
+            comment = _comment(node)
+            if comment['text']:
+                comment.update({'story_id': story_id, 'feedback_id': feedback_id, 'parent_id': parent_id})
+                if comment['id'] not in self.comments:
+                    self._arrival[comment['id']] = len(self.comments)
+                    self.comments[comment['id']] = comment
+                    if story_id:
+                        self._comments_by_story.setdefault(story_id, []).append(comment['id'])
+                    if feedback_id:
+                        self._comments_by_feedback.setdefault(feedback_id, []).append(comment['id'])
+            parent_id = comment['id']
+        elif typename == 'Feedback' and node.get('id') and not parent_id:
+            feedback_id = node['id']
+
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                self._walk(value, story_id, feedback_id, parent_id)
+
+    # --- Результаты ---
+
+    def comment_tree(self, post: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Комментарии поста с вложенными ответами (в порядке поступления)"""
+        own_ids = set(self._comments_by_story.get(post['id'], []))
+        if post.get('feedback_id'):
+            own_ids.update(self._comments_by_feedback.get(post['feedback_id'], []))
+        own = [self.comments[comment_id] for comment_id in sorted(own_ids, key=self._arrival.__getitem__)]
+        by_parent: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        ids = {comment['id'] for comment in own}
+        for comment in own:
+            parent = comment['parent_id'] if comment['parent_id'] in ids else None
+            by_parent.setdefault(parent, []).append(comment)
+
+        def build(parent_id):
+            return [{**comment, 'replies': build(comment['id'])} for comment in by_parent.get(parent_id, [])]
+
+        return build(None)
+
+    def get_posts(self) -> List[Dict[str, Any]]:
+        """Все посты с деревьями комментариев"""
+        return [{**post, 'comments': self.comment_tree(post)} for post in self.posts.values()]
+
+    def post_for_url(self, post_url: str) -> Optional[Dict[str, Any]]:
+        """Пост, соответствующий URL страницы поста (None - среди перехваченных его нет, нужен DOM)"""
+        clean_url = post_url.split('?')[0].rstrip('/')
+        for post in self.posts.values():
+            if post['url'] and post['url'].split('?')[0].rstrip('/') == clean_url:
+                return {**post, 'comments': self.comment_tree(post)}
+            if post['id'] and re.search(rf'/(?:posts|permalink)/{re.escape(str(post["id"]))}\b', clean_url):
+                return {**post, 'comments': self.comment_tree(post)}
+        return None
+
+
+if __name__ == "__main__":
+    # Разбор сохраненных ответов: python graphql_capture.py graphql_0001.json ...
+    capture = GraphQLCapture()
+    for fixture in sys.argv[1:]:
+        capture.feed_file(fixture)
+    print(json.dumps(capture.get_posts(), ensure_ascii=False, indent=2))
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from seen_index import SeenIndex
+
+# Инкрементальный обход группы для регулярных запусков.
+# Для каждой группы хранится отметка самого нового поста (ID и время) прошлого запуска.
+# Лента открывается в хронологическом порядке, и прокрутка останавливается, как только
+# подряд встретилось stop_after уже известных постов: старше отметки или в SeenIndex.
+
+logger = logging.getLogger(__name__)
+
+CHRONOLOGICAL_PARAM = ('sorting_setting', 'CHRONOLOGICAL')
+_POST_ID_PATTERNS = (
+    re.compile(r'/(?:posts|permalink)/(\d+)'),
+    re.compile(r'[?&](?:story_fbid|fbid|multi_permalinks)=(\d+)'),
+)
+
+
+def chronological_url(group_url: str) -> str:
+    """URL группы с сортировкой ленты "Новые публикации" """
+    parts = urlsplit(group_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != CHRONOLOGICAL_PARAM[0]]
+    query.append(CHRONOLOGICAL_PARAM)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
+def post_id_from_url(post_url: Optional[str]) -> Optional[int]:
+    """Числовой ID поста из постоянной ссылки (растет со временем публикации)"""
+    if not post_url:
+        return None
+    for pattern in _POST_ID_PATTERNS:
+        match = pattern.search(post_url)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def parse_post_time(value: Any) -> Optional[float]:
+    """Время поста в секундах эпохи: число (data-utime) или ISO-строка; иначе None"""
+    if value in (None, '', 'N/A'):
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+class IncrementalTracker:
+    """Отметка группы (самый новый пост) и счетчик подряд идущих известных постов"""
+
+    def __init__(self, group_url: str, state_dir: str, stop_after: int = 5, seen: Optional[SeenIndex] = None):
+        self.group_url = group_url
+        self.stop_after = stop_after
+        self.seen = seen
+        os.makedirs(state_dir, exist_ok=True)
+        name = hashlib.sha1(group_url.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(state_dir, f"hwm_{name}.json")
+
+        self.mark = self._load()
+        self.newest_id: Optional[int] = self.mark.get('newest_id')
+        self.newest_time: Optional[float] = self.mark.get('newest_time')
+        self.known_streak = 0
+        self.new_posts = 0
+        # Посты, уже учтенные в этом запуске (при полном поиске по странице они встречаются снова)
+        self._observed: Dict[str, bool] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                mark = json.load(f)
+            logger.info(f"High-water mark for {self.group_url}: id={mark.get('newest_id')}, time={mark.get('newest_time')}")
+            return mark
+        except (OSError, ValueError) as e:
+            logger.warning(f"High-water mark {self.path} unreadable, doing a full crawl: {e}")
+            return {}
+
+    @property
+    def has_mark(self) -> bool:
+        return bool(self.mark)
+
+    def is_known(self, post_url: Optional[str] = None, posted_time: Any = None, seen_key: Optional[str] = None) -> bool:
+        """Пост не новее отметки прошлого запуска или уже в индексе виденных"""
+        post_id = post_id_from_url(post_url)
+        if post_id is not None and self.mark.get('newest_id') is not None:
+            return post_id <= self.mark['newest_id']
+        timestamp = parse_post_time(posted_time)
+        if timestamp is not None and self.mark.get('newest_time') is not None:
+            return timestamp <= self.mark['newest_time']
+        key = seen_key or post_url
+        return bool(self.seen is not None and key is not None and key in self.seen)
+
+    def observe(self, post_url: Optional[str] = None, posted_time: Any = None, seen_key: Optional[str] = None) -> bool:
+        """Учесть пост из ленты; True - пост известный"""
+        key = post_url or seen_key
+        if key is not None and key in self._observed:
+            return self._observed[key]
+        known = self.is_known(post_url, posted_time, seen_key)
+        if key is not None:
+            self._observed[key] = known
+        if known:
+            self.known_streak += 1
+        else:
+            self.known_streak = 0
+            self.new_posts += 1
+            post_id = post_id_from_url(post_url)
+            timestamp = parse_post_time(posted_time)
+            if post_id is not None and (self.newest_id is None or post_id > self.newest_id):
+                self.newest_id = post_id
+            if timestamp is not None and (self.newest_time is None or timestamp > self.newest_time):
+                self.newest_time = timestamp
+        return known
+
+    @property
+    def should_stop(self) -> bool:
+        """Подряд stop_after известных постов - дальше в хронологической ленте только старые"""
+        return self.known_streak >= self.stop_after
+
+    def commit(self):
+        """Сохранить новую отметку (вызывать после того, как новые посты записаны)"""
+        if self.newest_id is None and self.newest_time is None:
+            return
+        mark = {
+            'group_url': self.group_url,
+            'newest_id': self.newest_id,
+            'newest_time': self.newest_time,
+            'updated': datetime.utcnow().isoformat()
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(mark, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self.mark = mark
+        logger.info(f"High-water mark saved for {self.group_url}: {self.new_posts} new posts this run")
@@ -0,0 +1,361 @@
+import logging
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Метрики этапов скрапинга в текстовом формате OpenMetrics.
+# Счетчики, датчики (gauge) и гистограммы с фиксированными корзинами; у каждого ряда
+# метки group и backend (и stage у времени этапов). Время этапов - гистограмма
+# scraper_stage_seconds по этапам STAGES, из корзин считаются p50/p95/p99 (как
+# histogram_quantile в Prometheus). Экспорт - файл (перезаписывается раз в
+# export_interval секунд и при закрытии) и/или локальный HTTP /metrics.
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('navigate', 'scroll', 'expand_comments', 'extract_post', 'extract_comment', 'write')
+# Корзины времени этапов, секунды: от одного обращения к драйверу до загрузки страницы
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+LabelValues = Tuple[str, ...]
+_GROUP_ID_RE = re.compile(r'/groups/([^/?#]+)')
+
+
+def group_label(group_url: Optional[str]) -> str:
+    """Короткая метка группы: ID из /groups/<id>, иначе URL как есть"""
+    if not group_url:
+        return ''
+    match = _GROUP_ID_RE.search(group_url)
+    return match.group(1) if match else group_url
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Family:
+    """Семейство рядов одной метрики (ряд - набор значений меток)"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {_escape(self.documentation)}"]
+
+
+class Counter(_Family):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_number(value)}"
+                for key, value in sorted(self.values.items())
+            ]
+
+
+class Gauge(_Family):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+                for key, value in sorted(self.values.items())
+            ]
+
+
+class Histogram(_Family):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # ряд -> [счетчики по корзинам (не накопительные), сумма, количество]
+        self.series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self.series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Оценка квантиля по корзинам (линейно внутри корзины); None - наблюдений нет"""
+        with self._lock:
+            series = self.series.get(self._key(labels))
+            if not series or not series[2]:
+                return None
+            counts, total = list(series[0]), series[2]
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                if upper == math.inf:
+                    # Выше последней конечной границы оценки нет - берем ее
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-2]
+
+    def summary(self, **labels) -> Dict[str, Any]:
+        with self._lock:
+            series = self.series.get(self._key(labels))
+            count, total = (series[2], series[1]) if series else (0, 0.0)
+        return {
+            'count': count,
+            'sum_sec': round(total, 3),
+            'p50_sec': self._rounded(self.quantile(0.5, **labels)),
+            'p95_sec': self._rounded(self.quantile(0.95, **labels)),
+            'p99_sec': self._rounded(self.quantile(0.99, **labels))
+        }
+
+    @staticmethod
+    def _rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 4) if value is not None else None
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((key, (list(series[0]), series[1], series[2])) for key, series in self.series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                # Границы корзин - в канонической записи float (1.0, +Inf)
+                labels = _format_labels(self.labelnames, key, ('le', '+Inf' if bound == math.inf else repr(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Набор семейств метрик и их вывод в OpenMetrics"""
+
+    def __init__(self):
+        self.families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family: _Family) -> _Family:
+        with self._lock:
+            existing = self.families.get(family.name)
+            if existing is not None:
+                if existing.kind != family.kind:
+                    raise ValueError(f"Metric {family.name} already registered as {existing.kind}")
+                return existing
+            self.families[family.name] = family
+            return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            families = list(self.families.values())
+        lines = []
+        for family in families:
+            lines.extend(family.header())
+            lines.extend(family.samples())
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Атомарная запись текущих значений в файл"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+        """HTTP /metrics в фоновом потоке; адрес - server.server_address"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                payload = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+        logger.info(f"Metrics endpoint: http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+class ScrapeMetrics:
+    """Метрики одного скрапера: время этапов, посты, комментарии, ошибки, датчики.
+
+    backend - метка скрапера (selenium / playwright / selenium-mobile), group - метка
+    группы (меняется через set_group). path - файл OpenMetrics, port - HTTP /metrics
+    (0 - без сервера). Этапы вкладываются: extract_post включает extract_comment и
+    expand_comments своего поста.
+    """
+
+    def __init__(self, backend: str, group: str = '', path: Optional[str] = None, port: int = 0,
+                 host: str = '127.0.0.1', export_interval: float = 15.0,
+                 registry: Optional[MetricsRegistry] = None):
+        self.backend = backend
+        self.group = group_label(group)
+        self.path = path
+        self.registry = registry or MetricsRegistry()
+        labels = ('group', 'backend')
+        self.stage_seconds = self.registry.histogram(
+            'scraper_stage_seconds', "Wall time per pipeline stage", labels + ('stage',)
+        )
+        self.posts = self.registry.counter('scraper_posts', "Posts extracted", labels)
+        self.comments = self.registry.counter('scraper_comments', "Comments extracted", labels)
+        self.errors = self.registry.counter('scraper_errors', "Failed stage executions", labels + ('stage',))
+        self.gauges = self.registry.gauge('scraper_state', "Current scraper state values", labels + ('name',))
+        self.server = self.registry.serve(host, port) if port else None
+        self._stop = threading.Event()
+        self._exporter = None
+        if path and export_interval > 0:
+            self._exporter = threading.Thread(
+                target=self._export_loop, args=(export_interval,), name="MetricsExporter", daemon=True
+            )
+            self._exporter.start()
+
+    def set_group(self, group_url: Optional[str]):
+        self.group = group_label(group_url)
+
+    def _labels(self) -> Dict[str, str]:
+        return {'group': self.group, 'backend': self.backend}
+
+    def observe(self, stage: str, seconds: float):
+        self.stage_seconds.observe(seconds, stage=stage, **self._labels())
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Замер этапа; исключение учитывается в scraper_errors и пробрасывается дальше"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.errors.inc(stage=stage, **self._labels())
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def record_post(self, comments: int = 0):
+        self.posts.inc(**self._labels())
+        self.record_comments(comments)
+
+    def record_comments(self, count: int):
+        if count:
+            self.comments.inc(count, **self._labels())
+
+    def record_error(self, stage: str):
+        self.errors.inc(stage=stage, **self._labels())
+
+    def set_gauge(self, name: str, value: float):
+        self.gauges.set(value, name=name, **self._labels())
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """count / sum / p50 / p95 / p99 по этапам с наблюдениями (для логов)"""
+        report = {}
+        for stage in STAGES:
+            summary = self.stage_seconds.summary(stage=stage, **self._labels())
+            if summary['count']:
+                report[stage] = summary
+        return report
+
+    def export(self):
+        if not self.path:
+            return
+        try:
+            self.registry.write(self.path)
+        except OSError as e:
+            logger.warning(f"Metrics file {self.path} not written: {e}")
+
+    def _export_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            self.export()
+
+    def close(self):
+        """Последний экспорт в файл и остановка экспорта и HTTP-сервера"""
+        self._stop.set()
+        self.export()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
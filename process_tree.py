@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Учет ресурсов дерева процессов скрапера: сам Python и все его потомки.
+# psutil.virtual_memory() показывает память всей системы, а основной расход - не куча
+# Python, а процессы Chrome, запущенные uc.Chrome / chromium.launch. Здесь каждый
+# процесс дерева относится к роли (ROLES) по имени и ключу --type= командной строки,
+# и по ролям суммируются RSS, CPU% и открытые файловые дескрипторы. Хранятся пики
+# (high-water marks) и приращения на пост: снимок до поста и после - разница по ролям.
+# С несколькими постами одновременно (вкладки, потоки) приращения приблизительные.
+# Без psutil монитор работает вхолостую: снимки пустые, скраперы запускаются как раньше.
+
+logger = logging.getLogger(__name__)
+
+# utility - прочие процессы Chrome (сетевой сервис, хранилище, zygote, crashpad)
+ROLES = ('python', 'driver', 'browser', 'renderer', 'gpu', 'utility')
+FIELDS = ('processes', 'rss_mb', 'cpu_percent', 'fds')
+_MB = 1024 * 1024
+
+
+def classify(process: 'psutil.Process', root_pid: int) -> str:
+    """Роль процесса: python / driver / browser / renderer / gpu / utility"""
+    if process.pid == root_pid:
+        return 'python'
+    name = process.name().lower()
+    if 'chromedriver' in name:
+        return 'driver'
+    if 'python' in name:
+        # Процессы multiprocessing (пулы разбора снимков, шарды)
+        return 'python'
+    cmdline = process.cmdline()
+    if name.startswith('node') and any('playwright' in arg for arg in cmdline):
+        # Драйвер Playwright - node с cli.js run-driver
+        return 'driver'
+    process_type = next((arg.split('=', 1)[1] for arg in cmdline if arg.startswith('--type=')), None)
+    if process_type is None:
+        return 'browser'
+    if process_type == 'renderer':
+        return 'renderer'
+    if process_type == 'gpu-process':
+        return 'gpu'
+    return 'utility'
+
+
+def _empty_sample() -> Dict[str, Dict[str, float]]:
+    return {role: {field: 0 for field in FIELDS} for role in ROLES + ('total',)}
+
+
+class ProcessTreeMonitor:
+    """Снимки ресурсов дерева процессов по ролям, пики и приращения на пост.
+
+    metrics (ScrapeMetrics) - текущие значения по ролям дублируются в датчики
+    (<роль>_rss_mb, <роль>_cpu_percent, <роль>_fds).
+    """
+
+    def __init__(self, root_pid: Optional[int] = None, metrics=None, keep_posts: int = 1000):
+        self.root_pid = root_pid or os.getpid()
+        self.metrics = metrics
+        self._root = psutil.Process(self.root_pid) if psutil is not None else None
+        if self._root is None:
+            logger.warning("psutil is not installed, process tree accounting is disabled")
+        # pid -> (Process, роль): тот же объект нужен cpu_percent для замера между снимками
+        self._processes: Dict[int, Any] = {}
+        self.peaks = _empty_sample()
+        self.last: Dict[str, Dict[str, float]] = _empty_sample()
+        self.posts = 0
+        self._delta_sums = _empty_sample()
+        self.recent_posts: Deque[Dict[str, Any]] = deque(maxlen=keep_posts)
+        self._lock = threading.Lock()
+
+    def _tree(self):
+        try:
+            children = self._root.children(recursive=True)
+        except psutil.Error:
+            children = []
+        alive = {self.root_pid}
+        for process in [self._root] + children:
+            alive.add(process.pid)
+            if process.pid not in self._processes:
+                try:
+                    self._processes[process.pid] = (process, classify(process, self.root_pid))
+                except psutil.Error:
+                    continue
+            yield self._processes[process.pid]
+        # Завершившиеся процессы больше не отслеживаются
+        for pid in [pid for pid in self._processes if pid not in alive]:
+            del self._processes[pid]
+
+    def sample(self) -> Dict[str, Dict[str, float]]:
+        """Текущие RSS (МБ), CPU% и дескрипторы по ролям и в сумме ('total')"""
+        sample = _empty_sample()
+        if self._root is None:
+            return sample
+        with self._lock:
+            for process, role in list(self._tree()):
+                try:
+                    with process.oneshot():
+                        rss = process.memory_info().rss / _MB
+                        cpu = process.cpu_percent(None)
+                        fds = process.num_fds() if hasattr(process, 'num_fds') else process.num_handles()
+                except psutil.Error:
+                    continue
+                for key in (role, 'total'):
+                    sample[key]['processes'] += 1
+                    sample[key]['rss_mb'] += rss
+                    sample[key]['cpu_percent'] += cpu
+                    sample[key]['fds'] += fds
+            for key, values in sample.items():
+                for field in FIELDS:
+                    values[field] = round(values[field], 1)
+                    self.peaks[key][field] = max(self.peaks[key][field], values[field])
+            self.last = sample
+        if self.metrics is not None:
+            for role in ROLES:
+                self.metrics.set_gauge(f"{role}_rss_mb", sample[role]['rss_mb'])
+                self.metrics.set_gauge(f"{role}_cpu_percent", sample[role]['cpu_percent'])
+                self.metrics.set_gauge(f"{role}_fds", sample[role]['fds'])
+        return sample
+
+    @staticmethod
+    def delta(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+        """Разница RSS, числа процессов и дескрипторов по ролям (CPU% - мгновенное значение, не вычитается)"""
+        return {
+            key: {
+                field: round(after[key][field] - before[key][field], 1)
+                for field in ('processes', 'rss_mb', 'fds')
+            }
+            for key in after
+        }
+
+    def record_post(self, before: Dict[str, Dict[str, float]], label: Optional[str] = None,
+                    after: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Dict[str, float]]:
+        """Приращение ресурсов за пост: before - снимок перед постом (можно взять last),
+        after - снимок после (None - снимается здесь; из asyncio - через asyncio.to_thread(sample))"""
+        change = self.delta(before, after if after is not None else self.sample())
+        with self._lock:
+            self.posts += 1
+            for key, values in change.items():
+                for field, value in values.items():
+                    self._delta_sums[key][field] += value
+            self.recent_posts.append({'post': label, 'delta': change})
+        return change
+
+    def report(self) -> Dict[str, Any]:
+        """Последний снимок, пики и среднее/суммарное приращение RSS и дескрипторов на пост"""
+        with self._lock:
+            per_post = {
+                key: {
+                    'avg_rss_mb': round(sums['rss_mb'] / self.posts, 2),
+                    'total_rss_mb': round(sums['rss_mb'], 1),
+                    'avg_fds': round(sums['fds'] / self.posts, 2)
+                }
+                for key, sums in self._delta_sums.items()
+            } if self.posts else {}
+            return {
+                'current': {key: dict(values) for key, values in self.last.items()},
+                'peak': {key: dict(values) for key, values in self.peaks.items()},
+                'posts': self.posts,
+                'per_post': per_post
+            }
+
+    def largest_role(self) -> str:
+        """Роль с наибольшим RSS в последнем снимке"""
+        return max(ROLES, key=lambda role: self.last[role]['rss_mb'])
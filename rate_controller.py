@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+# Адаптивный темп запросов (AIMD) вместо фиксированных пресетов задержек.
+# Пока ответы здоровые, темп (действий в секунду) растет на постоянный шаг;
+# при признаках троттлинга - страница checkpoint / "временно заблокированы",
+# пустые загрузки ленты подряд, рост задержки ответов - делится пополам
+# (страница блокировки сразу сбрасывает темп до минимума).
+# Один контроллер на скрапер: v2, Scraper20 и ScraperMobile4 используют один модуль.
+
+logger = logging.getLogger(__name__)
+
+# Признаки страниц блокировки (URL и текст/заголовок, без учета регистра)
+THROTTLE_URL_MARKERS = ('/checkpoint', '/login/device-based', 'temporarily_blocked')
+THROTTLE_TEXT_MARKERS = (
+    'temporarily blocked',
+    "you're temporarily blocked",
+    'you can\'t use this feature right now',
+    'try again later',
+    'временно заблокирован',
+    'временно заблокировали',
+    'повторите попытку позже',
+    'вы не можете использовать эту функцию',
+)
+
+
+def detect_throttle(url: str = '', text: str = '') -> str:
+    """Причина троттлинга по URL и тексту страницы ('' - признаков нет)"""
+    url = (url or '').lower()
+    if any(marker in url for marker in THROTTLE_URL_MARKERS):
+        return 'checkpoint'
+    text = (text or '').lower()
+    if any(marker in text for marker in THROTTLE_TEXT_MARKERS):
+        return 'blocked'
+    return ''
+
+
+# Уведомления "временно заблокированы" / "слишком быстро" - в теле страницы, а не в заголовке:
+# проверяется заголовок и начало видимого текста (ограничено, чтобы не тянуть всю ленту)
+PAGE_TEXT_LIMIT = 5000
+PAGE_TEXT_JS = "(limit) => document.title + '\\n' + (document.body ? document.body.innerText.slice(0, limit) : '')"
+
+
+def selenium_page_text(driver, limit: int = PAGE_TEXT_LIMIT) -> str:
+    """Заголовок и начало текста страницы Selenium ('' - если страница недоступна)"""
+    try:
+        return driver.execute_script(f"return ({PAGE_TEXT_JS})(arguments[0]);", limit) or ''
+    except Exception as e:
+        logger.debug(f"Page text unavailable: {e}")
+        return ''
+
+
+async def playwright_page_text(page, limit: int = PAGE_TEXT_LIMIT) -> str:
+    """Заголовок и начало текста страницы Playwright ('' - если страница недоступна)"""
+    try:
+        return await page.evaluate(PAGE_TEXT_JS, limit) or ''
+    except Exception as e:
+        logger.debug(f"Page text unavailable: {e}")
+        return ''
+
+
+class RateController:
+    """AIMD-контроллер темпа: delay - текущая пауза между действиями, rate - действий в секунду"""
+
+    def __init__(self, initial_delay: float = 2.0, min_delay: float = 0.5, max_delay: float = 30.0,
+                 adaptive: bool = True, increase_step: float = 0.05, decrease_factor: float = 0.5,
+                 cooldown: float = 10.0, empty_loads_limit: int = 2, latency_factor: float = 2.0):
+        # Границы расширяются, чтобы стартовая задержка (пресет) всегда была допустимой
+        self.min_rate = 1.0 / max(max_delay, initial_delay)
+        self.max_rate = 1.0 / max(min(min_delay, initial_delay), 0.01)
+        self.rate = min(max(1.0 / max(initial_delay, 0.01), self.min_rate), self.max_rate)
+        # Без adaptive темп не меняется, но сигналы все равно считаются (для метрик)
+        self.adaptive = adaptive
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        # После снижения новые сигналы в течение cooldown секунд не снижают темп повторно
+        self.cooldown = cooldown
+        self.empty_loads_limit = empty_loads_limit
+        self.latency_factor = latency_factor
+
+        self.signals = Counter()
+        self.increases = 0
+        self.decreases = 0
+        self._empty_loads = 0
+        self._last_decrease = 0.0
+        # Быстрая и медленная скользящие средние задержки ответа
+        self._latency_fast: Optional[float] = None
+        self._latency_slow: Optional[float] = None
+        self._latency_samples = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_delays(cls, delays: Dict[str, Any], key: str = 'post_delay', **kwargs) -> 'RateController':
+        """Контроллер из словаря задержек InteractiveDialog (пресет - стартовая точка)"""
+        kwargs.setdefault('adaptive', bool(delays.get('adaptive', False)))
+        return cls(initial_delay=max(float(delays.get(key, 2)), 0.01), **kwargs)
+
+    @property
+    def delay(self) -> float:
+        with self._lock:
+            return 1.0 / self.rate
+
+    @property
+    def current_rate(self) -> float:
+        """Текущий темп, действий в секунду (метрика)"""
+        with self._lock:
+            return self.rate
+
+    def _increase(self):
+        if self.adaptive:
+            self.rate = min(self.rate + self.increase_step, self.max_rate)
+            self.increases += 1
+
+    def _decrease(self, reason: str, severe: bool = False):
+        self.signals[reason] += 1
+        now = time.time()
+        if not self.adaptive or (not severe and now - self._last_decrease < self.cooldown):
+            return
+        previous = self.rate
+        self.rate = self.min_rate if severe else max(self.rate * self.decrease_factor, self.min_rate)
+        self._last_decrease = now
+        self.decreases += 1
+        logger.warning(f"Rate backoff on '{reason}': {previous:.2f}/s -> {self.rate:.2f}/s")
+
+    def record_success(self, latency: Optional[float] = None):
+        """Успешная загрузка; latency - время ответа в секундах (если известно)"""
+        with self._lock:
+            self._empty_loads = 0
+            if latency is not None and self._latency_rising(latency):
+                self._decrease('latency')
+            else:
+                self._increase()
+
+    def record_empty(self):
+        """Загрузка ленты без новых постов; несколько подряд - признак троттлинга"""
+        with self._lock:
+            self._empty_loads += 1
+            if self._empty_loads >= self.empty_loads_limit:
+                self._empty_loads = 0
+                self._decrease('empty_load')
+
+    def record_throttle(self, reason: str = 'blocked'):
+        """Страница блокировки: темп сразу минимальный"""
+        with self._lock:
+            self._decrease(reason, severe=True)
+
+    def check_page(self, url: str = '', text: str = '') -> str:
+        """Проверка страницы на признаки блокировки; возвращает причину ('' - все в порядке)"""
+        reason = detect_throttle(url, text)
+        if reason:
+            self.record_throttle(reason)
+        return reason
+
+    def _latency_rising(self, latency: float) -> bool:
+        """Быстрая средняя заметно выше медленной (базовой) - сервер начинает тормозить"""
+        self._latency_samples += 1
+        if self._latency_fast is None:
+            self._latency_fast = self._latency_slow = latency
+            return False
+        self._latency_fast += 0.3 * (latency - self._latency_fast)
+        self._latency_slow += 0.05 * (latency - self._latency_slow)
+        return self._latency_samples >= 5 and self._latency_fast > self._latency_slow * self.latency_factor
+
+    def pause(self):
+        """Пауза текущей длины (синхронные скраперы)"""
+        time.sleep(self.delay)
+
+    async def async_pause(self):
+        """Пауза текущей длины (Playwright)"""
+        await asyncio.sleep(self.delay)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'adaptive': self.adaptive,
+                'rate_per_sec': round(self.rate, 3),
+                'delay_sec': round(1.0 / self.rate, 3),
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'signals': dict(self.signals),
+                'latency_avg_sec': round(self._latency_slow, 3) if self._latency_slow is not None else None
+            }
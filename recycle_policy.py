@@ -0,0 +1,90 @@
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Dict
+
+# Политика перезапуска браузера в длинных прогонах.
+# Одна вкладка и один браузер за сотни постов копят память рендерера (DOM ленты,
+# картинки, утечки кода страницы), и темп падает до OOM. Политика говорит, когда пора
+# перезапуститься: каждые max_posts постов, при RSS рендереров выше max_renderer_mb
+# (из ProcessTreeMonitor) или раз в max_age_minutes минут. Что перезапускается - scope:
+#   page    - новая вкладка в том же браузере (новый процесс рендерера);
+#   context - новый контекст с сессией из storage state (у Selenium - как browser);
+#   browser - весь браузер заново, сессия - из сохраненных куки.
+# Сам перезапуск и возврат к позиции ленты делает скрапер; политика считает причины и простой.
+# Порог RSS срабатывает не раньше min_posts постов или min_minutes минут после перезапуска:
+# свежий рендерер тяжелой страницы может сразу оказаться выше порога. max_consecutive
+# перезапусков подряд без продвижения (меньше min_posts постов) отключают порог RSS.
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ('page', 'context', 'browser')
+
+
+class RecyclePolicy:
+    """Когда перезапускать вкладку / контекст / браузер (нулевые пороги выключены)"""
+
+    def __init__(self, max_posts: int = 0, max_renderer_mb: float = 0.0, max_age_minutes: float = 0.0,
+                 scope: str = 'context', min_posts: int = 10, min_minutes: float = 5.0,
+                 max_consecutive: int = 3, clock: Callable[[], float] = time.monotonic):
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown recycle scope '{scope}', expected one of: {', '.join(SCOPES)}")
+        self.max_posts = max_posts
+        self.max_renderer_mb = max_renderer_mb
+        self.max_age_minutes = max_age_minutes
+        self.scope = scope
+        self.min_posts = min_posts
+        self.min_minutes = min_minutes
+        self.max_consecutive = max_consecutive
+        self._clock = clock
+        self.recycles = Counter()
+        self.downtime = 0.0
+        self.consecutive = 0
+        self.rss_disabled = False
+        self.start()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_posts or self.max_renderer_mb or self.max_age_minutes)
+
+    def start(self, posts: int = 0):
+        """Отсчет с нового запуска: posts - сколько постов собрано к этому моменту"""
+        self.started_at = self._clock()
+        self.posts_at_start = posts
+
+    def due(self, posts: int, renderer_mb: float = 0.0) -> str:
+        """Причина перезапуска ('posts' / 'renderer_rss' / 'age') или пустая строка"""
+        progress = posts - self.posts_at_start
+        age = self._clock() - self.started_at
+        if self.max_posts and progress >= self.max_posts:
+            return 'posts'
+        if (self.max_renderer_mb and not self.rss_disabled and renderer_mb >= self.max_renderer_mb
+                and (progress >= self.min_posts or age >= self.min_minutes * 60)):
+            return 'renderer_rss'
+        if self.max_age_minutes and age >= self.max_age_minutes * 60:
+            return 'age'
+        return ''
+
+    def record(self, reason: str, posts: int, duration: float):
+        """Перезапуск выполнен: счетчик причины, простой и новый отсчет"""
+        progress = posts - self.posts_at_start
+        self.recycles[reason] += 1
+        self.downtime += duration
+        logger.info(f"Recycled {self.scope} ({reason}) after {progress} posts in {duration:.1f}s")
+        self.consecutive = self.consecutive + 1 if progress < self.min_posts else 0
+        if self.max_renderer_mb and not self.rss_disabled and self.consecutive >= self.max_consecutive:
+            self.rss_disabled = True
+            logger.warning(
+                f"{self.consecutive} recycles in a row with under {self.min_posts} posts each; "
+                f"renderer RSS trigger ({self.max_renderer_mb} MB) disabled for this run"
+            )
+        self.start(posts)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'scope': self.scope,
+            'recycles': sum(self.recycles.values()),
+            'by_reason': dict(self.recycles),
+            'downtime_sec': round(self.downtime, 1),
+            'rss_trigger_disabled': self.rss_disabled
+        }
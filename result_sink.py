@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import threading
+import time
+from queue import Empty, Queue
+from typing import Any, Dict, Iterator, List, Optional
+
+# Потоковая запись результатов: каждый пост - одна строка JSON сразу после обработки.
+# Строки копятся пачкой и сбрасываются на диск с fsync (по размеру пачки или по времени),
+# при превышении max_bytes запись продолжается в следующий файл (results.1.jsonl, ...).
+# Падение процесса теряет не больше одной несброшенной пачки, память не растет с
+# длиной прогона. Прежний JSON-массив собирается из частей потоково (compact_jsonl).
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def rotated_parts(path: str) -> List[str]:
+    """path и существующие за ним части ротации (path.1, path.2, ...) по порядку"""
+    stem, ext = os.path.splitext(path)
+    parts = [path]
+    while os.path.exists(f"{stem}.{len(parts)}{ext}"):
+        parts.append(f"{stem}.{len(parts)}{ext}")
+    return parts
+
+
+class JsonlSink:
+    """Запись постов в JSONL; background=True - запись на диск в отдельном потоке"""
+
+    def __init__(self, path: str, batch_size: int = 20, flush_interval: float = 1.0,
+                 max_bytes: int = 256 * 1024 * 1024, fsync: bool = True, background: bool = False,
+                 append: bool = False):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        # append=True - продолжение прошлого прогона (возобновление с чекпоинта): запись идет
+        # в последнюю из уже существующих частей; иначе части прошлого прогона удаляются
+        self._mode = 'a' if append else 'w'
+        existing = rotated_parts(path)
+        if not append:
+            for stale in existing[1:]:
+                os.remove(stale)
+        self.parts: List[str] = existing if append else [path]
+        self.written = 0
+        self.closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.parts[-1], self._mode, encoding='utf-8')
+        self._buffer: List[str] = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+        self._queue: Optional[Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._queue = Queue(maxsize=10000)
+            self._thread = threading.Thread(target=self._writer, name="JsonlSinkWriter", daemon=True)
+            self._thread.start()
+
+    def __enter__(self) -> 'JsonlSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, record: Dict[str, Any]):
+        """Добавить пост; сериализуется сразу, чтобы последующие изменения словаря не попали в файл"""
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        self.written += 1
+        if self._queue is not None:
+            self._queue.put(line)
+            return
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.batch_size or time.time() - self._last_flush >= self.flush_interval:
+                self._flush_buffer()
+
+    def flush(self):
+        """Сбросить накопленное (в фоновом режиме - дождаться, пока поток запишет очередь)"""
+        if self._queue is not None:
+            self._queue.join()
+        with self._lock:
+            self._flush_buffer()
+
+    def close(self):
+        if self.closed:
+            return
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+        with self._lock:
+            self._flush_buffer()
+            self._file.close()
+        self.closed = True
+        logger.info(f"JSONL sink closed: {self.written} records in {len(self.parts)} file(s)")
+
+    def _writer(self):
+        """Фоновый поток: пачки из очереди, сброс по размеру пачки или по таймауту"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except Empty:
+                with self._lock:
+                    self._flush_buffer()
+                continue
+            try:
+                if item is _STOP:
+                    return
+                with self._lock:
+                    self._buffer.append(item)
+                    if len(self._buffer) >= self.batch_size or time.time() - self._last_flush >= self.flush_interval:
+                        self._flush_buffer()
+            finally:
+                self._queue.task_done()
+
+    def _flush_buffer(self):
+        """Запись пачки с fsync и ротация по размеру (вызывается под self._lock)"""
+        self._last_flush = time.time()
+        if not self._buffer:
+            return
+        self._file.write(''.join(self._buffer))
+        self._buffer.clear()
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        stem, ext = os.path.splitext(self.path)
+        next_path = f"{stem}.{len(self.parts)}{ext}"
+        self.parts.append(next_path)
+        self._file = open(next_path, self._mode, encoding='utf-8')
+        logger.info(f"JSONL sink rotated to {next_path}")
+
+
+def iter_jsonl(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """Записи из частей JSONL по порядку; оборванная последняя строка (падение) пропускается"""
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed line {line_number} in {path}")
+
+
+def compact_jsonl(paths: List[str], json_path: str, indent: Optional[int] = 2) -> int:
+    """Потоковая сборка JSON-массива из частей JSONL (в памяти одна запись); возвращает число записей"""
+    directory = os.path.dirname(json_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    tmp_path = json_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for record in iter_jsonl(paths):
+            f.write(',\n' if count else '\n')
+            text = json.dumps(record, ensure_ascii=False, indent=indent)
+            f.write(text if not indent else '\n'.join(' ' * indent + line for line in text.splitlines()))
+            count += 1
+        f.write('\n]\n' if count else ']\n')
+    os.replace(tmp_path, json_path)
+    logger.info(f"Compacted {count} records into {json_path}")
+    return count
@@ -0,0 +1,179 @@
+import json
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Tuple
+
+# Профили маршрутизации запросов: что браузер не загружает на бесконечной ленте.
+# Playwright - через context.route (по типу ресурса и URL), Selenium - через
+# CDP Network.setBlockedURLs (только по шаблонам URL). Адреса картинок при этом
+# остаются в DOM (атрибуты src), поэтому извлечение изображений продолжает работать.
+
+logger = logging.getLogger(__name__)
+
+# Аналитика и служебные маяки (шаблоны с '*' - общий формат для CDP и fnmatch)
+TRACKER_PATTERNS = (
+    '*://*.facebook.com/tr*',
+    '*://*.facebook.com/ajax/bz*',
+    '*://*.facebook.com/ajax/bnzai*',
+    '*://*.facebook.com/ajax/webstorage/*',
+    '*://*.facebook.com/*/logging_client_events*',
+    '*://connect.facebook.net/*',
+    '*://*.google-analytics.com/*',
+    '*://*.googletagmanager.com/*',
+    '*://*.doubleclick.net/*',
+)
+
+# Для Selenium типы ресурсов выражаются шаблонами URL
+RESOURCE_TYPE_PATTERNS = {
+    'image': ('*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.svg*', '*.ico*'),
+    'media': ('*.mp4*', '*.webm*', '*.m4a*', '*.m3u8*', '*.mpd*', '*://video*.fbcdn.net/*'),
+    'font': ('*.woff*', '*.ttf*', '*.otf*', '*.eot*'),
+}
+
+
+@dataclass(frozen=True)
+class RoutingProfile:
+    """Набор блокировок и признак, нужно ли сохранять адреса изображений"""
+    name: str
+    blocked_resource_types: Tuple[str, ...] = ()
+    blocked_url_patterns: Tuple[str, ...] = ()
+    record_image_urls: bool = True
+
+    @property
+    def blocks_anything(self) -> bool:
+        return bool(self.blocked_resource_types or self.blocked_url_patterns)
+
+    def selenium_patterns(self) -> List[str]:
+        """Шаблоны для Network.setBlockedURLs"""
+        patterns = list(self.blocked_url_patterns)
+        for resource_type in self.blocked_resource_types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, ()))
+        return patterns
+
+    def blocked_reason(self, url: str, resource_type: str) -> str:
+        """Почему запрос блокируется ('' - пропустить)"""
+        if resource_type in self.blocked_resource_types:
+            return resource_type
+        if any(fnmatchcase(url, pattern) for pattern in self.blocked_url_patterns):
+            return 'tracker'
+        return ''
+
+
+PROFILES = {
+    'full': RoutingProfile('full'),
+    # Текст и адреса картинок из DOM; сами картинки, видео, шрифты и маяки не грузятся
+    'text+image-urls': RoutingProfile(
+        'text+image-urls',
+        blocked_resource_types=('image', 'media', 'font'),
+        blocked_url_patterns=TRACKER_PATTERNS
+    ),
+    # То же, но изображения не извлекаются вовсе
+    'text-only': RoutingProfile(
+        'text-only',
+        blocked_resource_types=('image', 'media', 'font'),
+        blocked_url_patterns=TRACKER_PATTERNS,
+        record_image_urls=False
+    ),
+}
+
+
+def get_profile(name: str) -> RoutingProfile:
+    """Профиль по имени"""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown routing profile '{name}', expected one of: {', '.join(PROFILES)}")
+
+
+class RoutingStats:
+    """Счетчики заблокированных запросов по причинам"""
+
+    def __init__(self, profile: RoutingProfile):
+        self.profile = profile
+        self.blocked = Counter()
+        self.allowed = 0
+        self._lock = threading.Lock()
+
+    def record(self, reason: str):
+        with self._lock:
+            if reason:
+                self.blocked[reason] += 1
+            else:
+                self.allowed += 1
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self.blocked.values())
+            return {
+                'profile': self.profile.name,
+                'blocked_total': total,
+                'blocked_by_reason': dict(self.blocked),
+                # Для Selenium пропущенные запросы не считаются (видны только блокировки)
+                'allowed': self.allowed
+            }
+
+
+async def apply_playwright_profile(context, profile: RoutingProfile,
+                                   stats: Optional[RoutingStats] = None) -> RoutingStats:
+    """Подключение профиля к BrowserContext (для 'full' маршрутизация не включается).
+    stats - счетчики прошлого контекста, если контекст пересоздан"""
+    stats = stats or RoutingStats(profile)
+    if not profile.blocks_anything:
+        return stats
+
+    async def handle(route):
+        request = route.request
+        reason = profile.blocked_reason(request.url, request.resource_type)
+        stats.record(reason)
+        if reason:
+            await route.abort('blockedbyclient')
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle)
+    logger.info(f"Routing profile '{profile.name}' applied to browser context")
+    return stats
+
+
+def configure_selenium_options(options, profile: RoutingProfile):
+    """Включение журнала производительности, из которого считаются блокировки (до запуска драйвера)"""
+    if profile.blocks_anything:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def apply_selenium_profile(driver, profile: RoutingProfile, stats: Optional[RoutingStats] = None) -> RoutingStats:
+    """Подключение профиля к текущей вкладке Chrome через CDP (новой вкладке - заново, со старыми stats)"""
+    stats = stats or RoutingStats(profile)
+    if not profile.blocks_anything:
+        return stats
+
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': profile.selenium_patterns()})
+    logger.info(f"Routing profile '{profile.name}' applied via CDP")
+    return stats
+
+
+def collect_selenium_blocked(driver, stats: RoutingStats) -> int:
+    """Подсчет блокировок по журналу производительности (журнал при этом очищается).
+    Вызывать периодически, чтобы журнал не разрастался"""
+    if not stats.profile.blocks_anything:
+        return 0
+    try:
+        entries = driver.get_log('performance')
+    except Exception as e:
+        logger.debug(f"Performance log unavailable: {e}")
+        return 0
+
+    blocked = 0
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        if message.get('method') != 'Network.loadingFailed':
+            continue
+        params = message.get('params', {})
+        if params.get('blockedReason') == 'inspector':
+            stats.record(params.get('type', 'Other').lower())
+            blocked += 1
+    return blocked
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import math
+import os
+import struct
+from typing import Iterable, Optional
+
+# Индекс уже виденных постов для дедупликации.
+# В памяти - обычное множество (точная проверка за O(1) вместо поиска по списку),
+# на диске - необязательный фильтр Блума на каждую группу: посты прошлых запусков
+# узнаются без загрузки их самих. У фильтра бывают ложные срабатывания (доля error_rate),
+# поэтому при сохранении на диск небольшая часть новых постов может быть принята за
+# уже виденные; ложных "не видели" не бывает.
+
+logger = logging.getLogger(__name__)
+
+BLOOM_MAGIC = b'FBSEEN01'
+_HEADER = struct.Struct('<8sQIQ')  # magic, число бит, число хешей, число добавленных ключей
+
+
+class BloomFilter:
+    """Фильтр Блума на bytearray (двойное хеширование blake2b)"""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001,
+                 bits: Optional[int] = None, hashes: Optional[int] = None):
+        self.bits = bits or max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = hashes or max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self.array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first, second = struct.unpack('<QQ', digest)
+        second |= 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.bits
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def save(self, path: str):
+        """Атомарная запись (временный файл + замена)"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(BLOOM_MAGIC, self.bits, self.hashes, self.count))
+            f.write(self.array)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        with open(path, 'rb') as f:
+            magic, bits, hashes, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != BLOOM_MAGIC:
+                raise ValueError(f"{path} is not a seen-index file")
+            bloom = cls(bits=bits, hashes=hashes)
+            bloom.array = bytearray(f.read())
+        if len(bloom.array) != (bits + 7) // 8:
+            raise ValueError(f"{path} is truncated")
+        bloom.count = count
+        return bloom
+
+
+class SeenIndex:
+    """Виденные посты группы: множество текущего запуска + фильтр Блума прошлых (если задан state_dir)"""
+
+    def __init__(self, group_key: str = '', state_dir: Optional[str] = None,
+                 capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.group_key = group_key
+        self._seen = set()
+        self.bloom: Optional[BloomFilter] = None
+        self.path: Optional[str] = None
+        self._dirty = False
+
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+            name = hashlib.sha1(group_key.encode('utf-8')).hexdigest()[:16]
+            self.path = os.path.join(state_dir, f"seen_{name}.bloom")
+            if os.path.exists(self.path):
+                try:
+                    self.bloom = BloomFilter.load(self.path)
+                    logger.info(f"Seen index for {group_key}: {self.bloom.count} keys from previous runs")
+                except (OSError, ValueError, struct.error) as e:
+                    logger.warning(f"Seen index {self.path} unreadable, starting empty: {e}")
+            if self.bloom is None:
+                self.bloom = BloomFilter(capacity, error_rate)
+
+    def __contains__(self, key: Optional[str]) -> bool:
+        if key in self._seen:
+            return True
+        return key is not None and self.bloom is not None and key in self.bloom
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, key: Optional[str]) -> bool:
+        """Отметить ключ; True - раньше не встречался"""
+        if key in self:
+            return False
+        self._seen.add(key)
+        if key is not None and self.bloom is not None:
+            self.bloom.add(key)
+            self._dirty = True
+        return True
+
+    def update(self, keys: Iterable[Optional[str]]):
+        for key in keys:
+            self.add(key)
+
+    def save(self):
+        """Сохранить фильтр группы на диск (если он включен и менялся)"""
+        if self.path and self.bloom is not None and self._dirty:
+            self.bloom.save(self.path)
+            self._dirty = False
+            logger.info(f"Seen index saved: {self.path} ({self.bloom.count} keys)")
@@ -0,0 +1,130 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from cssselect import HTMLTranslator, SelectorError, parse
+
+# Проверка и перевод селекторов при запуске, а не в горячем цикле.
+# В списках селекторов встречаются текстовые псевдоселекторы :contains("...") (jQuery)
+# и :has-text("...") (Playwright), которых нет в CSS: Selenium на каждом таком селекторе
+# делал обращение к драйверу (с implicit wait) и получал исключение. Компилятор один раз
+# проверяет каждый селектор для своего бэкенда и переводит текстовые условия:
+#   selenium   - в XPath (contains по тексту элемента без учета регистра);
+#   playwright - в нативный :has-text(...).
+# Непереводимые селекторы убираются из списков и попадают в отчет.
+
+logger = logging.getLogger(__name__)
+
+# Значения selenium.webdriver.common.by.By (модуль не зависит от selenium)
+BY_CSS = 'css selector'
+BY_XPATH = 'xpath'
+
+TEXT_PSEUDO_RE = re.compile(r'^(.*):(?:contains|has-text)\(["\'](.*)["\']\)$')
+
+# Перевод в нижний регистр для XPath 1.0 (латиница и кириллица)
+_UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+_LOWER = _UPPER.lower()
+
+_translator = HTMLTranslator()
+
+
+class SelectorCompileError(ValueError):
+    """Селектор не поддерживается бэкендом"""
+
+
+def split_text_pseudo(selector: str) -> Tuple[str, Optional[str]]:
+    """'span:contains("x")' -> ('span', 'x'); без текстового условия -> (selector, None)"""
+    match = TEXT_PSEUDO_RE.match(selector.strip())
+    if not match:
+        return selector, None
+    return match.group(1).strip() or '*', match.group(2)
+
+
+def text_xpath(base: str, text: str) -> str:
+    """XPath для CSS-основы с условием "текст содержит text" (без учета регистра)"""
+    needle = _translator.xpath_literal(text.lower())
+    predicate = f"[contains(translate(normalize-space(.), '{_UPPER}', '{_LOWER}'), {needle})]"
+    branches = []
+    for parsed in parse(base):
+        branches.append(_translator.selector_to_xpath(parsed, prefix='descendant::') + predicate)
+    return ' | '.join(branches)
+
+
+def compile_selector(selector: str, backend: str) -> Tuple[str, str]:
+    """Локатор (by, value) для selenium или строка селектора для playwright (by = BY_CSS)"""
+    base, text = split_text_pseudo(selector)
+    try:
+        # Проверка CSS-части: cssselect знает те же конструкции, что и Chromium (включая :has)
+        parse(base)
+        if text is None:
+            return BY_CSS, selector
+        if backend == 'selenium':
+            return BY_XPATH, text_xpath(base, text)
+        if backend == 'playwright':
+            return BY_CSS, f"{base}:has-text({json.dumps(text, ensure_ascii=False)})"
+    except SelectorError as e:
+        raise SelectorCompileError(f"{selector!r}: {e}") from e
+    raise SelectorCompileError(f"{selector!r}: unknown backend {backend!r}")
+
+
+class SelectorCompiler:
+    """Проверенные селекторы бэкенда: списки фильтруются при запуске, локаторы берутся из кэша"""
+
+    def __init__(self, backend: str = 'selenium'):
+        self.backend = backend
+        self.locators: Dict[str, Tuple[str, str]] = {}
+        self.translated: Dict[str, str] = {}
+        self.rejected: Dict[str, str] = {}
+
+    def compile(self, selector: str) -> Optional[Tuple[str, str]]:
+        """Локатор селектора или None, если он не компилируется (причина - в rejected)"""
+        if selector in self.locators:
+            return self.locators[selector]
+        if selector in self.rejected:
+            return None
+        try:
+            locator = compile_selector(selector, self.backend)
+        except SelectorCompileError as e:
+            self.rejected[selector] = str(e)
+            logger.warning(f"Rejected {self.backend} selector {e}")
+            return None
+        if locator != (BY_CSS, selector):
+            self.translated[selector] = locator[1]
+        self.locators[selector] = locator
+        return locator
+
+    def compile_list(self, selectors: List[str]) -> List[str]:
+        """Только компилируемые селекторы, в исходном порядке.
+
+        Для playwright возвращаются переведенные строки (их и передают в query_selector),
+        для selenium - исходные: локатор берется через locator(), а JS-движки понимают
+        текстовые псевдоселекторы сами.
+        """
+        compiled = []
+        for selector in selectors:
+            locator = self.compile(selector)
+            if locator is None:
+                continue
+            compiled.append(locator[1] if self.backend == 'playwright' else selector)
+        return compiled
+
+    def compile_lists(self, owner: Any, names: List[str]):
+        """Заменить списки-атрибуты owner на проверенные"""
+        for name in names:
+            setattr(owner, name, self.compile_list(getattr(owner, name)))
+
+    def locator(self, selector: str) -> Tuple[str, str]:
+        """(by, value) для find_element(s); непроверенный селектор компилируется при первом обращении"""
+        locator = self.compile(selector)
+        if locator is None:
+            raise SelectorCompileError(self.rejected[selector])
+        return locator
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'backend': self.backend,
+            'compiled': len(self.locators),
+            'translated': dict(self.translated),
+            'rejected': dict(self.rejected)
+        }
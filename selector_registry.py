@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+# Общий реестр запасных селекторов с адаптивным порядком.
+# Для каждого селектора в группе (например 'post.content') считаются попадания, промахи
+# и суммарное время проверки. Списки перебираются в порядке наблюдаемой успешности, а не
+# в исходном: рабочий селектор пробуется первым, и промахи мертвых селекторов перед ним
+# не стоят лишних обращений к драйверу. Селекторы без единого попадания за demote_after
+# проверок уходят в конец списка. Статистика сохраняется в JSON между запусками; при
+# загрузке счетчики уменьшаются (decay), чтобы смена разметки Facebook быстро меняла порядок.
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorAttempt:
+    """Перебор селекторов группы: промах записывается при переходе к следующему, попадание - через hit()"""
+
+    def __init__(self, registry: 'SelectorRegistry', group: str, selectors: List[str]):
+        self.registry = registry
+        self.group = group
+        self.selectors = registry.order(group, selectors)
+        self._current: Optional[str] = None
+        self._started = 0.0
+
+    def __iter__(self) -> Iterator[str]:
+        for selector in self.selectors:
+            self._current = selector
+            self._started = time.perf_counter()
+            yield selector
+            if self._current is not None:
+                self.registry.record(self.group, selector, False, time.perf_counter() - self._started)
+        self._current = None
+
+    def hit(self):
+        """Текущий селектор дал результат"""
+        if self._current is not None:
+            self.registry.record(self.group, self._current, True, time.perf_counter() - self._started)
+            self._current = None
+
+
+class SelectorRegistry:
+    """Статистика попаданий селекторов и их порядок; path=None - только в памяти"""
+
+    def __init__(self, path: Optional[str] = None, demote_after: int = 20, decay: float = 0.5):
+        self.path = path
+        self.demote_after = demote_after
+        self.decay = decay
+        # группа -> селектор -> [попадания, промахи, суммарное время в секундах]
+        self.stats: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Selector stats {self.path} unreadable, starting empty: {e}")
+            return
+        for group, selectors in saved.items():
+            self.stats[group] = {
+                selector: [hits * self.decay, misses * self.decay, latency * self.decay]
+                for selector, (hits, misses, latency) in selectors.items()
+            }
+        logger.info(f"Selector stats loaded from {self.path}: {len(self.stats)} groups")
+
+    def attempt(self, group: str, selectors: List[str]) -> SelectorAttempt:
+        return SelectorAttempt(self, group, selectors)
+
+    def record(self, group: str, selector: str, hit: bool, latency: float = 0.0):
+        with self._lock:
+            entry = self.stats.setdefault(group, {}).setdefault(selector, [0, 0, 0.0])
+            entry[0 if hit else 1] += 1
+            entry[2] += latency
+            self._dirty = True
+
+    def record_index(self, group: str, selectors: List[str], index: int, count: int = 1):
+        """Перебор вне Python (JS-движок, разбор снимка): selectors[index] дал значение после промахов
+        всех предыдущих; index < 0 - промах всех. count - сколько одинаковых переборов (пачка)"""
+        if count <= 0:
+            return
+        tried = selectors if index < 0 else selectors[:index + 1]
+        with self._lock:
+            group_stats = self.stats.setdefault(group, {})
+            for position, selector in enumerate(tried):
+                entry = group_stats.setdefault(selector, [0, 0, 0.0])
+                entry[0 if position == index else 1] += count
+            self._dirty = True
+
+    def record_wins(self, group: str, selectors: List[str], wins: List[int]):
+        """Счетчики победителей пачки: wins[i] - сколько раз сработал selectors[i], wins[-1] - ни один"""
+        for index, count in enumerate(wins[:len(selectors)]):
+            self.record_index(group, selectors, index, count)
+        if len(wins) > len(selectors):
+            self.record_index(group, selectors, -1, wins[len(selectors)])
+
+    def _is_demoted(self, entry: Optional[List[float]]) -> bool:
+        return bool(entry) and entry[0] == 0 and entry[1] >= self.demote_after
+
+    def order(self, group: str, selectors: List[str]) -> List[str]:
+        """Селекторы по убыванию доли попаданий (сглаженной), при равенстве - быстрее и раньше в исходном списке"""
+        with self._lock:
+            stats = self.stats.get(group)
+            if not stats:
+                return list(selectors)
+
+            def key(indexed):
+                index, selector = indexed
+                entry = stats.get(selector)
+                if not entry:
+                    # Непроверенные - с нейтральной оценкой, чтобы новые селекторы тоже пробовались
+                    return (False, -0.5, 0.0, index)
+                trials = entry[0] + entry[1]
+                return (
+                    self._is_demoted(entry),
+                    -(entry[0] + 1) / (trials + 2),
+                    entry[2] / trials if trials else 0.0,
+                    index
+                )
+
+            return [selector for _, selector in sorted(enumerate(selectors), key=key)]
+
+    def save(self):
+        """Атомарная запись статистики (если она менялась)"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            data = {
+                group: {selector: [round(value, 6) for value in entry] for selector, entry in selectors.items()}
+                for group, selectors in self.stats.items()
+            }
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Selector stats saved to {self.path}")
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Доля попаданий и среднее время по селекторам (для логов и отчета)"""
+        with self._lock:
+            return {
+                group: {
+                    selector: {
+                        'hits': round(entry[0], 1),
+                        'misses': round(entry[1], 1),
+                        'hit_rate': round(entry[0] / (entry[0] + entry[1]), 3) if entry[0] + entry[1] else 0.0,
+                        'avg_ms': round(1000 * entry[2] / (entry[0] + entry[1]), 2) if entry[0] + entry[1] else 0.0,
+                        'demoted': self._is_demoted(entry)
+                    }
+                    for selector, entry in selectors.items()
+                }
+                for group, selectors in self.stats.items()
+            }
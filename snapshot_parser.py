@@ -0,0 +1,394 @@
+import logging
+import os
+import re
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector, SelectorError
+
+# Разбор снимков outerHTML вне потока браузера.
+# Функции модуля повторяют логику живых экстракторов (v2 и Scraper20) и возвращают
+# такие же "сырые" словари, поэтому каждый скрапер собирает из них свои объекты
+# (PostInfo/CommentInfo или Post/Comment) тем же кодом, что и для данных из браузера.
+# Все функции верхнего уровня и принимают только сериализуемые аргументы,
+# чтобы их можно было выполнять в ProcessPoolExecutor.
+
+logger = logging.getLogger(__name__)
+
+MODAL_ROOT_SELECTOR = '[role="dialog"], div[aria-modal="true"]'
+
+
+@lru_cache(maxsize=2048)
+def _compile(selector: str) -> Optional[CSSSelector]:
+    """Компиляция CSS-селектора в XPath (None - если селектор не поддерживается)"""
+    try:
+        return CSSSelector(selector, translator='html')
+    except SelectorError:
+        return None
+
+
+TEXT_PSEUDO_RE = re.compile(r'^(.*):(?:contains|has-text)\(["\'](.*)["\']\)$')
+
+
+def _select(root, selector: str) -> List[Any]:
+    """Аналог querySelectorAll: только потомки root, без самого root.
+
+    Текстовые псевдоселекторы :contains("...") и :has-text("...") в конце селектора
+    проверяются по тексту элемента без XPath-расширений lxml (они не переживают
+    работу пула процессов).
+    """
+    needle = None
+    text_match = TEXT_PSEUDO_RE.match(selector)
+    if text_match:
+        selector, needle = text_match.group(1) or '*', text_match.group(2).lower()
+
+    compiled = _compile(selector)
+    if compiled is None:
+        return []
+    matches = [el for el in compiled(root) if el is not root]
+    if needle is not None:
+        matches = [el for el in matches if needle in el.text_content().lower()]
+    return matches
+
+
+def _first(root, selector: str):
+    """Аналог querySelector"""
+    matches = _select(root, selector)
+    return matches[0] if matches else None
+
+
+def _text(el) -> str:
+    """Текст элемента (аналог textContent)"""
+    return el.text_content().strip() if el is not None else ''
+
+
+def _lines(root) -> List[str]:
+    """Непустые текстовые фрагменты элемента по порядку"""
+    return [chunk.strip() for chunk in root.itertext() if chunk.strip()]
+
+
+def _parse(html: str, base_url: Optional[str] = None):
+    """Разбор снимка; относительные ссылки делаются абсолютными, как у element.href"""
+    root = lxml_html.fromstring(html)
+    if base_url:
+        root.make_links_absolute(base_url, resolve_base_href=False)
+    return root
+
+
+def _post_url(root, selectors: List[str], hits: Dict[str, int]) -> Optional[str]:
+    hits['url'] = -1
+    for index, selector in enumerate(selectors):
+        link = _first(root, selector)
+        href = link.get('href') if link is not None else None
+        if href and re.search(r'posts|photos|videos', href):
+            hits['url'] = index
+            return href.split('?')[0]
+
+    for link in _select(root, 'a[href*="facebook.com"]'):
+        href = link.get('href')
+        if href and re.search(r'/posts/|/photos/|/videos/', href):
+            return href.split('?')[0]
+    return None
+
+
+def _author(root, selectors: Dict[str, Any], hits: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    hits['author'] = -1
+    for index, selector in enumerate(selectors['author']):
+        el = _first(root, selector)
+        name = _text(el)
+        if not name:
+            continue
+        hits['author'] = index
+
+        avatar = None
+        for avatar_selector in selectors['avatar']:
+            img = _first(root, avatar_selector)
+            src = img.get('src') if img is not None else None
+            if src and 'profile' in src:
+                avatar = src
+                break
+
+        return {
+            'name': name,
+            'profile_url': el.get('href'),
+            'avatar_url': avatar,
+            'is_verified': any(_first(root, s) is not None for s in selectors['verification'])
+        }
+
+    header = _first(root, 'h2')
+    if _text(header):
+        return {'name': _text(header)}
+    return None
+
+
+def _content(root, selectors: List[str], hits: Dict[str, int]) -> Optional[str]:
+    hits['content'] = -1
+    for index, selector in enumerate(selectors):
+        parts = [_text(el) for el in _select(root, selector)]
+        parts = [text for text in parts if len(text) > 10]
+        if parts:
+            hits['content'] = index
+            return ' '.join(parts)
+    return None
+
+
+def _time(root, selectors: List[str], hits: Dict[str, int]) -> Optional[Dict[str, str]]:
+    hits['time'] = -1
+    for index, selector in enumerate(selectors):
+        el = _first(root, selector)
+        if el is None:
+            continue
+        utime = el.get('data-utime')
+        if el.tag == 'abbr' and utime:
+            hits['time'] = index
+            return {'utime': utime}
+        value = el.get('title') or el.get('aria-label') or _text(el)
+        if value:
+            hits['time'] = index
+            return {'value': value}
+    return None
+
+
+def _first_labels(root, selectors: List[str]) -> List[str]:
+    labels = []
+    for selector in selectors:
+        el = _first(root, selector)
+        if el is not None:
+            labels.append(el.get('aria-label') or _text(el))
+    return labels
+
+
+def _comment(root, selectors: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Один комментарий в формате CommentExtractor (v2), с ответами"""
+    author_link = _first(root, selectors['author'])
+    if author_link is None:
+        return None
+
+    text = None
+    for selector in selectors['text']:
+        value = _text(_first(root, selector))
+        if value:
+            text = value
+            break
+    if not text:
+        return None
+
+    time_element = _first(root, selectors['time'])
+    posted_time = None
+    if time_element is not None:
+        posted_time = time_element.get('title') or _text(time_element)
+
+    replies = []
+    for reply_element in _select(root, selectors['reply'])[:5]:
+        reply = _comment(reply_element, selectors)
+        if reply:
+            replies.append(reply)
+
+    return {
+        'author': {'name': _text(author_link), 'profile_url': author_link.get('href')},
+        'text': text,
+        'posted_time': posted_time,
+        'like_labels': _first_labels(root, selectors['likes']),
+        'replies_labels': [_text(el) for el in (_first(root, s) for s in selectors['replies_count']) if el is not None],
+        'is_pinned': any(_first(root, s) is not None for s in selectors['pinned']),
+        'is_edited': any(_first(root, s) is not None for s in selectors['edited']),
+        'reaction_labels': [
+            el.get('aria-label') or _text(el)
+            for s in selectors['reactions'] for el in _select(root, s)
+        ],
+        'replies': replies
+    }
+
+
+def _comment_threads(root, selectors: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Как в CommentExtractor.extract: первый селектор, давший комментарии, побеждает
+    for container_selector in selectors['containers']:
+        comments = [
+            comment for comment in (_comment(el, selectors) for el in _select(root, container_selector))
+            if comment
+        ]
+        if comments:
+            return comments
+    return []
+
+
+def parse_post(html: str, selectors: Dict[str, Any], base_url: Optional[str] = None,
+               comment_selectors: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Пост ленты (v2) в формате InPagePostExtractor; с comment_selectors - вместе с комментариями"""
+    try:
+        root = _parse(html, base_url)
+
+        reaction_label = None
+        for selector in selectors['reactions']:
+            el = _first(root, selector)
+            reaction_label = el.get('aria-label') if el is not None else None
+            if reaction_label:
+                break
+
+        # Номер сработавшего селектора по полям (-1 - ни один), как selector_hits JS-движка
+        hits: Dict[str, int] = {}
+        raw_post = {
+            'post_url': _post_url(root, selectors['url'], hits),
+            'author': _author(root, selectors, hits),
+            'content': _content(root, selectors['content'], hits),
+            'time': _time(root, selectors['time'], hits),
+            'selector_hits': hits,
+            'hrefs': [link.get('href') for link in _select(root, 'a[href]')],
+            'image_srcs': [
+                img.get('src') or img.get('data-src')
+                for selector in selectors['images'] for img in _select(root, selector)
+            ],
+            'like_labels': _first_labels(root, selectors['likes']),
+            'share_labels': _first_labels(root, selectors['shares']),
+            'reaction_label': reaction_label,
+            'flags': {
+                key: _first(root, selector) is not None
+                for key, selector in selectors['type_markers'].items()
+            }
+        }
+        if comment_selectors is not None:
+            raw_post['comments'] = _comment_threads(root, comment_selectors)
+        return raw_post
+
+    except Exception as e:
+        logger.debug(f"Ошибка разбора снимка поста: {e}")
+        return None
+
+
+def _win(wins: Dict[str, List[int]], field: str, index: int):
+    """wins[field][i] - сколько раз сработал i-й селектор поля, последний элемент - ни один"""
+    wins[field][index] += 1
+
+
+def _container_comment(container, selectors: Dict[str, Any], wins: Dict[str, List[int]]) -> Optional[Dict[str, Any]]:
+    """Комментарий в формате пакетного извлечения Scraper20"""
+    container_text = container.text_content()
+    if len(container_text.strip()) < 10:
+        return None
+
+    lines = _lines(container)
+
+    text = ''
+    for index, selector in enumerate(selectors['text']):
+        match = next((el for el in _select(container, selector) if len(_text(el)) > 10), None)
+        if match is not None:
+            text = _text(match)
+            break
+    _win(wins, 'text', index if text else -1)
+    if not text:
+        skip = ['like', 'reply', 'час', 'мин', 'day', 'ago']
+        text = next((line for line in lines
+                     if len(line) > 10 and not line.isdigit()
+                     and not any(word in line.lower() for word in skip)), '')
+    if len(text.strip()) <= 5:
+        return None
+
+    author = ''
+    author_index = -1
+    for index, selector in enumerate(selectors['author']):
+        author = _text(_first(container, selector))
+        if author:
+            author_index = index
+            break
+    _win(wins, 'author', author_index)
+    if not author:
+        author = next((line for line in lines[:3] if len(line) < 100), 'Неизвестный автор')
+
+    timestamp = ''
+    timestamp_index = -1
+    for index, selector in enumerate(selectors['timestamp']):
+        el = _first(container, selector)
+        if el is not None:
+            timestamp = el.get('data-utime') or _text(el)
+            if timestamp:
+                timestamp_index = index
+                break
+    _win(wins, 'timestamp', timestamp_index)
+    if not timestamp:
+        for pattern in selectors['time_patterns']:
+            match = re.search(pattern, container_text, re.IGNORECASE)
+            if match:
+                timestamp = match.group(0)
+                break
+
+    likes = 0
+    likes_index = -1
+    for index, selector in enumerate(selectors['likes']):
+        el = _first(container, selector)
+        match = re.search(r'(\d+)', el.get('aria-label') or '') if el is not None else None
+        if match:
+            likes = int(match.group(1))
+            likes_index = index
+            break
+    _win(wins, 'likes', likes_index)
+
+    return {'author': author, 'text': text.strip(), 'timestamp': timestamp, 'likes': likes}
+
+
+def parse_post_page(html: str, post_selectors: Dict[str, str], comment_selectors: Dict[str, Any],
+                    modal: bool = False) -> Optional[Dict[str, Any]]:
+    """Страница поста (Scraper20): поля поста и комментарии в формате BATCH_COMMENTS_JS"""
+    try:
+        root = _parse(html)
+
+        roots = _select(root, MODAL_ROOT_SELECTOR) if modal else [root]
+        seen = set()
+        containers = []
+        for selector in comment_selectors['containers']:
+            for scope in roots:
+                for el in _select(scope, selector):
+                    if el not in seen:
+                        seen.add(el)
+                        containers.append(el)
+
+        # Счетчики сработавших селекторов полей (формат selector_hits пакетного JS Scraper20)
+        wins = {field: [0] * (len(comment_selectors[field]) + 1) for field in ('author', 'text', 'timestamp', 'likes')}
+        comments = [
+            comment for comment in (_container_comment(el, comment_selectors, wins) for el in containers)
+            if comment
+        ]
+
+        timestamp_element = _first(root, post_selectors['timestamp'])
+        timestamp = ''
+        if timestamp_element is not None:
+            timestamp = timestamp_element.get('data-utime') or _text(timestamp_element)
+
+        author_element = _first(root, post_selectors['author'])
+        return {
+            'author': _text(author_element) if author_element is not None else 'Неизвестный автор',
+            'text': _text(_first(root, post_selectors['content'])),
+            'timestamp': timestamp,
+            'containers': len(containers),
+            'comments': comments,
+            'selector_hits': wins
+        }
+
+    except Exception as e:
+        logger.debug(f"Ошибка разбора снимка страницы поста: {e}")
+        return None
+
+
+class SnapshotParserPool:
+    """Пул процессов для разбора снимков: поток браузера только прокручивает и снимает outerHTML"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        logger.info(f"Запущен пул разбора снимков: {self.max_workers} процессов")
+
+    def submit_post(self, html: str, selectors: Dict[str, Any], base_url: Optional[str] = None,
+                    comment_selectors: Optional[Dict[str, Any]] = None) -> Future:
+        """Разбор поста ленты (v2) в отдельном процессе"""
+        return self.executor.submit(parse_post, html, selectors, base_url, comment_selectors)
+
+    def submit_post_page(self, html: str, post_selectors: Dict[str, str],
+                         comment_selectors: Dict[str, Any], modal: bool = False) -> Future:
+        """Разбор страницы поста (Scraper20) в отдельном процессе"""
+        return self.executor.submit(parse_post_page, html, post_selectors, comment_selectors, modal)
+
+    def shutdown(self, wait: bool = True):
+        """Остановка пула"""
+        self.executor.shutdown(wait=wait)
+        logger.info("Пул разбора снимков остановлен")
@@ -0,0 +1,502 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from queue import Empty, Queue
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+from result_sink import iter_jsonl
+
+# Хранилище результатов в SQLite для всех трех скраперов.
+# Авторы нормализованы (ключ - URL профиля, без него - имя), посты и комментарии
+# (ответы - через parent_id) записываются upsert'ами: повторный обход той же группы
+# обновляет строки, а не плодит дубликаты. Запись идет пачками в транзакциях в режиме
+# WAL из фонового потока, чтение - отдельным соединением параллельно с записью.
+#
+#     python sqlite_store.py import results.db scraped_posts.json facebook_comments_*.json
+#     python sqlite_store.py bench --posts 20000 --comments 10
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    author_key TEXT NOT NULL UNIQUE,
+    profile_url TEXT,
+    name TEXT,
+    avatar_url TEXT,
+    is_verified INTEGER NOT NULL DEFAULT 0,
+    first_seen TEXT,
+    last_seen TEXT
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    post_key TEXT NOT NULL UNIQUE,
+    post_url TEXT,
+    group_url TEXT,
+    author_id INTEGER REFERENCES authors(id),
+    content TEXT,
+    posted_time TEXT,
+    scraped_time TEXT,
+    likes_count INTEGER NOT NULL DEFAULT 0,
+    shares_count INTEGER NOT NULL DEFAULT 0,
+    post_type TEXT,
+    reactions TEXT,
+    images TEXT,
+    external_links TEXT,
+    tags TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_posts_url ON posts(post_url);
+CREATE INDEX IF NOT EXISTS idx_posts_group ON posts(group_url);
+CREATE INDEX IF NOT EXISTS idx_posts_author ON posts(author_id);
+CREATE INDEX IF NOT EXISTS idx_posts_group_time ON posts(group_url, posted_time);
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    comment_key TEXT NOT NULL UNIQUE,
+    post_id INTEGER NOT NULL REFERENCES posts(id),
+    parent_id INTEGER REFERENCES comments(id),
+    author_id INTEGER REFERENCES authors(id),
+    text TEXT,
+    posted_time TEXT,
+    scraped_time TEXT,
+    likes_count INTEGER NOT NULL DEFAULT 0,
+    replies_count INTEGER NOT NULL DEFAULT 0,
+    is_pinned INTEGER NOT NULL DEFAULT 0,
+    is_edited INTEGER NOT NULL DEFAULT 0,
+    reactions TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_comments_post ON comments(post_id);
+CREATE INDEX IF NOT EXISTS idx_comments_parent ON comments(parent_id);
+CREATE INDEX IF NOT EXISTS idx_comments_author ON comments(author_id);
+"""
+
+UPSERT_AUTHOR = """
+INSERT INTO authors (author_key, profile_url, name, avatar_url, is_verified, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(author_key) DO UPDATE SET
+    profile_url = COALESCE(excluded.profile_url, authors.profile_url),
+    name = COALESCE(excluded.name, authors.name),
+    avatar_url = COALESCE(excluded.avatar_url, authors.avatar_url),
+    is_verified = MAX(authors.is_verified, excluded.is_verified),
+    last_seen = excluded.last_seen
+RETURNING id
+"""
+
+UPSERT_POST = """
+INSERT INTO posts (post_key, post_url, group_url, author_id, content, posted_time, scraped_time,
+                   likes_count, shares_count, post_type, reactions, images, external_links, tags)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(post_key) DO UPDATE SET
+    post_url = COALESCE(excluded.post_url, posts.post_url),
+    group_url = COALESCE(excluded.group_url, posts.group_url),
+    author_id = COALESCE(excluded.author_id, posts.author_id),
+    content = COALESCE(excluded.content, posts.content),
+    posted_time = COALESCE(excluded.posted_time, posts.posted_time),
+    scraped_time = excluded.scraped_time,
+    likes_count = excluded.likes_count,
+    shares_count = excluded.shares_count,
+    post_type = COALESCE(excluded.post_type, posts.post_type),
+    reactions = excluded.reactions,
+    images = excluded.images,
+    external_links = excluded.external_links,
+    tags = excluded.tags
+RETURNING id
+"""
+
+UPSERT_COMMENT = """
+INSERT INTO comments (comment_key, post_id, parent_id, author_id, text, posted_time, scraped_time,
+                      likes_count, replies_count, is_pinned, is_edited, reactions)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(comment_key) DO UPDATE SET
+    posted_time = COALESCE(excluded.posted_time, comments.posted_time),
+    scraped_time = excluded.scraped_time,
+    likes_count = excluded.likes_count,
+    replies_count = excluded.replies_count,
+    is_pinned = excluded.is_pinned,
+    is_edited = excluded.is_edited,
+    reactions = excluded.reactions
+RETURNING id
+"""
+
+_STOP = object()
+_MISSING = (None, '', 'N/A')
+
+
+def _clean(value: Any) -> Optional[Any]:
+    return None if value in _MISSING else value
+
+
+def _first(record: Dict[str, Any], *keys: str) -> Optional[Any]:
+    for key in keys:
+        value = _clean(record.get(key))
+        if value is not None:
+            return value
+    return None
+
+
+def _digest(*parts: Optional[str]) -> str:
+    return hashlib.sha1('\x1f'.join(part or '' for part in parts).encode('utf-8')).hexdigest()
+
+
+def profile_key(url: Optional[str]) -> Optional[str]:
+    """URL профиля без трекинговых параметров (для profile.php сохраняется id)"""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    query = ''
+    if parts.path.rstrip('/').endswith('profile.php'):
+        profile_id = parse_qs(parts.query).get('id')
+        query = urlencode({'id': profile_id[0]}) if profile_id else ''
+    return urlunsplit((parts.scheme or 'https', parts.netloc.lower(), parts.path.rstrip('/'), query, ''))
+
+
+def normalize_author(value: Any, url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Автор из строки (Scraper20), словаря AuthorInfo (v2) или имени + URL (ScraperMobile4)"""
+    if isinstance(value, dict):
+        name = _clean(value.get('name'))
+        url = _clean(value.get('profile_url')) or url
+        avatar_url = _clean(value.get('avatar_url'))
+        is_verified = bool(value.get('is_verified'))
+    else:
+        name = _clean(value)
+        avatar_url = None
+        is_verified = False
+    url = profile_key(_clean(url))
+    if not name and not url:
+        return None
+    return {
+        'key': url or f"name:{name}",
+        'profile_url': url,
+        'name': name,
+        'avatar_url': avatar_url,
+        'is_verified': is_verified
+    }
+
+
+def normalize_comment(comment: Dict[str, Any]) -> Dict[str, Any]:
+    replies = comment.get('replies') or []
+    return {
+        'author': normalize_author(comment.get('author') or comment.get('author_name'), comment.get('author_url')),
+        'text': _first(comment, 'text'),
+        'posted_time': _first(comment, 'posted_time', 'timestamp'),
+        'scraped_time': _first(comment, 'scraped_time'),
+        'likes_count': int(_first(comment, 'likes_count', 'likes') or 0),
+        'replies_count': int(_first(comment, 'replies_count') or len(replies)),
+        'is_pinned': bool(comment.get('is_pinned')),
+        'is_edited': bool(comment.get('is_edited')),
+        'reactions': comment.get('reactions') or {},
+        'replies': [normalize_comment(reply) for reply in replies if isinstance(reply, dict)]
+    }
+
+
+def normalize_post(record: Dict[str, Any], group_url: Optional[str] = None) -> Dict[str, Any]:
+    """Пост любого из скраперов в общий вид: PostInfo (v2), словарь ленты Scraper20, ScraperMobile4"""
+    author = normalize_author(record.get('author') or record.get('author_name'), record.get('author_url'))
+    post_url = _first(record, 'post_url', 'url')
+    content = _first(record, 'content', 'text')
+    posted_time = _first(record, 'posted_time', 'timestamp')
+    group_url = _first(record, 'group_url') or group_url
+    return {
+        # Без URL пост опознается по группе, автору, времени и началу текста
+        'key': post_url or 'hash:' + _digest(group_url, author and author['key'], posted_time, (content or '')[:200]),
+        'post_url': post_url,
+        'group_url': group_url,
+        'author': author,
+        'content': content,
+        'posted_time': posted_time,
+        'scraped_time': _first(record, 'scraped_time', 'scraped_at'),
+        'likes_count': int(_first(record, 'likes_count', 'likes') or 0),
+        'shares_count': int(_first(record, 'shares_count', 'shares') or 0),
+        'post_type': _first(record, 'post_type'),
+        'reactions': record.get('reactions') or {},
+        'images': record.get('images') or [],
+        'external_links': record.get('external_links') or [],
+        'tags': record.get('tags') or [],
+        'comments': [normalize_comment(comment) for comment in record.get('comments') or [] if isinstance(comment, dict)]
+    }
+
+
+def iter_records(data: Any) -> Iterator[Dict[str, Any]]:
+    """Посты из сохраненных результатов: массив постов, {'post': ...} одного поста, {'posts': [...]} списка"""
+    def unwrap(item: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(item.get('post'), dict):
+            post = dict(item['post'])
+            post.setdefault('url', item.get('url'))
+            post.setdefault('scraped_at', item.get('scraped_at'))
+            return post
+        return item
+
+    if isinstance(data, list):
+        items = data
+    elif isinstance(data, dict) and isinstance(data.get('posts'), list):
+        items = data['posts']
+    elif isinstance(data, dict):
+        items = [data]
+    else:
+        items = []
+    for item in items:
+        if isinstance(item, dict) and 'error' not in item:
+            yield unwrap(item)
+
+
+class SQLiteStore:
+    """Upsert постов пачками; background=True - запись в отдельном потоке со своим соединением"""
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 1.0, background: bool = True):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Схема создается сразу, чтобы чтение работало до первой записи
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        conn.close()
+
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_lock = threading.Lock()
+        self._queue: Optional[Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._batch: List[Dict[str, Any]] = []
+        if background:
+            self._queue = Queue(maxsize=10000)
+            self._thread = threading.Thread(target=self._writer, name="SQLiteStoreWriter", daemon=True)
+            self._thread.start()
+        else:
+            self._conn = self._connect()
+
+    def __enter__(self) -> 'SQLiteStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def write(self, record: Dict[str, Any], group_url: Optional[str] = None):
+        """Поставить пост в очередь записи (нормализуется сразу - словарь потом можно менять)"""
+        post = normalize_post(record, group_url)
+        self.written += 1
+        if self._queue is not None:
+            self._queue.put(post)
+            return
+        self._batch.append(post)
+        if len(self._batch) >= self.batch_size:
+            self._write_batch(self._conn, self._batch)
+            self._batch = []
+
+    def write_many(self, records: Iterable[Dict[str, Any]], group_url: Optional[str] = None) -> int:
+        count = 0
+        for record in records:
+            self.write(record, group_url)
+            count += 1
+        return count
+
+    def flush(self):
+        """Дождаться записи всего, что поставлено в очередь"""
+        if self._queue is not None:
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+        elif self._batch:
+            self._write_batch(self._conn, self._batch)
+            self._batch = []
+
+    def close(self):
+        if self.closed:
+            return
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+        else:
+            self.flush()
+            self._conn.close()
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+        self.closed = True
+        logger.info(f"SQLite store closed: {self.written} posts written to {self.path}")
+
+    def _writer(self):
+        """Фоновый поток: пачка закрывается по размеру, по таймауту или по flush/close"""
+        conn = self._connect()
+        batch: List[Dict[str, Any]] = []
+        last_commit = time.time()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except Empty:
+                    item = None
+                if isinstance(item, dict):
+                    batch.append(item)
+                due = len(batch) >= self.batch_size or time.time() - last_commit >= self.flush_interval
+                if batch and (due or item is not None and not isinstance(item, dict)):
+                    self._write_batch(conn, batch)
+                    batch = []
+                    last_commit = time.time()
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is _STOP:
+                    return
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, posts: List[Dict[str, Any]]):
+        """Одна транзакция на пачку; ошибка откатывает пачку, но не останавливает запись"""
+        try:
+            with conn:
+                for post in posts:
+                    self._upsert_post(conn, post)
+        except sqlite3.Error as e:
+            logger.error(f"SQLite batch of {len(posts)} posts failed: {e}")
+
+    def _upsert_author(self, conn: sqlite3.Connection, author: Optional[Dict[str, Any]], seen: Optional[str]) -> Optional[int]:
+        if not author:
+            return None
+        return conn.execute(UPSERT_AUTHOR, (
+            author['key'], author['profile_url'], author['name'], author['avatar_url'],
+            int(author['is_verified']), seen, seen
+        )).fetchone()[0]
+
+    def _upsert_post(self, conn: sqlite3.Connection, post: Dict[str, Any]):
+        seen = post['scraped_time']
+        author_id = self._upsert_author(conn, post['author'], seen)
+        post_id = conn.execute(UPSERT_POST, (
+            post['key'], post['post_url'], post['group_url'], author_id, post['content'],
+            post['posted_time'], seen, post['likes_count'], post['shares_count'], post['post_type'],
+            json.dumps(post['reactions'], ensure_ascii=False),
+            json.dumps(post['images'], ensure_ascii=False),
+            json.dumps(post['external_links'], ensure_ascii=False),
+            json.dumps(post['tags'], ensure_ascii=False)
+        )).fetchone()[0]
+        for comment in post['comments']:
+            self._upsert_comment(conn, post['key'], post_id, None, None, comment, seen)
+
+    def _upsert_comment(self, conn: sqlite3.Connection, post_key: str, post_id: int, parent_key: Optional[str],
+                        parent_id: Optional[int], comment: Dict[str, Any], seen: Optional[str]):
+        author = comment['author']
+        # Время комментария в ключ не входит: относительные метки ("2 ч") меняются между обходами
+        comment_key = _digest(post_key, parent_key, author and author['key'], comment['text'])
+        comment_id = conn.execute(UPSERT_COMMENT, (
+            comment_key, post_id, parent_id, self._upsert_author(conn, author, seen), comment['text'],
+            comment['posted_time'], comment['scraped_time'] or seen, comment['likes_count'],
+            comment['replies_count'], int(comment['is_pinned']), int(comment['is_edited']),
+            json.dumps(comment['reactions'], ensure_ascii=False)
+        )).fetchone()[0]
+        for reply in comment['replies']:
+            self._upsert_comment(conn, post_key, post_id, comment_key, comment_id, reply, seen)
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        """Чтение отдельным соединением (WAL: не ждет фонового писателя)"""
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            return self._reader.execute(sql, tuple(params)).fetchall()
+
+    def has_post(self, post_url: str) -> bool:
+        return bool(self.query("SELECT 1 FROM posts WHERE post_url = ? LIMIT 1", (post_url,)))
+
+    def count_posts(self, group_url: Optional[str] = None) -> int:
+        if group_url is None:
+            return self.query("SELECT COUNT(*) FROM posts")[0][0]
+        return self.query("SELECT COUNT(*) FROM posts WHERE group_url = ?", (group_url,))[0][0]
+
+
+def import_json(store: SQLiteStore, paths: Iterable[str], group_url: Optional[str] = None) -> int:
+    """Импорт сохраненных результатов (scraped_posts.json, facebook_comments_*.json, *.jsonl)"""
+    total = 0
+    for path in paths:
+        if path.endswith('.jsonl'):
+            count = store.write_many(iter_jsonl([path]), group_url)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                count = store.write_many(iter_records(json.load(f)), group_url)
+        logger.info(f"Imported {count} posts from {path}")
+        total += count
+    store.flush()
+    return total
+
+
+def _synthetic_post(index: int, comments: int, group_url: str) -> Dict[str, Any]:
+    """Пост в формате PostInfo (v2) для замеров"""
+    return {
+        'author': {'name': f"Author {index % 1000}", 'profile_url': f"https://www.facebook.com/user{index % 1000}"},
+        'content': f"Synthetic post {index} " * 8,
+        'posted_time': f"2024-01-01T00:00:{index % 60:02d}",
+        'post_url': f"{group_url}/posts/{index}/",
+        'external_links': [], 'images': [],
+        'comments': [
+            {'author': {'name': f"Commenter {j % 300}", 'profile_url': f"https://www.facebook.com/c{j % 300}"},
+             'text': f"Comment {j} on post {index}", 'posted_time': '', 'scraped_time': '',
+             'likes_count': j % 4, 'replies': []}
+            for j in range(comments)
+        ],
+        'scraped_time': '2024-01-02T00:00:00',
+        'likes_count': index % 100, 'shares_count': index % 7, 'post_type': 'text'
+    }
+
+
+def benchmark(path: str, posts: int = 10000, comments: int = 10, batch_size: int = 200) -> Dict[str, Any]:
+    """Скорость записи: первая вставка, повторный обход (upsert тех же постов) и выборка по URL"""
+    if os.path.exists(path):
+        raise ValueError(f"Benchmark database {path} already exists")
+    group_url = "https://www.facebook.com/groups/bench"
+    results: Dict[str, Any] = {'posts': posts, 'comments_per_post': comments, 'batch_size': batch_size}
+    with SQLiteStore(path, batch_size=batch_size) as store:
+        for phase in ('insert', 'upsert'):
+            started = time.time()
+            for index in range(posts):
+                store.write(_synthetic_post(index, comments, group_url))
+            store.flush()
+            elapsed = time.time() - started
+            results[f'{phase}_sec'] = round(elapsed, 3)
+            results[f'{phase}_posts_per_sec'] = round(posts / elapsed, 1) if elapsed else None
+
+        started = time.time()
+        lookups = min(posts, 1000)
+        for index in range(lookups):
+            store.has_post(f"{group_url}/posts/{index}/")
+        results['lookup_ms'] = round((time.time() - started) / max(lookups, 1) * 1000, 3)
+        results['rows'] = {
+            table: store.query(f"SELECT COUNT(*) FROM {table}")[0][0]
+            for table in ('posts', 'comments', 'authors')
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite-хранилище результатов скраперов")
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help="Импорт сохраненных JSON/JSONL")
+    import_parser.add_argument('database')
+    import_parser.add_argument('files', nargs='+')
+    import_parser.add_argument('--group', default=None, help="URL группы для постов без него")
+    bench_parser = commands.add_parser('bench', help="Замер скорости записи")
+    bench_parser.add_argument('--database', default='bench.db')
+    bench_parser.add_argument('--posts', type=int, default=10000)
+    bench_parser.add_argument('--comments', type=int, default=10)
+    bench_parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'import':
+        with SQLiteStore(args.database) as store:
+            print(f"Импортировано постов: {import_json(store, args.files, args.group)}")
+    else:
+        print(json.dumps(benchmark(args.database, args.posts, args.comments, args.batch_size), indent=2))
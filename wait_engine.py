@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Ожидания по событиям вместо фиксированных пауз.
+# Каждое ожидание завершается, как только условие выполнено; прежние задержки
+# (scroll_delay, 2-5 секунд после кликов) остаются только верхней границей.
+# Условия: появились новые элементы (дети ленты, комментарии), выросла высота
+# страницы, сменился URL, затихла сеть для запросов по шаблону URL.
+# SeleniumWaiter - для v2 и ScraperMobile4, PlaywrightWaiter - для Scraper20.
+
+logger = logging.getLogger(__name__)
+
+# Запросы, которыми Facebook догружает ленту и комментарии
+GRAPHQL_URL_PATTERN = r'/api/graphql'
+
+# Количество элементов по списку селекторов (без дубликатов; невалидные селекторы пропускаются)
+COUNT_FN = r"""
+function (selectors, root) {
+    var seen = new Set();
+    selectors.forEach(function (selector) {
+        try {
+            (root || document).querySelectorAll(selector).forEach(function (el) { seen.add(el); });
+        } catch (e) {}
+    });
+    return seen.size;
+}
+"""
+
+# [высота страницы, количество детей ленты]
+FEED_STATE_FN = r"""
+function (selector) {
+    var feed = document.querySelector(selector);
+    return [document.body ? document.body.scrollHeight : 0, feed ? feed.children.length : 0];
+}
+"""
+
+# Учет сетевых запросов страницы: незавершенные fetch / XMLHttpRequest (обертки) и
+# журнал завершений (обертки + PerformanceObserver, кольцевой буфер). Запрос ленты,
+# начатый прокруткой, но еще не завершенный, держит сеть "не тихой".
+# Fetch считается завершенным после чтения тела (клон ответа), XHR - по loadend.
+# Возвращает performance.now() - точку отсчета тишины для ожидания.
+INSTALL_NETWORK_JS = r"""
+if (!window.__waitNet) {
+    var net = window.__waitNet = {start: performance.now(), entries: [], pending: {}, seq: 0};
+    var finish = function (url) {
+        net.entries.push([url, performance.now()]);
+        if (net.entries.length > 500) { net.entries.splice(0, net.entries.length - 500); }
+    };
+    var begin = function (url) {
+        var id = ++net.seq;
+        net.pending[id] = url;
+        return id;
+    };
+    var end = function (id) {
+        if (id in net.pending) {
+            var url = net.pending[id];
+            delete net.pending[id];
+            finish(url);
+        }
+    };
+    try {
+        new PerformanceObserver(function (list) {
+            list.getEntries().forEach(function (entry) { finish(entry.name); });
+        }).observe({type: 'resource', buffered: false});
+    } catch (e) {}
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function (input) {
+            var url = typeof input === 'string' ? input : (input && input.url) || String(input);
+            var id = begin(url);
+            var promise;
+            try {
+                promise = originalFetch.apply(this, arguments);
+            } catch (e) {
+                end(id);
+                throw e;
+            }
+            return promise.then(function (response) {
+                try {
+                    response.clone().arrayBuffer().then(function () { end(id); }, function () { end(id); });
+                } catch (e) {
+                    end(id);
+                }
+                return response;
+            }, function (error) {
+                end(id);
+                throw error;
+            });
+        };
+    }
+    if (window.XMLHttpRequest) {
+        var originalOpen = XMLHttpRequest.prototype.open;
+        var originalSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.open = function (method, url) {
+            this.__waitUrl = String(url);
+            return originalOpen.apply(this, arguments);
+        };
+        XMLHttpRequest.prototype.send = function () {
+            var id = begin(this.__waitUrl || '');
+            this.addEventListener('loadend', function () { end(id); });
+            try {
+                return originalSend.apply(this, arguments);
+            } catch (e) {
+                end(id);
+                throw e;
+            }
+        };
+    }
+}
+return performance.now();
+"""
+
+# Миллисекунды с последнего завершения запроса по шаблону (не раньше отметки arguments[1]);
+# -1 - такой запрос еще выполняется
+NETWORK_IDLE_MS_JS = r"""
+var net = window.__waitNet;
+if (!net) { return 0; }
+var re = new RegExp(arguments[0]);
+for (var id in net.pending) {
+    if (re.test(net.pending[id])) { return -1; }
+}
+var last = Math.max(net.start, arguments[1] || 0);
+net.entries.forEach(function (entry) {
+    if (re.test(entry[0]) && entry[1] > last) { last = entry[1]; }
+});
+return performance.now() - last;
+"""
+
+
+class WaitStats:
+    """Сколько ожиданий завершилось раньше верхней границы и сколько времени сэкономлено"""
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed: float, bound: float, satisfied: bool):
+        with self._lock:
+            entry = self.stats.setdefault(name, {'calls': 0, 'satisfied': 0, 'waited': 0.0, 'saved': 0.0})
+            entry['calls'] += 1
+            entry['satisfied'] += int(satisfied)
+            entry['waited'] += elapsed
+            entry['saved'] += max(0.0, bound - elapsed)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {key: round(value, 2) for key, value in entry.items()}
+                for name, entry in self.stats.items()
+            }
+
+
+class SeleniumWaiter:
+    """Ожидания для Selenium-драйвера (опрос условий с малым интервалом)"""
+
+    def __init__(self, driver, stats: Optional[WaitStats] = None, poll_interval: float = 0.1):
+        self.driver = driver
+        self.stats = stats or WaitStats()
+        self.poll_interval = poll_interval
+
+    def until(self, name: str, condition: Callable[[], Any], timeout: float) -> bool:
+        """Ждет истинности condition() не дольше timeout секунд"""
+        start = time.time()
+        deadline = start + timeout
+        satisfied = False
+        while True:
+            try:
+                satisfied = bool(condition())
+            except Exception as e:
+                logger.debug(f"Wait condition '{name}' raised: {e}")
+            if satisfied or time.time() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        self.stats.record(name, time.time() - start, timeout, satisfied)
+        return satisfied
+
+    def count(self, selectors: List[str], root=None) -> int:
+        return self.driver.execute_script(f"return ({COUNT_FN})(arguments[0], arguments[1]);", selectors, root)
+
+    def for_count_increase(self, selectors: List[str], previous: int, timeout: float, root=None) -> bool:
+        """Элементов по селекторам стало больше previous (новые комментарии, посты)"""
+        return self.until('count_increase', lambda: self.count(selectors, root) > previous, timeout)
+
+    def for_element(self, selectors: List[str], timeout: float) -> bool:
+        """Появился хотя бы один элемент"""
+        return self.until('element', lambda: self.count(selectors) > 0, timeout)
+
+    def feed_state(self, feed_selector: str = 'div[role="feed"]') -> List[int]:
+        """[высота страницы, количество детей ленты]"""
+        return self.driver.execute_script(f"return ({FEED_STATE_FN})(arguments[0]);", feed_selector)
+
+    def for_feed_growth(self, previous_state: List[int], timeout: float,
+                        feed_selector: str = 'div[role="feed"]') -> bool:
+        """В ленте появились новые дети или выросла высота страницы"""
+        def grown():
+            height, children = self.feed_state(feed_selector)
+            return height > previous_state[0] or children > previous_state[1]
+        return self.until('feed_growth', grown, timeout)
+
+    def for_url_change(self, previous_url: str, timeout: float) -> bool:
+        return self.until('url_change', lambda: self.driver.current_url != previous_url, timeout)
+
+    def for_ready_state(self, timeout: float) -> bool:
+        """document.readyState == 'complete'"""
+        return self.until(
+            'ready_state',
+            lambda: self.driver.execute_script("return document.readyState") == 'complete',
+            timeout
+        )
+
+    def for_network_quiet(self, url_pattern: str = '.*', quiet: float = 0.5, timeout: float = 5.0) -> bool:
+        """Нет незавершенных запросов по шаблону (регулярное выражение) и quiet секунд без их завершений"""
+        since = 0
+        try:
+            since = self.driver.execute_script(INSTALL_NETWORK_JS) or 0
+        except Exception as e:
+            logger.debug(f"Network observer unavailable: {e}")
+        return self.until(
+            'network_quiet',
+            lambda: self.driver.execute_script(NETWORK_IDLE_MS_JS, url_pattern, since) >= quiet * 1000,
+            timeout
+        )
+
+
+class PlaywrightWaiter:
+    """Ожидания для страниц Playwright: условия проверяются в браузере каждые 100 мс"""
+
+    def __init__(self, stats: Optional[WaitStats] = None):
+        self.stats = stats or WaitStats()
+        # Незавершенные и недавно завершенные запросы по страницам (для тишины сети)
+        self._inflight: Dict[Any, set] = {}
+        self._finished: Dict[Any, List] = {}
+
+    async def _wait_function(self, name: str, page, expression: str, arg: Any, timeout: float) -> bool:
+        start = time.time()
+        satisfied = True
+        try:
+            await page.wait_for_function(expression, arg=arg, timeout=timeout * 1000, polling=100)
+        except Exception as e:
+            # Таймаут - штатный исход: прежняя задержка как верхняя граница
+            satisfied = False
+            logger.debug(f"Wait '{name}' ended without condition: {e}")
+        self.stats.record(name, time.time() - start, timeout, satisfied)
+        return satisfied
+
+    async def count(self, page, selectors: List[str]) -> int:
+        return await page.evaluate(f"(selectors) => ({COUNT_FN})(selectors, null)", selectors)
+
+    async def for_count_increase(self, page, selectors: List[str], previous: int, timeout: float) -> bool:
+        """Элементов по селекторам стало больше previous"""
+        expression = f"(args) => ({COUNT_FN})(args.selectors, null) > args.previous"
+        return await self._wait_function('count_increase', page, expression,
+                                         {'selectors': selectors, 'previous': previous}, timeout)
+
+    async def for_element(self, page, selectors: List[str], timeout: float) -> bool:
+        """Появился хотя бы один элемент"""
+        return await self.for_count_increase(page, selectors, 0, timeout)
+
+    async def feed_state(self, page, feed_selector: str = 'div[role="feed"]') -> List[int]:
+        return await page.evaluate(f"(selector) => ({FEED_STATE_FN})(selector)", feed_selector)
+
+    async def for_feed_growth(self, page, previous_state: List[int], timeout: float,
+                              feed_selector: str = 'div[role="feed"]') -> bool:
+        """В ленте появились новые дети или выросла высота страницы"""
+        expression = (
+            f"(args) => {{ var state = ({FEED_STATE_FN})(args.selector); "
+            f"return state[0] > args.previous[0] || state[1] > args.previous[1]; }}"
+        )
+        return await self._wait_function('feed_growth', page, expression,
+                                         {'selector': feed_selector, 'previous': previous_state}, timeout)
+
+    def track_network(self, page):
+        """Подписка на события запросов страницы (один раз на страницу)"""
+        if page in self._inflight:
+            return
+        inflight = self._inflight[page] = set()
+        finished = self._finished[page] = []
+
+        def done(request):
+            inflight.discard(request)
+            finished.append((request.url, time.time()))
+            if len(finished) > 500:
+                del finished[:len(finished) - 500]
+
+        def forget(_page=None):
+            # Закрытая страница (перезапуск, вкладки шардов) больше не держит свои списки
+            self._inflight.pop(page, None)
+            self._finished.pop(page, None)
+
+        page.on("request", inflight.add)
+        page.on("requestfinished", done)
+        page.on("requestfailed", done)
+        page.on("close", forget)
+
+    async def for_network_quiet(self, page, url_pattern: str = '.*', quiet: float = 0.5, timeout: float = 5.0) -> bool:
+        """Нет незавершенных запросов по шаблону (регулярное выражение) и quiet секунд без их завершений"""
+        self.track_network(page)
+        # Ссылки берутся один раз: при закрытии страницы записи удаляются из словарей
+        inflight, finished = self._inflight[page], self._finished[page]
+        pattern = re.compile(url_pattern)
+        start = time.time()
+        satisfied = False
+        while True:
+            now = time.time()
+            pending = any(pattern.search(request.url) for request in inflight)
+            last = max([t for url, t in finished if pattern.search(url)], default=start)
+            if not pending and now - max(last, start) >= quiet:
+                satisfied = True
+                break
+            if now - start >= timeout:
+                break
+            await asyncio.sleep(0.05)
+        self.stats.record('network_quiet', time.time() - start, timeout, satisfied)
+        return satisfied